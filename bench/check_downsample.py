@@ -0,0 +1,201 @@
+"""
+Harvia Downsampling Check
+Compares the NumPy engine in harvia_downsample with plain Python reference
+implementations of the same three methods on random series: with NaN
+gaps, duplicate timestamps, empty buckets and ranges wider than the data,
+fed both in one call and in random chunks down to a single sample. Reports
+every mismatch and exits non-zero if there was any. Needs numpy.
+
+Usage: python -m bench.check_downsample [--series 200] [--seed 1]
+"""
+
+import argparse
+import math
+import random
+import sys
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from harvia_downsample import METHODS, downsample, downsampler
+
+Points = List[Tuple[int, float]]
+
+
+# ========== REFERENCE ==========
+
+
+def reference_buckets(
+    timestamps: Sequence[int],
+    values: Sequence[float],
+    start_ms: int,
+    end_ms: int,
+    buckets: int,
+) -> Dict[int, Points]:
+    """Usable samples by bucket, in input order"""
+    span = end_ms - start_ms + 1
+    grouped: Dict[int, Points] = {}
+    for timestamp, value in zip(timestamps, values):
+        if math.isnan(value) or not start_ms <= timestamp <= end_ms:
+            continue
+        bucket = (timestamp - start_ms) * buckets // span
+        grouped.setdefault(bucket, []).append((timestamp, value))
+    return grouped
+
+
+def reference_average(timestamps, values, start_ms, end_ms, buckets) -> Points:
+    span = end_ms - start_ms + 1
+    grouped = reference_buckets(timestamps, values, start_ms, end_ms, buckets)
+    result = []
+    for bucket, points in sorted(grouped.items()):
+        bucket_start = start_ms + -(-bucket * span // buckets)  # ceiling division
+        result.append((bucket_start, sum(v for _, v in points) / len(points)))
+    return result
+
+
+def reference_minmax(timestamps, values, start_ms, end_ms, buckets) -> Points:
+    grouped = reference_buckets(timestamps, values, start_ms, end_ms, buckets)
+    result = []
+    for _, points in sorted(grouped.items()):
+        low = min(points, key=lambda point: point[1])  # first of equal values
+        high = max(points, key=lambda point: point[1])
+        first, second = (low, high) if low[0] <= high[0] else (high, low)
+        result.append(first)
+        if second[0] != first[0]:
+            result.append(second)
+    return result
+
+
+def reference_lttb(timestamps, values, start_ms, end_ms, buckets) -> Points:
+    """LTTB on the time grid, one bucket at a time, as usually written
+
+    The first usable sample is kept and the rest are bucketed; each bucket
+    keeps its point of largest triangle with the previous kept point and
+    the mean of the next non-empty bucket (the last bucket uses the last
+    sample), and the last sample is kept if not already chosen.
+    """
+    usable = [
+        (t, v)
+        for t, v in zip(timestamps, values)
+        if not math.isnan(v) and start_ms <= t <= end_ms
+    ]
+    if not usable:
+        return []
+    first, rest = usable[0], usable[1:]
+    grouped = reference_buckets(
+        [t for t, _ in rest], [v for _, v in rest], start_ms, end_ms, buckets
+    )
+    order = sorted(grouped)
+    kept = [first]
+    anchor_time, anchor_value = float(first[0]), first[1]
+    for position, bucket in enumerate(order):
+        if position + 1 < len(order):
+            following = grouped[order[position + 1]]
+            target_time = sum(t for t, _ in following) / len(following)
+            target_value = sum(v for _, v in following) / len(following)
+        else:
+            target_time, target_value = float(rest[-1][0]), rest[-1][1]
+        best = max(
+            grouped[bucket],
+            key=lambda point: abs(
+                (anchor_time - target_time) * (point[1] - anchor_value)
+                - (anchor_time - point[0]) * (target_value - anchor_value)
+            ),
+        )
+        kept.append(best)
+        anchor_time, anchor_value = float(best[0]), best[1]
+    if rest and kept[-1][0] != rest[-1][0]:
+        kept.append(rest[-1])
+    return kept
+
+
+REFERENCES = {
+    "average": reference_average,
+    "minmax": reference_minmax,
+    "lttb": reference_lttb,
+}
+
+
+# ========== CHECK ==========
+
+
+def random_series(rng: random.Random) -> Tuple[List[int], List[float]]:
+    """Time-ordered samples with noise, NaNs, gaps and repeated timestamps"""
+    count = rng.choice([0, 1, 2, 3, rng.randint(4, 50), rng.randint(50, 3000)])
+    timestamps, values = [], []
+    timestamp = rng.randint(0, 10**12)
+    for i in range(count):
+        timestamp += rng.choice([0, 1, 1000, 60000, 60000, rng.randint(1, 10**7)])
+        timestamps.append(timestamp)
+        value = round(math.sin(i / 17) * 40 + rng.gauss(0, 5), rng.choice([0, 3]))
+        values.append(float("nan") if rng.random() < 0.05 else value)
+    return timestamps, values
+
+
+def random_chunks(rng: random.Random, count: int) -> List[Tuple[int, int]]:
+    chunks, start = [], 0
+    while start < count:
+        size = rng.choice([1, 2, rng.randint(1, 100), rng.randint(100, 2000)])
+        chunks.append((start, min(start + size, count)))
+        start += size
+    return chunks
+
+
+def same(expected: Points, timestamps: np.ndarray, values: np.ndarray) -> bool:
+    return len(expected) == len(timestamps) and all(
+        t == int(got_t) and math.isclose(v, float(got_v), rel_tol=1e-9, abs_tol=1e-9)
+        for (t, v), got_t, got_v in zip(expected, timestamps, values)
+    )
+
+
+def check(series: int, seed: int) -> int:
+    """Number of mismatches over the given number of random series"""
+    rng = random.Random(seed)
+    failures = 0
+    for case in range(series):
+        timestamps, values = random_series(rng)
+        if timestamps:
+            low, high = timestamps[0], timestamps[-1]
+            pad = rng.choice([0, 0, rng.randint(0, max(high - low, 1))])
+            start_ms, end_ms = low - pad, high + rng.choice([0, pad])
+        else:
+            start_ms, end_ms = 0, 1000
+        buckets = rng.choice([1, 2, 7, rng.randint(1, 300), 1000])
+        t_array = np.array(timestamps, dtype=np.int64)
+        v_array = np.array(values, dtype=np.float64)
+
+        for method in METHODS:
+            expected = REFERENCES[method](
+                timestamps, values, start_ms, end_ms, buckets
+            )
+            whole = downsample(t_array, v_array, buckets, method, start_ms, end_ms)
+            sampler = downsampler(method, start_ms, end_ms, buckets)
+            for lo, hi in random_chunks(rng, len(timestamps)):
+                sampler.add(t_array[lo:hi], v_array[lo:hi])
+            chunked = sampler.result()
+            for how, (got_t, got_v) in (("whole", whole), ("chunked", chunked)):
+                if not same(expected, got_t, got_v):
+                    failures += 1
+                    print(
+                        f"MISMATCH series {case} {method} {how}: "
+                        f"{len(timestamps)} samples, {buckets} buckets, "
+                        f"{len(expected)} expected vs {len(got_t)} points",
+                        file=sys.stderr,
+                    )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check harvia_downsample")
+    parser.add_argument("--series", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    failures = check(args.series, args.seed)
+    if failures:
+        sys.exit(f"{failures} mismatch(es)")
+    print(f"{args.series} series x {len(METHODS)} methods match the reference")
+
+
+if __name__ == "__main__":
+    main()
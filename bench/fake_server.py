@@ -0,0 +1,686 @@
+"""
+Harvia Stand-in Server
+Local, offline imitation of the Harvia cloud for benchmarks: /endpoints,
+/auth/*, the device and data REST routes and the device/data/events
+GraphQL services, with realistically sized payloads, nextToken pagination
+injectable per-request latency and gzip for clients that accept it. The
+GraphQL "wss" endpoint is a graphql-ws stand-in for the real-time
+measurements feed, with control routes to drop every feed connection and
+to read what the feed saw (connections, subscriptions, bearer tokens).
+
+Run standalone with: python -m bench.fake_server --port 8765 --latency-ms 40
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import random
+import re
+import socket
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+SAMPLE_INTERVAL_MS = 60 * 1000
+SESSION_INTERVAL_MS = 12 * 3600 * 1000
+PAGE_SIZE = 1000
+EVENTS_PER_DEVICE = 400
+EVENT_PAGE_SIZE = 50
+BASE_TIMESTAMP_MS = 1700000000000
+FEED_INTERVAL = 0.05  # seconds between pushed feed rounds
+KEEPALIVE_INTERVAL = 1.0  # seconds between graphql-ws "ka" messages
+KEEPALIVE_TIMEOUT_MS = 10000  # advertised in connection_ack
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_ALIASED_FIELD = re.compile(
+    r"(\w+)\s*:\s*(devicesStatesGet|devicesMeasurementsLatest)\(([^)]*)\)"
+)
+_ARGUMENT = re.compile(r"(\w+):\s*\$(\w+)")
+
+
+def iso(timestamp_ms: int) -> str:
+    return (
+        datetime.fromtimestamp(timestamp_ms / 1000, timezone.utc).isoformat(
+            timespec="milliseconds"
+        )[:-6]
+        + "Z"
+    )
+
+
+def to_ms(value: str) -> int:
+    if value.isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+def _b64url(obj: Dict[str, Any]) -> str:
+    raw = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def id_token(username: str, serial: int) -> str:
+    """Unsigned JWT-shaped id token carrying the cognito:username claim"""
+    header = _b64url({"alg": "none", "typ": "JWT"})
+    claims = _b64url({"cognito:username": username, "serial": serial})
+    return f"{header}.{claims}.bench"
+
+
+class FakeHarvia:
+    """Deterministic fake fleet and its API responses"""
+
+    def __init__(
+        self,
+        devices: int = 20,
+        cabins: int = 2,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        page_size: int = PAGE_SIZE,
+        feed_interval: float = FEED_INTERVAL,
+    ):
+        self.device_ids = [f"HRV-BENCH-{i:04d}" for i in range(devices)]
+        self.cabin_ids = [f"C{i + 1}" for i in range(cabins)]
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.feed_interval = feed_interval
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        # Every id token handed out; the feed refuses any other
+        self.issued_tokens = set()
+        self._token_serial = 0
+        self.feeds: List["FeedConnection"] = []
+        self.feed_stats = {"connections": 0, "subscriptions": 0, "rejected": 0}
+        self.feed_tokens: List[str] = []  # bearer token of each connection
+
+    def delay(self):
+        with self._lock:
+            self.requests += 1
+        pause = self.latency + random.uniform(0, self.jitter)
+        if pause > 0:
+            time.sleep(pause)
+
+    # ========== PAYLOADS ==========
+
+    def measurement(self, device_id: str, cabin_id: str, timestamp_ms: int):
+        minute = timestamp_ms // SAMPLE_INTERVAL_MS
+        phase = (minute % 720) / 720
+        return {
+            "deviceId": device_id,
+            "subId": cabin_id,
+            "timestamp": str(timestamp_ms),
+            "organizationId": "org-bench",
+            "deviceCanSee": ["org-bench"],
+            "sessionId": f"{device_id}-s{timestamp_ms // SESSION_INTERVAL_MS}",
+            "type": "SENSOR",
+            "data": {
+                "temperature": round(20 + 70 * min(phase * 4, 1), 1),
+                "humidity": round(15 + 10 * phase, 1),
+                "targetTemp": 80,
+                "targetHum": 20,
+                "presence": (minute // 7) % 3 if phase < 0.25 else 0,
+                "heaterOn": phase < 0.25,
+                "remainingTime": max(0, int(180 - phase * 720)),
+                "wifiRSSI": -55,
+            },
+        }
+
+    def latest(self, device_id: str, cabin_id: str) -> Dict[str, Any]:
+        now = int(time.time() * 1000)
+        item = self.measurement(device_id, cabin_id, now - now % SAMPLE_INTERVAL_MS)
+        item["shadowName"] = cabin_id
+        item["timestamp"] = iso(int(item["timestamp"]))
+        return item
+
+    def measurement_page(
+        self,
+        device_id: str,
+        cabin_ids: List[str],
+        start_ms: int,
+        end_ms: int,
+        next_token: Optional[str],
+        sample_amount: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        step = SAMPLE_INTERVAL_MS
+        if sample_amount:
+            step = max((end_ms - start_ms) // sample_amount, SAMPLE_INTERVAL_MS)
+        first = start_ms + (-start_ms) % SAMPLE_INTERVAL_MS
+        offset = int(next_token) if next_token else first
+        per_sample = len(cabin_ids)
+        last = min(end_ms, offset + (self.page_size // per_sample) * step - 1)
+        items = [
+            self.measurement(device_id, cabin_id, timestamp)
+            for timestamp in range(offset, last + 1, step)
+            for cabin_id in cabin_ids
+        ]
+        following = offset + (self.page_size // per_sample) * step
+        return items, str(following) if following <= end_ms else None
+
+    # ========== REST ==========
+
+    def rest(self, method: str, path: str, query: Dict[str, str], body: Any):
+        if path == "/auth/token":
+            return 200, self.tokens(body["username"], refresh=True)
+        if path == "/auth/refresh":
+            return 200, self.tokens(body["email"], refresh=False)
+        if path == "/auth/revoke":
+            return 200, {"success": True}
+        if path == "/devices" and method == "GET":
+            start = int(query.get("nextToken") or 0)
+            count = int(query.get("maxResults") or 50)
+            devices = [
+                {
+                    "name": device_id,
+                    "type": "FENIX",
+                    "attr": [
+                        {"key": "name", "value": f"Bench Sauna {device_id[-4:]}"},
+                        {"key": "brand", "value": "Harvia"},
+                        {"key": "serialNumber", "value": device_id[-4:] * 3},
+                    ],
+                    "roles": ["owner"],
+                    "via": "Organization",
+                }
+                for device_id in self.device_ids[start : start + count]
+            ]
+            result = {"devices": devices}
+            if start + count < len(self.device_ids):
+                result["nextToken"] = str(start + count)
+            return 200, result
+        if path == "/devices/state":
+            return 200, self.device_state(query["deviceId"], query.get("subId", "C1"))
+        if path in ("/devices/command", "/devices/target", "/devices/profile"):
+            return 200, {"success": True}
+        if path == "/data/latest-data":
+            return 200, self.latest(query["deviceId"], query.get("cabinId", "C1"))
+        if path == "/data/telemetry-history":
+            cabin_id = query.get("cabinId", "C1")
+            items, next_token = self.measurement_page(
+                query["deviceId"],
+                [cabin_id],
+                to_ms(query["startTimestamp"]),
+                to_ms(query["endTimestamp"]),
+                query.get("nextToken"),
+                int(query["sampleAmount"]) if query.get("samplingMode") else None,
+            )
+            result = {
+                "deviceId": query["deviceId"],
+                "shadowName": cabin_id,
+                "measurements": items,
+            }
+            if next_token:
+                result["nextToken"] = next_token
+            return 200, result
+        return 404, {"error": "NotFound", "message": path}
+
+    def tokens(self, username: str, refresh: bool) -> Dict[str, Any]:
+        with self._lock:
+            self._token_serial += 1
+            token = id_token(username, self._token_serial)
+            self.issued_tokens.add(token)
+        payload = {"idToken": token, "accessToken": "bench-access-token"}
+        payload["expiresIn"] = 3600
+        if refresh:
+            payload["refreshToken"] = "bench-refresh-token"
+        return payload
+
+    def device_state(self, device_id: str, cabin_id: str) -> Dict[str, Any]:
+        reported = {"temp": 78.5, "hum": 18, "heaterOn": True, "targetTemp": 80}
+        return {
+            "deviceId": device_id,
+            "shadowName": cabin_id,
+            "desired": json.dumps({"targetTemp": 80}),
+            "reported": json.dumps(reported),
+            "timestamp": str(int(time.time() * 1000)),
+            "version": 42,
+            "connectionState": {
+                "connected": True,
+                "updatedTimestamp": str(int(time.time() * 1000)),
+            },
+        }
+
+    # ========== GRAPHQL ==========
+
+    def graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        aliased = {}
+        for alias, field, arguments in _ALIASED_FIELD.findall(query):
+            args = {
+                name: variables.get(variable)
+                for name, variable in _ARGUMENT.findall(arguments)
+            }
+            aliased[alias] = self.graphql_field(field, args)
+        if aliased:
+            return {"data": aliased}
+
+        for field in (
+            "devicesMeasurementsList",
+            "devicesSessionsList",
+            "devicesEventsList",
+            "eventsMetadataList",
+            "usersDevicesList",
+            "devicesGet",
+            "devicesStatesGet",
+            "devicesMeasurementsLatest",
+        ):
+            if field in query:
+                return {"data": {field: self.graphql_field(field, variables)}}
+        return {"errors": [{"message": "Unknown operation"}]}
+
+    def graphql_field(self, field: str, args: Dict[str, Any]) -> Any:
+        device_id = args.get("deviceId")
+        if field == "devicesMeasurementsLatest":
+            return [
+                dict(self.latest(device_id, cabin_id), data=json.dumps({"presence": 0}))
+                for cabin_id in self.cabin_ids
+            ]
+        if field == "devicesStatesGet":
+            return self.device_state(device_id, args.get("shadowName") or "C1")
+        if field == "devicesGet":
+            return {
+                "id": device_id,
+                "type": "FENIX",
+                "attr": [{"key": "name", "value": f"Bench Sauna {device_id[-4:]}"}],
+                "roles": ["owner"],
+                "via": "Organization",
+            }
+        if field == "usersDevicesList":
+            start = int(args.get("nextToken") or 0)
+            devices = [
+                {"id": device_id, "type": "FENIX", "attr": [], "roles": ["owner"]}
+                for device_id in self.device_ids[start : start + 25]
+            ]
+            following = start + 25
+            return {
+                "devices": devices,
+                "nextToken": str(following) if following < len(self.device_ids) else None,
+            }
+        if field == "devicesMeasurementsList":
+            sampling = (args.get("samplingMode") or "NONE").upper() != "NONE"
+            items, next_token = self.measurement_page(
+                device_id,
+                self.cabin_ids,
+                to_ms(args["startTimestamp"]),
+                to_ms(args["endTimestamp"]),
+                args.get("nextToken"),
+                args.get("sampleAmount") if sampling else None,
+            )
+            for item in items:
+                item["data"] = json.dumps(item["data"])
+            return {"measurementItems": items, "nextToken": next_token}
+        if field == "devicesSessionsList":
+            start_ms = to_ms(args["startTimestamp"])
+            end_ms = to_ms(args["endTimestamp"])
+            first = start_ms + (-start_ms) % SESSION_INTERVAL_MS
+            offset = int(args.get("nextToken") or first)
+            timestamps = range(offset, end_ms + 1, SESSION_INTERVAL_MS)[:100]
+            sessions = [
+                {
+                    "deviceId": device_id,
+                    "sessionId": f"{device_id}-s{timestamp // SESSION_INTERVAL_MS}",
+                    "organizationId": "org-bench",
+                    "subId": "C1",
+                    "timestamp": iso(timestamp),
+                    "type": "SAUNA",
+                    "durationMs": 3 * 3600 * 1000,
+                    "stats": json.dumps({"maxTemp": 90.0, "avgTemp": 78.3}),
+                }
+                for timestamp in timestamps
+            ]
+            following = offset + 100 * SESSION_INTERVAL_MS
+            return {
+                "sessions": sessions,
+                "nextToken": str(following) if following <= end_ms else None,
+            }
+        if field == "devicesEventsList":
+            start = int(args.get("nextToken") or 0)
+            events = [
+                {
+                    "deviceId": device_id,
+                    "timestamp": str(BASE_TIMESTAMP_MS + i * 3600 * 1000),
+                    "eventId": f"evt-{i % 12}",
+                    "type": "ALARM" if i % 5 == 0 else "INFO",
+                    "eventState": "INACTIVE",
+                    "severity": "LOW",
+                    "sensorName": "temperature",
+                    "sensorValue": 85.0,
+                    "displayName": "Temperature reached",
+                }
+                for i in range(start, min(start + EVENT_PAGE_SIZE, EVENTS_PER_DEVICE))
+            ]
+            following = start + EVENT_PAGE_SIZE
+            return {
+                "events": events,
+                "nextToken": str(following) if following < EVENTS_PER_DEVICE else None,
+            }
+        if field == "eventsMetadataList":
+            return {
+                "eventMetadataItems": [
+                    {"eventId": f"evt-{i}", "name": f"Event {i}", "description": "-"}
+                    for i in range(12)
+                ],
+                "nextToken": None,
+            }
+        return None
+
+
+    # ========== REAL-TIME FEED ==========
+
+    def feed_item(self, receiver: str, device_id: str, cabin_id: str):
+        now = int(time.time() * 1000)
+        item = self.measurement(device_id, cabin_id, now)
+        del item["organizationId"], item["deviceCanSee"]
+        item["data"] = json.dumps(item["data"])
+        return {"devicesMeasurementsUpdateFeed": {"receiver": receiver, "item": item}}
+
+    def run_feed(self):
+        """Push one measurement per cabin to every subscription, forever"""
+        last_keepalive = time.monotonic()
+        while True:
+            time.sleep(self.feed_interval)
+            with self._lock:
+                feeds = list(self.feeds)
+            keepalive = time.monotonic() - last_keepalive >= KEEPALIVE_INTERVAL
+            if keepalive:
+                last_keepalive = time.monotonic()
+            for feed in feeds:
+                if keepalive:
+                    feed.send({"type": "ka"})
+                if feed.subscription_id is None:
+                    continue
+                for device_id in self.device_ids:
+                    for cabin_id in self.cabin_ids:
+                        feed.send(
+                            {
+                                "type": "data",
+                                "id": feed.subscription_id,
+                                "payload": {
+                                    "data": self.feed_item(
+                                        feed.receiver, device_id, cabin_id
+                                    )
+                                },
+                            }
+                        )
+
+    def drop_feeds(self) -> int:
+        """Cut every feed connection without a close handshake"""
+        with self._lock:
+            feeds, self.feeds = self.feeds, []
+        for feed in feeds:
+            feed.drop()
+        return len(feeds)
+
+    def feed_report(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self.feed_stats, active=len(self.feeds), tokens=list(self.feed_tokens)
+            )
+
+
+# ========== WEBSOCKET ==========
+
+
+def read_frame(rfile) -> Optional[Tuple[int, bytes]]:
+    """(opcode, payload) of the next client frame; None once the peer is gone"""
+    head = rfile.read(2)
+    if len(head) < 2:
+        return None
+    opcode, length = head[0] & 0x0F, head[1] & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", rfile.read(8))[0]
+    mask = rfile.read(4) if head[1] & 0x80 else b""
+    payload = rfile.read(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+
+def encode_frame(opcode: int, payload: bytes) -> bytes:
+    """One unfragmented, unmasked server frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class FeedConnection:
+    """One graphql-ws client of the feed; send() is safe from any thread"""
+
+    def __init__(self, handler: BaseHTTPRequestHandler, receiver: str):
+        self.handler = handler
+        self.receiver = receiver
+        self.subscription_id: Optional[str] = None
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def send_frame(self, opcode: int, payload: bytes) -> bool:
+        with self._lock:
+            if self.closed:
+                return False
+            try:
+                self.handler.wfile.write(encode_frame(opcode, payload))
+                self.handler.wfile.flush()
+                return True
+            except OSError:
+                self.closed = True
+                return False
+
+    def send(self, message: Dict[str, Any]) -> bool:
+        return self.send_frame(0x1, json.dumps(message).encode("utf-8"))
+
+    def drop(self):
+        with self._lock:
+            self.closed = True
+        try:
+            self.handler.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+def make_handler(fake: FakeHarvia):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Buffer writes so headers and body leave in one segment
+        wbufsize = 64 * 1024
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _base(self) -> str:
+            return f"http://{self.headers.get('Host')}"
+
+        def _reply(self, status: int, payload: Any):
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            if len(body) > 1024 and "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=5)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, method: str):
+            parts = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            fake.delay()
+
+            if parts.path == "/endpoints":
+                base = self._base()
+                return self._reply(
+                    200,
+                    {
+                        "endpoints": {
+                            "RestApi": {
+                                service: {"https": f"{base}/rest/{service}"}
+                                for service in ("generics", "device", "data")
+                            },
+                            "GraphQL": {
+                                service: {
+                                    "https": f"{base}/graphql/{service}",
+                                    "wss": f"ws://{self.headers.get('Host')}/ws",
+                                }
+                                for service in ("device", "data", "events")
+                            },
+                        }
+                    },
+                )
+            if parts.path.startswith("/graphql/"):
+                return self._reply(
+                    200, fake.graphql(body["query"], body.get("variables") or {})
+                )
+            if parts.path.startswith("/rest/"):
+                path = "/" + parts.path.split("/", 3)[3]
+                query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+                return self._reply(*fake.rest(method, path, query, body))
+            self._reply(404, {"error": "NotFound", "message": parts.path})
+
+        def _websocket(self):
+            """Serve one graphql-ws feed connection until either side closes"""
+            fake.delay()
+            self.close_connection = True
+            query = parse_qs(urlsplit(self.path).query)
+            try:
+                header = json.loads(base64.b64decode(query["header"][0]))
+                token = header["Authorization"].split(" ", 1)[1]
+            except (KeyError, IndexError, ValueError):
+                token = ""
+            key = self.headers.get("Sec-WebSocket-Key", "")
+            accept = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+            self.send_response(101, "Switching Protocols")
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", base64.b64encode(accept).decode())
+            if "graphql-ws" in self.headers.get("Sec-WebSocket-Protocol", ""):
+                self.send_header("Sec-WebSocket-Protocol", "graphql-ws")
+            self.end_headers()
+            self.wfile.flush()
+
+            with fake._lock:
+                fake.feed_stats["connections"] += 1
+                fake.feed_tokens.append(token)
+                authorized = token in fake.issued_tokens
+                if not authorized:
+                    fake.feed_stats["rejected"] += 1
+            receiver = ""
+            if authorized:
+                claims = base64.urlsafe_b64decode(token.split(".")[1] + "==")
+                receiver = json.loads(claims)["cognito:username"]
+            feed = FeedConnection(self, receiver)
+            if authorized:
+                with fake._lock:
+                    fake.feeds.append(feed)
+            try:
+                while not feed.closed:
+                    frame = read_frame(self.rfile)
+                    if frame is None or frame[0] == 0x8:
+                        feed.send_frame(0x8, b"")
+                        break
+                    opcode, payload = frame
+                    if opcode == 0x9:
+                        feed.send_frame(0xA, payload)
+                        continue
+                    if opcode != 0x1:
+                        continue
+                    if not self._feed_message(feed, json.loads(payload), authorized):
+                        break
+            except OSError:
+                pass
+            finally:
+                feed.drop()
+                with fake._lock:
+                    if feed in fake.feeds:
+                        fake.feeds.remove(feed)
+
+        def _feed_message(
+            self, feed: FeedConnection, message: Dict[str, Any], authorized: bool
+        ) -> bool:
+            """Answer one graphql-ws client message; False ends the connection"""
+            message_type = message.get("type")
+            if message_type == "connection_init":
+                if not authorized:
+                    errors = {"errors": [{"errorType": "UnauthorizedException"}]}
+                    feed.send({"type": "connection_error", "payload": errors})
+                    return False
+                ack = {"connectionTimeoutMs": KEEPALIVE_TIMEOUT_MS}
+                feed.send({"type": "connection_ack", "payload": ack})
+            elif message_type == "start":
+                with fake._lock:
+                    fake.feed_stats["subscriptions"] += 1
+                feed.send({"type": "start_ack", "id": message["id"]})
+                feed.subscription_id = message["id"]
+            elif message_type == "stop":
+                feed.subscription_id = None
+                feed.send({"type": "complete", "id": message["id"]})
+            return True
+
+        def do_GET(self):
+            if urlsplit(self.path).path == "/ws":
+                return self._websocket()
+            if self.path == "/control/feed":
+                return self._reply(200, fake.feed_report())
+            self._handle("GET")
+
+        def do_POST(self):
+            if self.path == "/control/feed/disconnect":
+                return self._reply(200, {"dropped": fake.drop_feeds()})
+            self._handle("POST")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+    return Handler
+
+
+def serve(
+    fake: FakeHarvia, port: int = 0, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """Start serving on a daemon thread; returns the running server"""
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=fake.run_feed, name="fake-feed", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in Harvia API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--cabins", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--feed-interval-ms", type=float, default=FEED_INTERVAL * 1000)
+    args = parser.parse_args()
+
+    fake = FakeHarvia(
+        args.devices,
+        args.cabins,
+        args.latency_ms / 1000,
+        args.jitter_ms / 1000,
+        args.page_size,
+        args.feed_interval_ms / 1000,
+    )
+    server = serve(fake, args.port)
+    print(f"Serving http://127.0.0.1:{server.server_port}/endpoints", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,438 @@
+"""
+Harvia Benchmarks
+Drives HarviaAPI and MotionMonitor workloads against the local stand-in
+server and reports throughput, p50/p99 request latency and peak RSS.
+push_feed holds the real-time measurements feed through forced
+disconnects and token rotations and fails unless every one of them ends
+in a resumed subscription on the current token.
+Each workload runs in its own process so peak RSS belongs to that workload
+alone, and on-disk client state goes to a throwaway cache directory.
+
+Usage: python -m bench.run [--latency-ms 20] [--devices 20] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+WORKLOADS = (
+    "fleet_sweep",
+    "history_backfill",
+    "history_stream",
+    "events",
+    "presence_polling",
+    "push_feed",
+)
+HISTORY_DAYS = 30
+FEED_TIMEOUT = 30.0  # seconds to wait for each push_feed milestone
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of unsorted values (0.0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+# ========== WORKER ==========
+
+
+def make_transport():
+    from harvia_transport import HarviaTransport
+
+    class TimedTransport(HarviaTransport):
+        """Transport that records the wall time of every HTTP exchange"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.latencies: List[float] = []
+            self._latency_lock = threading.Lock()
+
+        def _send(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super()._send(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._latency_lock:
+                    self.latencies.append(elapsed)
+
+    transport = TimedTransport(pool_size=16)
+    # Measure the client, not the client-side pacing
+    transport.rate_limiter = None
+    return transport
+
+
+def make_api(url: str):
+    from harvia_api import HarviaAPI
+    from harvia_endpoints import EndpointsCache
+
+    transport = make_transport()
+    api = HarviaAPI(
+        "bench@example.com",
+        "bench",
+        transport=transport,
+        endpoints_cache=EndpointsCache(transport, url=url),
+    )
+    return api
+
+
+def device_ids(api) -> List[str]:
+    return [device["name"] for device in api.list_devices(max_results=1000)["devices"]]
+
+
+def run_fleet_sweep(url: str, rounds: int) -> Dict[str, Any]:
+    from harvia_async import ThreadedAsyncHarviaAPI
+
+    api = make_api(url)
+    devices = device_ids(api)
+    api.http.latencies.clear()
+
+    async def sweep() -> int:
+        async with ThreadedAsyncHarviaAPI(api, concurrency=16) as client:
+            total = 0
+            for _ in range(rounds):
+                total += len(await client.sweep(devices))
+            return total
+
+    start = time.perf_counter()
+    items = asyncio.run(sweep())
+    return result(api.http, items, time.perf_counter() - start)
+
+
+def run_history_backfill(url: str, rounds: int) -> Dict[str, Any]:
+    from harvia_history import HistoryFetcher
+
+    api = make_api(url)
+    device_id = device_ids(api)[0]
+    api.http.latencies.clear()
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - HISTORY_DAYS * 24 * 3600 * 1000
+
+    start = time.perf_counter()
+    items = 0
+    for _ in range(rounds):
+        for _ in HistoryFetcher(api).iter_telemetry_history(
+            device_id, start_ms, end_ms
+        ):
+            items += 1
+    return result(api.http, items, time.perf_counter() - start)
+
+
+def run_history_stream(url: str, rounds: int) -> Dict[str, Any]:
+    api = make_api(url)
+    device_id = device_ids(api)[0]
+    api.http.latencies.clear()
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - HISTORY_DAYS * 24 * 3600 * 1000
+
+    start = time.perf_counter()
+    items = 0
+    for _ in range(rounds):
+        for _ in api.iter_telemetry_history(
+            device_id, str(start_ms), str(end_ms), stream=True
+        ):
+            items += 1
+    return result(api.http, items, time.perf_counter() - start)
+
+
+def run_events(url: str, rounds: int) -> Dict[str, Any]:
+    api = make_api(url)
+    devices = device_ids(api)
+    api.http.latencies.clear()
+
+    start = time.perf_counter()
+    items = 0
+    for _ in range(rounds):
+        for device_id in devices:
+            items += sum(1 for _ in api.iter_device_events(device_id))
+    return result(api.http, items, time.perf_counter() - start)
+
+
+def run_presence_polling(url: str, rounds: int) -> Dict[str, Any]:
+    from harvia_endpoints import EndpointsCache
+    from presence_monitor import MotionMonitor
+
+    transport = make_transport()
+    monitor = MotionMonitor(
+        "bench@example.com",
+        "bench",
+        transport=transport,
+        endpoints_cache=EndpointsCache(transport, url=url),
+    )
+    transport.latencies.clear()
+
+    start = time.perf_counter()
+    items = 0
+    with ThreadPoolExecutor(max_workers=monitor.concurrency) as executor:
+        for _ in range(rounds * 5):
+            items += len(list(executor.map(monitor.get_motion_sample, monitor.cabins)))
+    return result(transport, items, time.perf_counter() - start)
+
+
+def run_push_feed(url: str, rounds: int) -> Dict[str, Any]:
+    from harvia_endpoints import EndpointsCache
+    from harvia_subscriptions import measurements_feed
+    from presence_monitor import MotionMonitor
+
+    transport = make_transport()
+    monitor = MotionMonitor(
+        "bench@example.com",
+        "bench",
+        transport=transport,
+        endpoints_cache=EndpointsCache(transport, url=url),
+    )
+    control = url.rsplit("/", 1)[0] + "/control/feed"
+    cabins = {(cabin.device_id, cabin.cabin_id): cabin for cabin in monitor.cabins}
+    progress = threading.Condition()
+    counts = {"items": 0, "resumes": 0}
+
+    def on_item(item: Dict[str, Any]):
+        cabin = cabins.get((item.get("deviceId"), item.get("subId")))
+        if cabin is not None:
+            monitor.handle_motion_value(cabin, item["data"].get("presence"))
+        with progress:
+            counts["items"] += 1
+            progress.notify_all()
+
+    def on_resume():
+        monitor.poll_all()  # catch up on what the disconnect missed
+        with progress:
+            counts["resumes"] += 1
+            progress.notify_all()
+
+    def wait_for(what: str, done: Callable[[], bool]):
+        with progress:
+            if not progress.wait_for(done, timeout=FEED_TIMEOUT):
+                raise RuntimeError(f"push_feed: timed out waiting for {what}")
+
+    def more_items():
+        target = counts["items"] + len(cabins)
+        wait_for("feed items", lambda: counts["items"] >= target)
+
+    feed = measurements_feed(
+        monitor.endpoints_config,
+        monitor.tokens,
+        on_item,
+        on_error=lambda e: None,
+        on_resume=on_resume,
+        reconnect_delay=0.05,
+    )
+    transport.latencies.clear()
+    start = time.perf_counter()
+    feed.start()
+    try:
+        more_items()
+        for _ in range(rounds):
+            # Connection lost: reconnect, resubscribe, catch up over REST
+            resumes = counts["resumes"]
+            request = urllib.request.Request(control + "/disconnect", method="POST")
+            urllib.request.urlopen(request).read()
+            wait_for("resume after disconnect", lambda: counts["resumes"] > resumes)
+            more_items()
+
+            # Token rotated: reconnect on the new id token
+            resumes = counts["resumes"]
+            monitor.tokens.refresh()
+            wait_for("resume after token rotation", lambda: counts["resumes"] > resumes)
+            more_items()
+        seconds = time.perf_counter() - start
+    finally:
+        feed.stop()
+
+    report = json.loads(urllib.request.urlopen(control).read())
+    if report["tokens"][-1] != monitor.tokens.tokens["idToken"]:
+        raise RuntimeError("push_feed: last connection did not use the rotated token")
+    if report["rejected"] or feed.reconnects != 2 * rounds:
+        raise RuntimeError(f"push_feed: unexpected feed history {report}")
+    return dict(
+        result(transport, counts["items"], seconds),
+        reconnects=feed.reconnects,
+        resumes=counts["resumes"],
+        subscriptions=report["subscriptions"],
+    )
+
+
+def result(transport, items: int, seconds: float) -> Dict[str, Any]:
+    latencies = transport.latencies
+    return {
+        "requests": len(latencies),
+        "items": items,
+        "seconds": seconds,
+        "requests_per_second": len(latencies) / seconds if seconds else 0.0,
+        "items_per_second": items / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+RUNNERS: Dict[str, Callable[[str, int], Dict[str, Any]]] = {
+    "fleet_sweep": run_fleet_sweep,
+    "history_backfill": run_history_backfill,
+    "history_stream": run_history_stream,
+    "events": run_events,
+    "presence_polling": run_presence_polling,
+    "push_feed": run_push_feed,
+}
+
+
+# ========== DRIVER ==========
+
+
+def start_server(args) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "bench.fake_server",
+            "--port",
+            "0",
+            "--devices",
+            str(args.devices),
+            "--cabins",
+            str(args.cabins),
+            "--latency-ms",
+            str(args.latency_ms),
+            "--jitter-ms",
+            str(args.jitter_ms),
+            "--page-size",
+            str(args.page_size),
+        ],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = server.stdout.readline().strip()
+    if not line.startswith("Serving "):
+        server.kill()
+        raise RuntimeError(f"Stand-in server failed to start: {line!r}")
+    server.url = line.split(" ", 1)[1]
+    return server
+
+
+def run_workload(name: str, url: str, rounds: int) -> Dict[str, Any]:
+    env = dict(os.environ, HARVIA_RATE_LIMIT="off")
+    env.pop("HARVIA_METRICS_PORT", None)
+    env.pop("HARVIA_METRICS_JSON", None)
+    with tempfile.TemporaryDirectory(prefix="harvia-bench-") as cache_dir:
+        env["HARVIA_CACHE_DIR"] = cache_dir
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "bench.run",
+                "--worker",
+                name,
+                "--url",
+                url,
+                "--rounds",
+                str(rounds),
+            ],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{completed.stderr}")
+    return dict(json.loads(completed.stdout.splitlines()[-1]), workload=name)
+
+
+def display_results(results: List[Dict[str, Any]], args):
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(
+        title=(
+            f"Harvia benchmarks ({args.devices} devices x {args.cabins} cabins, "
+            f"{args.latency_ms:g}ms latency)"
+        )
+    )
+    table.add_column("Workload", style="cyan")
+    table.add_column("Requests", justify="right")
+    table.add_column("Items", justify="right")
+    table.add_column("Req/s", justify="right")
+    table.add_column("Items/s", justify="right")
+    table.add_column("p50 ms", justify="right")
+    table.add_column("p99 ms", justify="right")
+    table.add_column("Peak RSS MB", justify="right")
+    for row in results:
+        table.add_row(
+            row["workload"],
+            str(row["requests"]),
+            str(row["items"]),
+            f"{row['requests_per_second']:.1f}",
+            f"{row['items_per_second']:.0f}",
+            f"{row['p50_ms']:.2f}",
+            f"{row['p99_ms']:.2f}",
+            f"{row['peak_rss_mb']:.1f}",
+        )
+    Console().print(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Harvia client benchmarks")
+    parser.add_argument(
+        "workloads", nargs="*", metavar="workload", help=", ".join(WORKLOADS)
+    )
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--cabins", type=int, default=2)
+    parser.add_argument("--latency-ms", type=float, default=10.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--json", help="Also write results as JSON here ('-' = stdout)")
+    parser.add_argument("--worker", choices=WORKLOADS, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(RUNNERS[args.worker](args.url, args.rounds)))
+        return
+
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown workload(s): {', '.join(sorted(unknown))}")
+
+    server = start_server(args)
+    try:
+        results = [
+            run_workload(name, server.url, args.rounds)
+            for name in args.workloads or WORKLOADS
+        ]
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json == "-":
+        print(json.dumps(results, indent=2))
+        return
+    display_results(results, args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,604 +2,48 @@
 """
 Harvia Sauna API Demo
 Exercises all available API endpoints for Harvia sauna devices.
-Configure credentials in .env file.
+Configure credentials in .env file. Set HARVIA_OUTPUT=json for JSON-lines
+output or HARVIA_OUTPUT=quiet for none. Large results are summarized; pass
+--raw FILE to also write every full result to FILE as compact JSON lines.
 """
 
-import json
+import argparse
 import os
-import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable
 
 import requests
-from dotenv import load_dotenv
-from rich.console import Console
-from rich.json import JSON
-from rich.panel import Panel
-from rich.table import Table
-
-# Load environment variables
-load_dotenv()
-
-# Initialize Rich console
-console = Console()
-
-
-class HarviaAPI:
-    """Client for interacting with Harvia Sauna API"""
-
-    def __init__(self, username: str, password: str):
-        self.username = username
-        self.password = password
-        self.endpoints_config = None
-        self.id_token = None
-        self.access_token = None
-        self.refresh_token = None
-        self.token_expiry = None
-
-        # Fetch endpoints configuration
-        self._fetch_endpoints()
-
-        # Authenticate
-        self._authenticate()
-
-    def _fetch_endpoints(self):
-        """Fetch API endpoints configuration"""
-        console.print("\n[bold cyan]Fetching API Endpoints...[/bold cyan]")
-        response = requests.get("https://prod.api.harvia.io/endpoints")
-        response.raise_for_status()
-        self.endpoints_config = response.json()["endpoints"]
-        console.print("[green]✓[/green] Endpoints fetched successfully")
-
-    def _authenticate(self):
-        """Authenticate and get JWT tokens"""
-        console.print("\n[bold cyan]Authenticating...[/bold cyan]")
-        rest_api_base = self.endpoints_config["RestApi"]["generics"]["https"]
-
-        response = requests.post(
-            f"{rest_api_base}/auth/token",
-            headers={"Content-Type": "application/json"},
-            json={"username": self.username, "password": self.password},
-        )
-        response.raise_for_status()
-
-        tokens = response.json()
-        self.id_token = tokens["idToken"]
-        self.access_token = tokens["accessToken"]
-        self.refresh_token = tokens["refreshToken"]
-        self.token_expiry = time.time() + tokens["expiresIn"]
-
-        console.print(
-            f"[green]✓[/green] Authenticated successfully (token expires in {tokens['expiresIn']}s)"
-        )
-
-    def refresh_tokens(self):
-        """Refresh JWT tokens"""
-        console.print("\n[bold cyan]Refreshing Tokens...[/bold cyan]")
-        rest_api_base = self.endpoints_config["RestApi"]["generics"]["https"]
-
-        response = requests.post(
-            f"{rest_api_base}/auth/refresh",
-            headers={"Content-Type": "application/json"},
-            json={"refreshToken": self.refresh_token, "email": self.username},
-        )
-        response.raise_for_status()
-
-        tokens = response.json()
-        self.id_token = tokens["idToken"]
-        self.access_token = tokens["accessToken"]
-        self.token_expiry = time.time() + tokens["expiresIn"]
-
-        console.print(f"[green]✓[/green] Tokens refreshed successfully")
-
-    def revoke_token(self):
-        """Revoke refresh token"""
-        console.print("\n[bold cyan]Revoking Refresh Token...[/bold cyan]")
-        rest_api_base = self.endpoints_config["RestApi"]["generics"]["https"]
-
-        response = requests.post(
-            f"{rest_api_base}/auth/revoke",
-            headers={"Content-Type": "application/json"},
-            json={"refreshToken": self.refresh_token, "email": self.username},
-        )
-        response.raise_for_status()
-
-        result = response.json()
-        console.print(f"[green]✓[/green] Token revoked: {result}")
-        return result
-
-    # ========== DEVICE SERVICE - REST API ==========
-
-    def list_devices(self, max_results: int = 50):
-        """List user's devices"""
-        console.print("\n[bold cyan]Listing Devices (REST)...[/bold cyan]")
-        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
-
-        response = requests.get(
-            f"{rest_api_base}/devices?maxResults={max_results}",
-            headers={"Authorization": f"Bearer {self.id_token}"},
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        console.print(
-            f"[green]✓[/green] Found {len(data.get('devices', []))} device(s)"
-        )
-        return data
-
-    def send_device_command(
-        self, device_id: str, command_type: str, state: str, cabin_id: str = "C1"
-    ):
-        """Send command to device"""
-        console.print(
-            f"\n[bold cyan]Sending Command to Device {device_id}...[/bold cyan]"
-        )
-        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
-
-        response = requests.post(
-            f"{rest_api_base}/devices/command",
-            headers={
-                "Authorization": f"Bearer {self.id_token}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "deviceId": device_id,
-                "cabin": {"id": cabin_id},
-                "command": {"type": command_type, "state": state},
-            },
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        console.print(f"[green]✓[/green] Command sent: {data}")
-        return data
-
-    def get_device_state(self, device_id: str, sub_id: str = "C1"):
-        """Get device state (shadow)"""
-        console.print(
-            f"\n[bold cyan]Getting Device State for {device_id}...[/bold cyan]"
-        )
-        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
-
-        response = requests.get(
-            f"{rest_api_base}/devices/state?deviceId={device_id}&subId={sub_id}",
-            headers={"Authorization": f"Bearer {self.id_token}"},
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        console.print(f"[green]✓[/green] Device state retrieved")
-        return data
-
-    def update_device_target(
-        self,
-        device_id: str,
-        temperature: Optional[float] = None,
-        humidity: Optional[float] = None,
-        cabin_id: str = "C1",
-    ):
-        """Update device target temperature/humidity"""
-        console.print(
-            f"\n[bold cyan]Updating Device Target for {device_id}...[/bold cyan]"
-        )
-        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
-
-        payload = {"deviceId": device_id, "cabin": {"id": cabin_id}}
-        if temperature is not None:
-            payload["temperature"] = temperature
-        if humidity is not None:
-            payload["humidity"] = humidity
-
-        response = requests.patch(
-            f"{rest_api_base}/devices/target",
-            headers={
-                "Authorization": f"Bearer {self.id_token}",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        console.print(f"[green]✓[/green] Target updated: {data}")
-        return data
-
-    def update_device_profile(self, device_id: str, profile: str, cabin_id: str = "C1"):
-        """Update device profile"""
-        console.print(
-            f"\n[bold cyan]Updating Device Profile for {device_id}...[/bold cyan]"
-        )
-        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
-
-        response = requests.patch(
-            f"{rest_api_base}/devices/profile",
-            headers={
-                "Authorization": f"Bearer {self.id_token}",
-                "Content-Type": "application/json",
-            },
-            json={"deviceId": device_id, "cabin": {"id": cabin_id}, "profile": profile},
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        console.print(f"[green]✓[/green] Profile updated: {data}")
-        return data
-
-    # ========== DATA SERVICE - REST API ==========
-
-    def get_latest_data(self, device_id: str, cabin_id: str = "C1"):
-        """Get latest telemetry data"""
-        console.print(
-            f"\n[bold cyan]Getting Latest Data for {device_id}...[/bold cyan]"
-        )
-        rest_api_base = self.endpoints_config["RestApi"]["data"]["https"]
-
-        response = requests.get(
-            f"{rest_api_base}/data/latest-data?deviceId={device_id}&cabinId={cabin_id}",
-            headers={"Authorization": f"Bearer {self.id_token}"},
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        console.print(f"[green]✓[/green] Latest data retrieved")
-        return data
-
-    def get_telemetry_history(
-        self,
-        device_id: str,
-        start_time: str,
-        end_time: str,
-        cabin_id: str = "C1",
-        sampling_mode: Optional[str] = None,
-        sample_amount: Optional[int] = None,
-    ):
-        """Get telemetry history"""
-        console.print(
-            f"\n[bold cyan]Getting Telemetry History for {device_id}...[/bold cyan]"
-        )
-        rest_api_base = self.endpoints_config["RestApi"]["data"]["https"]
-
-        params = {
-            "deviceId": device_id,
-            "cabinId": cabin_id,
-            "startTimestamp": start_time,
-            "endTimestamp": end_time,
-        }
-        if sampling_mode:
-            params["samplingMode"] = sampling_mode
-        if sample_amount:
-            params["sampleAmount"] = sample_amount
-
-        query_string = "&".join(f"{k}={v}" for k, v in params.items())
-
-        response = requests.get(
-            f"{rest_api_base}/data/telemetry-history?{query_string}",
-            headers={"Authorization": f"Bearer {self.id_token}"},
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        console.print(
-            f"[green]✓[/green] Telemetry history retrieved ({len(data.get('measurements', []))} measurements)"
-        )
-        return data
-
-    # ========== GRAPHQL HELPER ==========
-
-    def _graphql_request(
-        self, service: str, query: str, variables: Optional[Dict] = None
-    ):
-        """Make a GraphQL request"""
-        graphql_endpoint = self.endpoints_config["GraphQL"][service]["https"]
-
-        response = requests.post(
-            graphql_endpoint,
-            headers={
-                "Authorization": f"Bearer {self.id_token}",
-                "Content-Type": "application/json",
-            },
-            json={"query": query, "variables": variables or {}},
-        )
-        response.raise_for_status()
-
-        data = response.json()
-        if "errors" in data:
-            console.print(f"[red]GraphQL Errors: {data['errors']}[/red]")
-
-        return data
 
-    # ========== DEVICE SERVICE - GRAPHQL ==========
+from harvia_api import HarviaAPI
+from harvia_cache import ResponseCache
+from harvia_metrics import enable_from_env, write_snapshot_from_env
+from harvia_output import Reporter, reporter_from_env
+from harvia_ratelimit import RateLimiter
+from harvia_render import RawWriter, show, show_stream
+from harvia_store import TelemetryStore
+from harvia_transport import HarviaTransport
 
-    def graphql_get_device(self, device_id: str):
-        """Get device via GraphQL"""
-        console.print(
-            f"\n[bold cyan]Getting Device {device_id} (GraphQL)...[/bold cyan]"
-        )
-
-        query = """
-        query GetDevice($deviceId: ID!) {
-          devicesGet(deviceId: $deviceId) {
-            id
-            type
-            attr {
-              key
-              value
-            }
-            roles
-            via
-          }
-        }
-        """
-
-        data = self._graphql_request("device", query, {"deviceId": device_id})
-        console.print(f"[green]✓[/green] Device retrieved via GraphQL")
-        return data
-
-    def graphql_list_user_devices(self):
-        """List user's devices via GraphQL"""
-        console.print(f"\n[bold cyan]Listing User Devices (GraphQL)...[/bold cyan]")
-
-        query = """
-        query ListMyDevices {
-          usersDevicesList {
-            devices {
-              id
-              type
-              attr {
-                key
-                value
-              }
-              roles
-              via
-            }
-            nextToken
-          }
-        }
-        """
-
-        data = self._graphql_request("device", query)
-        devices = data.get("data", {}).get("usersDevicesList", {}).get("devices", [])
-        console.print(f"[green]✓[/green] Found {len(devices)} device(s) via GraphQL")
-        return data
-
-    def graphql_get_device_state(self, device_id: str, shadow_name: str = "C1"):
-        """Get device state via GraphQL"""
-        console.print(
-            f"\n[bold cyan]Getting Device State {device_id} (GraphQL)...[/bold cyan]"
-        )
-
-        query = """
-        query GetDeviceState($deviceId: ID!, $shadowName: String) {
-          devicesStatesGet(deviceId: $deviceId, shadowName: $shadowName) {
-            deviceId
-            shadowName
-            desired
-            reported
-            timestamp
-            version
-            connectionState {
-              connected
-              updatedTimestamp
-            }
-          }
-        }
-        """
-
-        data = self._graphql_request(
-            "device", query, {"deviceId": device_id, "shadowName": shadow_name}
-        )
-        console.print(f"[green]✓[/green] Device state retrieved via GraphQL")
-        return data
-
-    # ========== DATA SERVICE - GRAPHQL ==========
-
-    def graphql_get_latest_measurements(self, device_id: str):
-        """Get latest measurements via GraphQL"""
-        console.print(
-            f"\n[bold cyan]Getting Latest Measurements {device_id} (GraphQL)...[/bold cyan]"
-        )
-
-        query = """
-        query GetLatestMeasurements($deviceId: String!) {
-          devicesMeasurementsLatest(deviceId: $deviceId) {
-            deviceId
-            subId
-            timestamp
-            sessionId
-            type
-            data
-          }
-        }
-        """
-
-        data = self._graphql_request("data", query, {"deviceId": device_id})
-        measurements = data.get("data", {}).get("devicesMeasurementsLatest", [])
-        console.print(
-            f"[green]✓[/green] Retrieved {len(measurements)} measurement(s) via GraphQL"
-        )
-        return data
-
-    def graphql_get_measurements_list(
-        self,
-        device_id: str,
-        start_timestamp: str,
-        end_timestamp: str,
-        sampling_mode: str = "AVERAGE",
-        sample_amount: int = 100,
-    ):
-        """Get measurements list via GraphQL"""
-        console.print(
-            f"\n[bold cyan]Getting Measurements List {device_id} (GraphQL)...[/bold cyan]"
-        )
-
-        query = """
-        query GetDeviceMeasurements($deviceId: String!, $startTimestamp: String!,
-                                    $endTimestamp: String!, $samplingMode: SamplingMode,
-                                    $sampleAmount: Int) {
-          devicesMeasurementsList(
-            deviceId: $deviceId
-            startTimestamp: $startTimestamp
-            endTimestamp: $endTimestamp
-            samplingMode: $samplingMode
-            sampleAmount: $sampleAmount
-          ) {
-            measurementItems {
-              deviceId
-              subId
-              timestamp
-              sessionId
-              type
-              data
-            }
-            nextToken
-          }
-        }
-        """
-
-        data = self._graphql_request(
-            "data",
-            query,
-            {
-                "deviceId": device_id,
-                "startTimestamp": start_timestamp,
-                "endTimestamp": end_timestamp,
-                "samplingMode": sampling_mode,
-                "sampleAmount": sample_amount,
-            },
-        )
-        items = (
-            data.get("data", {})
-            .get("devicesMeasurementsList", {})
-            .get("measurementItems", [])
-        )
-        console.print(
-            f"[green]✓[/green] Retrieved {len(items)} measurement(s) via GraphQL"
-        )
-        return data
-
-    def graphql_get_sessions(
-        self, device_id: str, start_timestamp: str, end_timestamp: str
-    ):
-        """Get device sessions via GraphQL"""
-        console.print(
-            f"\n[bold cyan]Getting Sessions {device_id} (GraphQL)...[/bold cyan]"
-        )
 
-        query = """
-        query GetDeviceSessions($deviceId: String!, $startTimestamp: AWSDateTime!,
-                               $endTimestamp: AWSDateTime!) {
-          devicesSessionsList(
-            deviceId: $deviceId
-            startTimestamp: $startTimestamp
-            endTimestamp: $endTimestamp
-          ) {
-            sessions {
-              deviceId
-              sessionId
-              organizationId
-              subId
-              timestamp
-              type
-              durationMs
-              stats
-            }
-            nextToken
-          }
-        }
-        """
-
-        data = self._graphql_request(
-            "data",
-            query,
-            {
-                "deviceId": device_id,
-                "startTimestamp": start_timestamp,
-                "endTimestamp": end_timestamp,
-            },
-        )
-        sessions = (
-            data.get("data", {}).get("devicesSessionsList", {}).get("sessions", [])
-        )
-        console.print(
-            f"[green]✓[/green] Retrieved {len(sessions)} session(s) via GraphQL"
-        )
-        return data
-
-    # ========== EVENTS SERVICE - GRAPHQL ==========
-
-    def graphql_get_device_events(
-        self,
-        device_id: str,
-        start_timestamp: Optional[str] = None,
-        end_timestamp: Optional[str] = None,
-    ):
-        """Get device events via GraphQL"""
-        console.print(
-            f"\n[bold cyan]Getting Device Events {device_id} (GraphQL)...[/bold cyan]"
-        )
+def display_section(reporter: Reporter, title: str):
+    """Print a section banner (console output only)"""
+    console = reporter.console
+    if console is None:
+        return
+    from rich.panel import Panel
 
-        query = """
-        query GetDeviceEvents($deviceId: ID!, $period: TimePeriod) {
-          devicesEventsList(deviceId: $deviceId, period: $period) {
-            events {
-              deviceId
-              timestamp
-              eventId
-              type
-              eventState
-              severity
-              sensorName
-              sensorValue
-              displayName
-            }
-            nextToken
-          }
-        }
-        """
-
-        variables = {"deviceId": device_id}
-        if start_timestamp and end_timestamp:
-            variables["period"] = {
-                "startTimestamp": start_timestamp,
-                "endTimestamp": end_timestamp,
-            }
-
-        data = self._graphql_request("events", query, variables)
-        events = data.get("data", {}).get("devicesEventsList", {}).get("events", [])
-        console.print(f"[green]✓[/green] Retrieved {len(events)} event(s) via GraphQL")
-        return data
-
-    def graphql_get_event_metadata(self):
-        """Get event metadata via GraphQL"""
-        console.print(f"\n[bold cyan]Getting Event Metadata (GraphQL)...[/bold cyan]")
-
-        query = """
-        query GetEventMetadata {
-          eventsMetadataList {
-            eventMetadataItems {
-              eventId
-              name
-              description
-            }
-            nextToken
-          }
-        }
-        """
-
-        data = self._graphql_request("events", query)
-        items = (
-            data.get("data", {})
-            .get("eventsMetadataList", {})
-            .get("eventMetadataItems", [])
-        )
-        console.print(
-            f"[green]✓[/green] Retrieved {len(items)} event metadata item(s) via GraphQL"
-        )
-        return data
+    console.print("\n" + "=" * 60)
+    console.print(Panel(f"[bold yellow]{title}[/bold yellow]"))
+    console.print("=" * 60)
 
 
-def display_devices(devices_data: Dict[str, Any]):
+def display_devices(reporter: Reporter, devices_data: Dict[str, Any]):
     """Display devices in a nice table"""
+    console = reporter.console
+    if console is None:
+        reporter.data("devices", "Devices", devices_data)
+        return
+    from rich.table import Table
+
     devices = devices_data.get("devices", [])
 
     if not devices:
@@ -632,14 +76,85 @@ def display_devices(devices_data: Dict[str, Any]):
     console.print(table)
 
 
+def display_resilience_stats(reporter: Reporter, api: HarviaAPI):
+    """Display retry counts and circuit breaker state per service"""
+    if api.http.resilience is None:
+        return
+    stats = api.http.resilience.stats()
+    if not any(s["retries"] or s["times_opened"] for s in stats.values()):
+        return
+    console = reporter.console
+    if console is None:
+        reporter.data("resilience_stats", "Retries & Circuit Breakers", stats)
+        return
+    from rich.table import Table
+
+    table = Table(title="Retries & Circuit Breakers")
+    table.add_column("Service", style="cyan")
+    table.add_column("Retries", justify="right")
+    table.add_column("Circuit", style="yellow")
+    table.add_column("Times Opened", justify="right")
+    table.add_column("Rejected", justify="right")
+    for service, s in stats.items():
+        table.add_row(
+            service,
+            str(s["retries"]),
+            s["state"],
+            str(s["times_opened"]),
+            str(s["rejected"]),
+        )
+    console.print(table)
+
+
+def display_rate_limit_stats(reporter: Reporter, api: HarviaAPI):
+    """Display time spent waiting for the client-side rate limiter"""
+    if api.http.rate_limiter is None:
+        return
+    stats = api.http.rate_limiter.stats()
+    if not any(s["delayed"] for s in stats.values()):
+        return
+    console = reporter.console
+    if console is None:
+        reporter.data("rate_limit_stats", "Rate Limiting", stats)
+        return
+    from rich.table import Table
+
+    table = Table(title="Rate Limiting")
+    table.add_column("Service", style="cyan")
+    table.add_column("Requests", justify="right")
+    table.add_column("Delayed", justify="right")
+    table.add_column("Total Wait", justify="right")
+    table.add_column("Max Wait", justify="right")
+    for service, s in sorted(stats.items()):
+        table.add_row(
+            service,
+            str(s["requests"]),
+            str(s["delayed"]),
+            f"{s['wait_total']:.2f}s",
+            f"{s['wait_max']:.2f}s",
+        )
+    console.print(table)
+
+
 def main():
     """Main demo function"""
-    console.print(
-        Panel.fit(
-            "[bold blue]Harvia Sauna API Demo[/bold blue]\n"
-            "Exercising all available API endpoints",
-            border_style="blue",
-        )
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(description="Harvia Sauna API Demo")
+    parser.add_argument(
+        "--raw",
+        metavar="FILE",
+        help="Also write every full result to FILE as compact JSON lines",
+    )
+    args = parser.parse_args()
+
+    # Load environment variables
+    load_dotenv()
+
+    # Console output by default; HARVIA_OUTPUT=json or quiet for log collectors
+    reporter = reporter_from_env()
+    reporter.header(
+        "demo", "Harvia Sauna API Demo\nExercising all available API endpoints"
     )
 
     # Load credentials from environment
@@ -647,44 +162,68 @@ def main():
     password = os.getenv("HARVIA_PASSWORD")
 
     if not username or not password:
-        console.print(
-            "[red]Error: HARVIA_USERNAME and HARVIA_PASSWORD must be set in .env file[/red]"
+        reporter.error(
+            "missing_credentials",
+            "Error: HARVIA_USERNAME and HARVIA_PASSWORD must be set in .env file",
         )
         return
 
+    # Pace requests (HARVIA_RATE_LIMIT=shared to share one budget locally)
+    transport = HarviaTransport()
+    transport.rate_limiter = RateLimiter.from_env()
+    metrics = enable_from_env(transport)
+    raw = RawWriter(args.raw) if args.raw else None
+
+    def output(event: str, title: str, payload: Any):
+        if raw is not None:
+            raw.write(event, payload)
+        show(reporter, event, title, payload)
+
+    def output_stream(event: str, title: str, items: Iterable[Any]):
+        if raw is not None:
+            items = raw.tee(event, items)
+        show_stream(reporter, event, title, items)
+
     try:
-        # Initialize API client
-        api = HarviaAPI(username, password)
+        # Initialize API client; device lists and metadata are cached across runs
+        api = HarviaAPI(
+            username,
+            password,
+            transport=transport,
+            cache=ResponseCache.on_disk(),
+            reporter=reporter,
+        )
+
+        # History is synced into a local store; only new data is downloaded
+        history = TelemetryStore(api)
 
         # ========== AUTHENTICATION DEMO ==========
-        console.print("\n" + "=" * 60)
-        console.print(Panel("[bold yellow]AUTHENTICATION ENDPOINTS[/bold yellow]"))
-        console.print("=" * 60)
+        display_section(reporter, "AUTHENTICATION ENDPOINTS")
 
         # Already authenticated in __init__, demonstrate refresh
         api.refresh_tokens()
 
         # ========== DEVICE SERVICE REST DEMO ==========
-        console.print("\n" + "=" * 60)
-        console.print(Panel("[bold yellow]DEVICE SERVICE - REST API[/bold yellow]"))
-        console.print("=" * 60)
+        display_section(reporter, "DEVICE SERVICE - REST API")
 
         # List devices
         devices_data = api.list_devices()
-        display_devices(devices_data)
+        if raw is not None:
+            raw.write("devices", devices_data)
+        display_devices(reporter, devices_data)
 
         # Get first device ID for subsequent calls
         devices = devices_data.get("devices", [])
         if devices:
             # REST API uses 'name' field for device ID
             device_id = devices[0]["name"]
-            console.print(f"\n[cyan]Using device: {device_id}[/cyan]")
+            reporter.info(
+                "using_device", "Using device: {device_id}", device_id=device_id
+            )
 
             # Get device state
             state_data = api.get_device_state(device_id)
-            console.print(
-                Panel(JSON(json.dumps(state_data, indent=2)), title="Device State")
-            )
+            output("device_state", "Device State", state_data)
 
             # Note: Commented out commands that would actually control the device
             # Uncomment these if you want to test device control
@@ -693,160 +232,149 @@ def main():
             # api.update_device_profile(device_id, "eco")
 
         # ========== DATA SERVICE REST DEMO ==========
-        console.print("\n" + "=" * 60)
-        console.print(Panel("[bold yellow]DATA SERVICE - REST API[/bold yellow]"))
-        console.print("=" * 60)
+        display_section(reporter, "DATA SERVICE - REST API")
 
         if devices:
             # Get latest data
             latest_data = api.get_latest_data(device_id)
-            console.print(
-                Panel(JSON(json.dumps(latest_data, indent=2)), title="Latest Data")
-            )
+            output("latest_data", "Latest Data", latest_data)
 
             # Get telemetry history (last 24 hours)
             end_time = datetime.now()
             start_time = end_time - timedelta(days=1)
 
-            history_data = api.get_telemetry_history(
+            history_data = history.get_telemetry_history(
                 device_id,
                 start_time.isoformat() + "Z",
                 end_time.isoformat() + "Z",
                 sampling_mode="average",
                 sample_amount=60,
             )
-            console.print(
-                Panel(
-                    JSON(json.dumps(history_data, indent=2)),
-                    title=f"Telemetry History ({len(history_data.get('measurements', []))} measurements)",
-                )
+            count = len(history_data.get("measurements", []))
+            output(
+                "telemetry_history",
+                f"Telemetry History ({count} measurements)",
+                history_data,
             )
 
         # ========== DEVICE SERVICE GRAPHQL DEMO ==========
-        console.print("\n" + "=" * 60)
-        console.print(Panel("[bold yellow]DEVICE SERVICE - GRAPHQL[/bold yellow]"))
-        console.print("=" * 60)
+        display_section(reporter, "DEVICE SERVICE - GRAPHQL")
 
         # List devices via GraphQL
         graphql_devices = api.graphql_list_user_devices()
-        console.print(
-            Panel(
-                JSON(json.dumps(graphql_devices, indent=2)), title="Devices (GraphQL)"
-            )
-        )
+        output("graphql_devices", "Devices (GraphQL)", graphql_devices)
 
         if devices:
             # Get specific device
             device_details = api.graphql_get_device(device_id)
-            console.print(
-                Panel(
-                    JSON(json.dumps(device_details, indent=2)),
-                    title="Device Details (GraphQL)",
-                )
-            )
+            output("graphql_device", "Device Details (GraphQL)", device_details)
 
             # Get device state
             device_state = api.graphql_get_device_state(device_id)
-            console.print(
-                Panel(
-                    JSON(json.dumps(device_state, indent=2)),
-                    title="Device State (GraphQL)",
-                )
-            )
+            output("graphql_device_state", "Device State (GraphQL)", device_state)
 
         # ========== DATA SERVICE GRAPHQL DEMO ==========
-        console.print("\n" + "=" * 60)
-        console.print(Panel("[bold yellow]DATA SERVICE - GRAPHQL[/bold yellow]"))
-        console.print("=" * 60)
+        display_section(reporter, "DATA SERVICE - GRAPHQL")
 
         if devices:
             # Get latest measurements
             latest_measurements = api.graphql_get_latest_measurements(device_id)
-            console.print(
-                Panel(
-                    JSON(json.dumps(latest_measurements, indent=2)),
-                    title="Latest Measurements (GraphQL)",
-                )
+            output(
+                "graphql_latest_measurements",
+                "Latest Measurements (GraphQL)",
+                latest_measurements,
             )
 
             # Get measurements list (last 7 days)
             end_time = datetime.now()
             start_time = end_time - timedelta(days=7)
 
-            measurements_list = api.graphql_get_measurements_list(
+            measurements_list = history.graphql_get_measurements_list(
                 device_id,
                 str(int(start_time.timestamp() * 1000)),
                 str(int(end_time.timestamp() * 1000)),
                 sampling_mode="AVERAGE",
                 sample_amount=100,
             )
-            console.print(
-                Panel(
-                    JSON(json.dumps(measurements_list, indent=2)),
-                    title="Measurements List (GraphQL)",
-                )
+            output(
+                "graphql_measurements_list",
+                "Measurements List (GraphQL)",
+                measurements_list,
             )
 
-            # Get sessions
-            sessions = api.graphql_get_sessions(
-                device_id, start_time.isoformat() + "Z", end_time.isoformat() + "Z"
-            )
-            console.print(
-                Panel(JSON(json.dumps(sessions, indent=2)), title="Sessions (GraphQL)")
+            # Get sessions, summarized live while the pages download
+            sessions = api.iter_sessions(
+                device_id,
+                start_time.isoformat() + "Z",
+                end_time.isoformat() + "Z",
+                stream=True,
             )
+            output_stream("graphql_sessions", "Sessions (GraphQL)", sessions)
 
         # ========== EVENTS SERVICE GRAPHQL DEMO ==========
-        console.print("\n" + "=" * 60)
-        console.print(Panel("[bold yellow]EVENTS SERVICE - GRAPHQL[/bold yellow]"))
-        console.print("=" * 60)
+        display_section(reporter, "EVENTS SERVICE - GRAPHQL")
 
         # Get event metadata
         event_metadata = api.graphql_get_event_metadata()
-        console.print(
-            Panel(
-                JSON(json.dumps(event_metadata, indent=2)),
-                title="Event Metadata (GraphQL)",
-            )
-        )
+        output("graphql_event_metadata", "Event Metadata (GraphQL)", event_metadata)
 
         if devices:
             # Get device events (last 30 days)
             end_time = datetime.now()
             start_time = end_time - timedelta(days=30)
 
-            events = api.graphql_get_device_events(
+            events = api.iter_device_events(
                 device_id,
                 str(int(start_time.timestamp() * 1000)),
                 str(int(end_time.timestamp() * 1000)),
+                stream=True,
             )
-            console.print(
-                Panel(
-                    JSON(json.dumps(events, indent=2)), title="Device Events (GraphQL)"
-                )
-            )
+            output_stream("graphql_device_events", "Device Events (GraphQL)", events)
 
         # ========== COMPLETION ==========
-        console.print("\n" + "=" * 60)
-        console.print(
-            Panel.fit(
-                "[bold green]✓ Demo Complete![/bold green]\n"
-                "All API endpoints exercised successfully",
-                border_style="green",
+        if reporter.console is not None:
+            from rich.panel import Panel
+
+            reporter.console.print("\n" + "=" * 60)
+            reporter.console.print(
+                Panel.fit(
+                    "[bold green]✓ Demo Complete![/bold green]\n"
+                    "All API endpoints exercised successfully",
+                    border_style="green",
+                )
+            )
+        else:
+            reporter.success(
+                "demo_complete", "Demo Complete! All API endpoints exercised"
             )
-        )
+
+        display_resilience_stats(reporter, api)
+        display_rate_limit_stats(reporter, api)
 
         # Note: We're NOT revoking the token at the end so it can be reused
         # Uncomment the following line if you want to revoke the token
         # api.revoke_token()
 
     except requests.exceptions.HTTPError as e:
-        console.print(f"\n[red]HTTP Error: {e}[/red]")
-        console.print(f"[red]Response: {e.response.text}[/red]")
+        reporter.error(
+            "http_error",
+            "HTTP Error: {error}\nResponse: {response}",
+            error=str(e),
+            response=e.response.text,
+        )
     except Exception as e:
-        console.print(f"\n[red]Error: {e}[/red]")
         import traceback
 
-        console.print(f"[red]{traceback.format_exc()}[/red]")
+        reporter.error(
+            "error",
+            "Error: {error}\n{traceback}",
+            error=str(e),
+            traceback=traceback.format_exc(),
+        )
+    finally:
+        if raw is not None:
+            raw.close()
+        write_snapshot_from_env(metrics)
 
 
 if __name__ == "__main__":
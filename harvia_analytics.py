@@ -0,0 +1,444 @@
+"""
+Harvia Session Analytics
+Per-session metrics computed from raw measurements: heat-up time, peak and
+mean temperature, time in the target band, humidity profile and presence
+occupancy. Sessions from devicesSessionsList are joined with the raw GraphQL
+measurements in the local TelemetryStore by sessionId. Downloads run on a
+thread pool per device; the CPU work (decoding stored items and computing
+metrics) runs on a process pool across sessions of all devices. Results of
+finished sessions are cached in SQLite, so a re-run only computes sessions
+it has not seen with the same settings.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from harvia_endpoints import default_cache_dir
+from harvia_history import Timestamp, measurement_data, to_epoch_ms
+from harvia_store import ALL_CABINS, GRAPHQL, SETTLE_MS, TelemetryStore
+
+# Bump when a metric definition changes so cached results are recomputed
+ANALYTICS_VERSION = 1
+
+DEFAULT_TOLERANCE = 5.0  # degrees either side of the target temperature
+DEFAULT_MAX_GAP_MS = 5 * 60 * 1000  # longer gaps in the data count as no data
+DEFAULT_FETCH_WORKERS = 4
+
+# Below this many sessions (about 3 ms each), spawning workers that import
+# NumPy costs more than it saves
+MIN_PARALLEL_SESSIONS = 200
+
+# Data keys read for each metric input, first match wins
+FIELD_ALIASES = {
+    "temperature": ("temperature", "temp"),
+    "humidity": ("humidity", "hum"),
+    "target": ("targetTemp",),
+    "presence": ("presence",),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_metrics (
+    device_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    computed_at REAL NOT NULL,
+    metrics TEXT NOT NULL,
+    PRIMARY KEY (device_id, session_id, settings)
+);
+"""
+
+
+# ========== METRICS ==========
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return np.nan
+
+
+def _weighted_mean(values: np.ndarray, weights: np.ndarray) -> Optional[float]:
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return None
+    if weights[valid].sum() > 0:
+        return float(np.average(values[valid], weights=weights[valid]))
+    return float(values[valid].mean())
+
+
+def _ratio(part: float, whole: float) -> Optional[float]:
+    return part / whole if whole > 0 else None
+
+
+def session_metrics(
+    session: Dict[str, Any],
+    timestamps: np.ndarray,
+    temperature: np.ndarray,
+    humidity: np.ndarray,
+    target: np.ndarray,
+    presence: np.ndarray,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_gap_ms: int = DEFAULT_MAX_GAP_MS,
+) -> Dict[str, Any]:
+    """Metrics of one session from its time-ordered samples (NaN = missing)
+
+    Each sample stands for the time until the next one, capped at
+    max_gap_ms, so means and ratios are time-weighted and gaps in the data
+    count for nothing. The target is the session's median targetTemp; band
+    metrics are None without one. Durations are in milliseconds.
+    """
+    start_ms = to_epoch_ms(session["timestamp"])
+    duration_ms = session.get("durationMs")
+    metrics: Dict[str, Any] = {
+        "device_id": session.get("deviceId"),
+        "session_id": session["sessionId"],
+        "sub_id": session.get("subId"),
+        "start_ms": start_ms,
+        "duration_ms": duration_ms,
+        "samples": int(timestamps.size),
+        "covered_ms": 0,
+        "heat_up_ms": None,
+        "peak_temperature": None,
+        "mean_temperature": None,
+        "target_temperature": None,
+        "time_in_band_ms": None,
+        "band_ratio": None,
+        "humidity": None,
+        "occupancy_ratio": None,
+        "reported_stats": None,
+    }
+    stats = session.get("stats")
+    if isinstance(stats, str):
+        try:
+            stats = json.loads(stats)
+        except ValueError:
+            stats = None
+    metrics["reported_stats"] = stats if isinstance(stats, dict) else None
+    if not timestamps.size:
+        return metrics
+
+    weights = np.minimum(np.diff(timestamps, append=timestamps[-1]), max_gap_ms)
+    weights = weights.astype(np.float64)
+    metrics["covered_ms"] = int(weights.sum())
+
+    heated = ~np.isnan(temperature)
+    if heated.any():
+        metrics["peak_temperature"] = float(temperature[heated].max())
+        metrics["mean_temperature"] = _weighted_mean(temperature, weights)
+
+    targets = target[~np.isnan(target)]
+    if targets.size and heated.any():
+        goal = float(np.median(targets))
+        metrics["target_temperature"] = goal
+        reached = np.flatnonzero(heated & (temperature >= goal - tolerance))
+        if reached.size:
+            metrics["heat_up_ms"] = int(timestamps[reached[0]] - timestamps[0])
+        in_band = heated & (np.abs(temperature - goal) <= tolerance)
+        metrics["time_in_band_ms"] = int(weights[in_band].sum())
+        metrics["band_ratio"] = _ratio(weights[in_band].sum(), weights[heated].sum())
+
+    humid = humidity[~np.isnan(humidity)]
+    if humid.size:
+        p10, p50, p90 = np.percentile(humid, (10, 50, 90))
+        metrics["humidity"] = {
+            "min": float(humid.min()),
+            "p10": float(p10),
+            "median": float(p50),
+            "p90": float(p90),
+            "max": float(humid.max()),
+            "mean": _weighted_mean(humidity, weights),
+        }
+
+    sensed = ~np.isnan(presence)
+    if sensed.any():
+        occupied = sensed & (presence > 0)
+        metrics["occupancy_ratio"] = _ratio(
+            weights[occupied].sum(), weights[sensed].sum()
+        )
+    return metrics
+
+
+# ========== WORKERS ==========
+
+# Per worker process, closed when the process exits with the pool
+_worker_connections: Dict[str, sqlite3.Connection] = {}
+
+
+def _open_store(path: str) -> sqlite3.Connection:
+    """A read-only connection to a telemetry store"""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def _connection(path: str) -> sqlite3.Connection:
+    """This worker process's read-only connection to a telemetry store"""
+    db = _worker_connections.get(path)
+    if db is None:
+        db = _worker_connections[path] = _open_store(path)
+    return db
+
+
+def session_samples(
+    db: sqlite3.Connection, session: Dict[str, Any], end_ms: int
+) -> Tuple[np.ndarray, ...]:
+    """(timestamps, temperature, humidity, target, presence) of one session
+
+    Joined by sessionId (and the session's cabin) over the stored raw GraphQL
+    measurements; a session whose items carry no sessionId falls back to
+    its cabin and time span.
+    """
+    start_ms = to_epoch_ms(session["timestamp"])
+    rows = db.execute(
+        "SELECT timestamp, sub_id, json_extract(item, '$.sessionId'),"
+        " json_extract(item, '$.data') FROM measurements"
+        " WHERE source = ? AND device_id = ? AND cabin_id = ?"
+        " AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+        (GRAPHQL, session["deviceId"], ALL_CABINS, start_ms, end_ms),
+    ).fetchall()
+    sub_id = session.get("subId")
+    matched = [row for row in rows if row[2] == session["sessionId"]]
+    if sub_id and any(row[1] == sub_id for row in matched):
+        matched = [row for row in matched if row[1] == sub_id]
+    elif not matched and not any(row[2] for row in rows):
+        matched = [row for row in rows if row[1] == sub_id]
+
+    timestamps = np.fromiter((row[0] for row in matched), np.int64, len(matched))
+    columns = {name: np.full(len(matched), np.nan) for name in FIELD_ALIASES}
+    for i, row in enumerate(matched):
+        data = measurement_data({"data": row[3]})
+        for name, aliases in FIELD_ALIASES.items():
+            for alias in aliases:
+                if alias in data:
+                    columns[name][i] = _number(data[alias])
+                    break
+    return (
+        timestamps,
+        columns["temperature"],
+        columns["humidity"],
+        columns["target"],
+        columns["presence"],
+    )
+
+
+def _analyze_session(
+    job: Tuple[str, Dict[str, Any], int, float, int]
+) -> Dict[str, Any]:
+    """Worker entry point: load one session's samples and compute its metrics"""
+    return _analyze_with(_connection(job[0]), job)
+
+
+def _analyze_with(
+    db: sqlite3.Connection, job: Tuple[str, Dict[str, Any], int, float, int]
+) -> Dict[str, Any]:
+    """One session's metrics, read through the given store connection"""
+    _, session, end_ms, tolerance, max_gap_ms = job
+    samples = session_samples(db, session, end_ms)
+    return session_metrics(session, *samples, tolerance, max_gap_ms)
+
+
+# ========== ENGINE ==========
+
+
+def iso_timestamp(epoch_ms: int) -> str:
+    """AWSDateTime string of epoch millis, as devicesSessionsList expects"""
+    moment = datetime.fromtimestamp(epoch_ms / 1000, timezone.utc)
+    return moment.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def session_end_ms(session: Dict[str, Any]) -> int:
+    """End of a session; open sessions without a duration end now"""
+    start_ms = to_epoch_ms(session["timestamp"])
+    if session.get("durationMs"):
+        return start_ms + int(session["durationMs"])
+    return int(time.time() * 1000)
+
+
+class SessionAnalytics:
+    """Session metrics for many devices, computed in parallel and cached
+
+    workers is the process count (default: CPU count); below
+    MIN_PARALLEL_SESSIONS uncached sessions everything runs in-process.
+    """
+
+    def __init__(
+        self,
+        api,
+        store: Optional[TelemetryStore] = None,
+        path: Optional[Path] = None,
+        workers: Optional[int] = None,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+        tolerance: float = DEFAULT_TOLERANCE,
+        max_gap_ms: int = DEFAULT_MAX_GAP_MS,
+    ):
+        self.api = api
+        self.store = store or TelemetryStore(api)
+        self.path = Path(path) if path else default_cache_dir() / "analytics.sqlite3"
+        self.workers = workers or os.cpu_count() or 1
+        self.fetch_workers = fetch_workers
+        self.tolerance = tolerance
+        self.max_gap_ms = max_gap_ms
+        self.settings = json.dumps(
+            {
+                "version": ANALYTICS_VERSION,
+                "tolerance": tolerance,
+                "max_gap_ms": max_gap_ms,
+                "fields": FIELD_ALIASES,
+            },
+            sort_keys=True,
+        )
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ========== CACHE ==========
+
+    def cached(
+        self, device_id: str, session_ids: Sequence[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Cached metrics of a device's sessions under the current settings"""
+        found: Dict[str, Dict[str, Any]] = {}
+        ids = list(session_ids)
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                batch = ids[i : i + 500]
+                rows = self._db.execute(
+                    "SELECT session_id, metrics FROM session_metrics"
+                    " WHERE device_id = ? AND settings = ?"
+                    f" AND session_id IN ({','.join('?' * len(batch))})",
+                    (device_id, self.settings, *batch),
+                ).fetchall()
+                found.update((row[0], json.loads(row[1])) for row in rows)
+        return found
+
+    def _remember(self, results: Iterable[Dict[str, Any]]):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO session_metrics"
+                " (device_id, session_id, settings, computed_at, metrics)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        result["device_id"],
+                        result["session_id"],
+                        self.settings,
+                        now,
+                        json.dumps(result),
+                    )
+                    for result in results
+                ],
+            )
+
+    # ========== ANALYSIS ==========
+
+    def _prepare_device(
+        self, device_id: str, start_ms: int, end_ms: int
+    ) -> List[Dict[str, Any]]:
+        """List a device's sessions and sync the measurements they cover"""
+        sessions = [
+            dict(session, deviceId=session.get("deviceId") or device_id)
+            for session in self.api.iter_sessions(
+                device_id, iso_timestamp(start_ms), iso_timestamp(end_ms)
+            )
+        ]
+        if sessions:
+            first = min(to_epoch_ms(session["timestamp"]) for session in sessions)
+            last = max(session_end_ms(session) for session in sessions)
+            self.store.sync_measurements(device_id, first, last)
+        return sessions
+
+    def analyze(
+        self, device_ids: Sequence[str], start_time: Timestamp, end_time: Timestamp
+    ) -> List[Dict[str, Any]]:
+        """Metrics of every session started in the range, ordered by start
+
+        Cached sessions are not recomputed; finished sessions are cached.
+        """
+        start_ms, end_ms = to_epoch_ms(start_time), to_epoch_ms(end_time)
+        with ThreadPoolExecutor(
+            max_workers=self.fetch_workers, thread_name_prefix="harvia-analytics"
+        ) as executor:
+            sessions_by_device = dict(
+                zip(
+                    device_ids,
+                    executor.map(
+                        lambda device_id: self._prepare_device(
+                            device_id, start_ms, end_ms
+                        ),
+                        device_ids,
+                    ),
+                )
+            )
+
+        results: List[Dict[str, Any]] = []
+        pending: List[Dict[str, Any]] = []
+        for device_id, sessions in sessions_by_device.items():
+            cached = self.cached(device_id, [s["sessionId"] for s in sessions])
+            for session in sessions:
+                if session["sessionId"] in cached:
+                    results.append(cached[session["sessionId"]])
+                else:
+                    pending.append(session)
+
+        computed = self._compute(pending)
+        settled = int(time.time() * 1000) - SETTLE_MS
+        self._remember(
+            result
+            for session, result in zip(pending, computed)
+            if session.get("durationMs") and session_end_ms(session) <= settled
+        )
+        results.extend(computed)
+
+        self.api.reporter.info(
+            "session_analytics",
+            "Analyzed {sessions} session(s): {computed} computed, {cached} cached",
+            sessions=len(results),
+            computed=len(computed),
+            cached=len(results) - len(computed),
+        )
+        results.sort(key=lambda result: (result["start_ms"], result["device_id"]))
+        return results
+
+    def _compute(self, sessions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        jobs = [
+            (
+                str(self.store.path),
+                session,
+                session_end_ms(session),
+                self.tolerance,
+                self.max_gap_ms,
+            )
+            for session in sessions
+        ]
+        if not jobs:
+            return []
+        if len(jobs) < MIN_PARALLEL_SESSIONS or self.workers < 2:
+            # In-process: one connection for this run, closed at its end
+            db = _open_store(str(self.store.path))
+            try:
+                return [_analyze_with(db, job) for job in jobs]
+            finally:
+                db.close()
+
+        # Spawned rather than forked: the parent runs transport threads
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(jobs)), mp_context=get_context("spawn")
+        ) as executor:
+            chunksize = max(1, len(jobs) // (self.workers * 4))
+            return list(executor.map(_analyze_session, jobs, chunksize=chunksize))
@@ -0,0 +1,1066 @@
+"""
+Harvia API Client
+Client for the Harvia Sauna REST and GraphQL APIs. Renders nothing itself:
+progress and errors go to a pluggable reporter (silent by default, JSON
+lines or rich console output), so it can be used as a library without
+pulling in the CLI's dependencies.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from harvia_batch import DEFAULT_MAX_BATCH_SIZE, GraphQLBatch
+from harvia_cache import ResponseCache, cached
+from harvia_coalesce import RequestCoalescer, coalesced
+from harvia_endpoints import EndpointsCache
+from harvia_output import ProgressFilter, Reporter
+from harvia_pagination import graphql_page, iter_pages, iter_streamed_pages, rest_page
+from harvia_resilience import is_graphql_read
+from harvia_stream import JsonArrayStream
+from harvia_tokens import TokenManager, TokenStore
+from harvia_transport import DEFAULT_POOL_SIZE, HarviaTransport
+
+
+class HarviaAPI:
+    """Client for interacting with Harvia Sauna API"""
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        transport: Optional[HarviaTransport] = None,
+        endpoints_cache: Optional[EndpointsCache] = None,
+        token_store: Optional[TokenStore] = None,
+        cache: Optional[ResponseCache] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        reporter: Optional[Reporter] = None,
+    ):
+        self.username = username
+        self.password = password
+        self.http = transport or HarviaTransport(pool_size=pool_size)
+        self.endpoints_cache = endpoints_cache or EndpointsCache(self.http)
+        self.token_store = token_store or TokenStore()
+        # Read-only responses; off unless a ResponseCache is passed, since
+        # cached device lists and details can be up to their TTL old
+        self.cache = cache
+        # Identical concurrent reads share one request; None disables
+        self.coalescer = coalescer if coalescer is not None else RequestCoalescer()
+        # Progress and error events; the default reports nothing
+        self._quiet = threading.local()
+        self.reporter = reporter or Reporter()
+        # Called with the device ID after every successful write method
+        self.invalidation_hooks: List[Callable[[str], None]] = []
+        self.endpoints_config = None
+        self.tokens: Optional[TokenManager] = None
+
+        # Fetch endpoints configuration
+        self._fetch_endpoints()
+
+        # Authenticate
+        self._authenticate()
+
+    @property
+    def reporter(self) -> Reporter:
+        """The reporter, without step and success events inside quiet()"""
+        if getattr(self._quiet, "depth", 0):
+            return self._progress_filter
+        return self._reporter
+
+    @reporter.setter
+    def reporter(self, reporter: Reporter):
+        self._reporter = reporter
+        self._progress_filter = ProgressFilter(reporter)
+
+    @contextmanager
+    def quiet(self):
+        """Suppress step and success events on this thread
+
+        For the pages or windows behind one user-level call, which reports
+        a single step and success for all of them.
+        """
+        self._quiet.depth = getattr(self._quiet, "depth", 0) + 1
+        try:
+            yield
+        finally:
+            self._quiet.depth -= 1
+
+    def _quietly(self, fetch: Callable[..., Any]) -> Callable[..., Any]:
+        """fetch wrapped to run inside quiet(), on whichever thread calls it"""
+
+        def call(*args, **kwargs):
+            with self.quiet():
+                return fetch(*args, **kwargs)
+
+        return call
+
+    def _fetch_endpoints(self):
+        """Fetch API endpoints configuration"""
+        self.reporter.step("fetch_endpoints", "Fetching API Endpoints...")
+        self.endpoints_config = self.endpoints_cache.load()
+        self.http.register_endpoints(self.endpoints_config)
+        self.reporter.success(
+            "fetch_endpoints",
+            "Endpoints loaded ({source})",
+            source=self.endpoints_cache.source,
+        )
+
+    @property
+    def id_token(self) -> str:
+        return self.tokens.tokens["idToken"]
+
+    @property
+    def access_token(self) -> str:
+        return self.tokens.tokens["accessToken"]
+
+    @property
+    def refresh_token(self) -> str:
+        return self.tokens.tokens["refreshToken"]
+
+    @property
+    def token_expiry(self) -> float:
+        return self.tokens.tokens["expiresAt"]
+
+    def _authenticate(self):
+        """Authenticate and get JWT tokens"""
+        self.reporter.step("authenticate", "Authenticating...")
+        rest_api_base = self.endpoints_config["RestApi"]["generics"]["https"]
+
+        self.tokens = TokenManager.for_transport(
+            self.http, rest_api_base, self.username, self.password, self.token_store
+        )
+
+        expires_in = int(self.token_expiry - time.time())
+        self.reporter.success(
+            "authenticate",
+            "Authenticated successfully via {source} tokens "
+            "(token expires in {expires_in}s)",
+            source=self.tokens.source,
+            expires_in=expires_in,
+        )
+
+    def refresh_tokens(self):
+        """Refresh JWT tokens"""
+        self.reporter.step("refresh_tokens", "Refreshing Tokens...")
+        self.tokens.refresh()
+        self.reporter.success("refresh_tokens", "Tokens refreshed successfully")
+
+    def revoke_token(self):
+        """Revoke refresh token"""
+        self.reporter.step("revoke_token", "Revoking Refresh Token...")
+        rest_api_base = self.endpoints_config["RestApi"]["generics"]["https"]
+
+        response = self.http.post(
+            f"{rest_api_base}/auth/revoke",
+            auth=False,
+            json={"refreshToken": self.refresh_token, "email": self.username},
+        )
+        response.raise_for_status()
+
+        result = response.json()
+        self.token_store.clear(self.username)
+        self.reporter.success("revoke_token", "Token revoked: {result}", result=result)
+        return result
+
+    def close(self):
+        """Stop the background token refresh and close the pooled sessions"""
+        if self.tokens is not None:
+            self.tokens.stop()
+        self.http.close()
+
+    # ========== CACHE INVALIDATION ==========
+
+    def invalidate_device(self, device_id: str):
+        """Drop cached responses a write to the device may have changed"""
+        if self.cache is not None:
+            self.cache.invalidate(device_id=device_id)
+        for hook in self.invalidation_hooks:
+            hook(device_id)
+
+    # ========== DEVICE SERVICE - REST API ==========
+
+    @cached("list_devices", any_device=True)
+    @coalesced("list_devices")
+    def list_devices(self, max_results: int = 50):
+        """List user's devices"""
+        self.reporter.step("list_devices", "Listing Devices (REST)...")
+        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
+
+        response = self.http.get(
+            f"{rest_api_base}/devices?maxResults={max_results}",
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        self.reporter.success(
+            "list_devices",
+            "Found {count} device(s)",
+            count=len(data.get("devices", [])),
+        )
+        return data
+
+    def send_device_command(
+        self, device_id: str, command_type: str, state: str, cabin_id: str = "C1"
+    ):
+        """Send command to device"""
+        self.reporter.step(
+            "send_device_command",
+            "Sending Command to Device {device_id}...",
+            device_id=device_id,
+        )
+        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
+
+        response = self.http.post(
+            f"{rest_api_base}/devices/command",
+            json={
+                "deviceId": device_id,
+                "cabin": {"id": cabin_id},
+                "command": {"type": command_type, "state": state},
+            },
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        self.invalidate_device(device_id)
+        self.reporter.success(
+            "send_device_command", "Command sent: {result}", result=data
+        )
+        return data
+
+    @coalesced("get_device_state")
+    def get_device_state(self, device_id: str, sub_id: str = "C1"):
+        """Get device state (shadow)"""
+        self.reporter.step(
+            "get_device_state",
+            "Getting Device State for {device_id}...",
+            device_id=device_id,
+        )
+        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
+
+        response = self.http.get(
+            f"{rest_api_base}/devices/state?deviceId={device_id}&subId={sub_id}",
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        self.reporter.success("get_device_state", "Device state retrieved")
+        return data
+
+    def update_device_target(
+        self,
+        device_id: str,
+        temperature: Optional[float] = None,
+        humidity: Optional[float] = None,
+        cabin_id: str = "C1",
+    ):
+        """Update device target temperature/humidity"""
+        self.reporter.step(
+            "update_device_target",
+            "Updating Device Target for {device_id}...",
+            device_id=device_id,
+        )
+        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
+
+        payload = {"deviceId": device_id, "cabin": {"id": cabin_id}}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if humidity is not None:
+            payload["humidity"] = humidity
+
+        response = self.http.patch(
+            f"{rest_api_base}/devices/target",
+            json=payload,
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        self.invalidate_device(device_id)
+        self.reporter.success(
+            "update_device_target", "Target updated: {result}", result=data
+        )
+        return data
+
+    def update_device_profile(self, device_id: str, profile: str, cabin_id: str = "C1"):
+        """Update device profile"""
+        self.reporter.step(
+            "update_device_profile",
+            "Updating Device Profile for {device_id}...",
+            device_id=device_id,
+        )
+        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
+
+        response = self.http.patch(
+            f"{rest_api_base}/devices/profile",
+            json={"deviceId": device_id, "cabin": {"id": cabin_id}, "profile": profile},
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        self.invalidate_device(device_id)
+        self.reporter.success(
+            "update_device_profile", "Profile updated: {result}", result=data
+        )
+        return data
+
+    # ========== DATA SERVICE - REST API ==========
+
+    @coalesced("get_latest_data")
+    def get_latest_data(self, device_id: str, cabin_id: str = "C1"):
+        """Get latest telemetry data"""
+        self.reporter.step(
+            "get_latest_data",
+            "Getting Latest Data for {device_id}...",
+            device_id=device_id,
+        )
+        rest_api_base = self.endpoints_config["RestApi"]["data"]["https"]
+
+        response = self.http.get(
+            f"{rest_api_base}/data/latest-data?deviceId={device_id}&cabinId={cabin_id}",
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        self.reporter.success("get_latest_data", "Latest data retrieved")
+        return data
+
+    def get_telemetry_history(
+        self,
+        device_id: str,
+        start_time: str,
+        end_time: str,
+        cabin_id: str = "C1",
+        sampling_mode: Optional[str] = None,
+        sample_amount: Optional[int] = None,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """Get telemetry history
+
+        With stream=True, returns a JsonArrayStream that yields the
+        measurements while the body downloads.
+        """
+        self.reporter.step(
+            "get_telemetry_history",
+            "Getting Telemetry History for {device_id}...",
+            device_id=device_id,
+        )
+        rest_api_base = self.endpoints_config["RestApi"]["data"]["https"]
+
+        params = {
+            "deviceId": device_id,
+            "cabinId": cabin_id,
+            "startTimestamp": start_time,
+            "endTimestamp": end_time,
+        }
+        if sampling_mode:
+            params["samplingMode"] = sampling_mode
+        if sample_amount:
+            params["sampleAmount"] = sample_amount
+        if next_token:
+            params["nextToken"] = next_token
+
+        response = self.http.get(
+            f"{rest_api_base}/data/telemetry-history", params=params, stream=stream
+        )
+        response.raise_for_status()
+        success_message = "Telemetry history retrieved ({count} measurements)"
+        if stream:
+            return self._stream_response(
+                response, "measurements", "get_telemetry_history", success_message
+            )
+
+        data = response.json()
+        self.reporter.success(
+            "get_telemetry_history",
+            success_message,
+            count=len(data.get("measurements", [])),
+        )
+        return data
+
+    # ========== GRAPHQL HELPER ==========
+
+    def _graphql_request(
+        self,
+        service: str,
+        query: str,
+        variables: Optional[Dict] = None,
+        stream_items: Optional[str] = None,
+        event: Optional[str] = None,
+        success_message: Optional[str] = None,
+    ):
+        """Make a GraphQL request
+
+        With stream_items, returns a JsonArrayStream over the list stored
+        under that key instead of the decoded response, which reports the
+        event's success or failure once it has been read.
+        """
+        graphql_endpoint = self.endpoints_config["GraphQL"][service]["https"]
+
+        response = self.http.post(
+            graphql_endpoint,
+            json={"query": query, "variables": variables or {}},
+            idempotent=is_graphql_read(query),
+            stream=stream_items is not None,
+        )
+        response.raise_for_status()
+        if stream_items is not None:
+            return self._stream_response(
+                response, stream_items, event, success_message, graphql=True
+            )
+
+        data = response.json()
+        self._report_graphql_errors(data)
+        return data
+
+    def _report_graphql_errors(self, data: Dict[str, Any]):
+        if "errors" in data:
+            self.reporter.error(
+                "graphql_errors", "GraphQL Errors: {errors}", errors=data["errors"]
+            )
+
+    def _stream_response(
+        self,
+        response,
+        items_key: str,
+        event: str,
+        success_message: str,
+        graphql: bool = False,
+    ) -> JsonArrayStream:
+        """Stream the response, reporting success or failure once it is read
+
+        The reporter is taken now, so the pages of an iter_* call stay quiet
+        while their items are read.
+        """
+        reporter = self.reporter
+
+        def complete(envelope: Dict[str, Any]):
+            if graphql:
+                self._report_graphql_errors(envelope)
+            reporter.success(event, success_message, count=stream.item_count)
+
+        def fail(error: Exception):
+            reporter.error(event, "Streamed response failed: {error}", error=str(error))
+
+        stream = JsonArrayStream.from_response(
+            response, items_key, on_complete=complete, on_error=fail
+        )
+        return stream
+
+    # ========== DEVICE SERVICE - GRAPHQL ==========
+
+    @cached("graphql_get_device")
+    @coalesced("graphql_get_device")
+    def graphql_get_device(self, device_id: str):
+        """Get device via GraphQL"""
+        self.reporter.step(
+            "graphql_get_device",
+            "Getting Device {device_id} (GraphQL)...",
+            device_id=device_id,
+        )
+
+        query = """
+        query GetDevice($deviceId: ID!) {
+          devicesGet(deviceId: $deviceId) {
+            id
+            type
+            attr {
+              key
+              value
+            }
+            roles
+            via
+          }
+        }
+        """
+
+        data = self._graphql_request("device", query, {"deviceId": device_id})
+        self.reporter.success("graphql_get_device", "Device retrieved via GraphQL")
+        return data
+
+    @cached("graphql_list_user_devices", any_device=True)
+    @coalesced("graphql_list_user_devices")
+    def graphql_list_user_devices(self, next_token: Optional[str] = None):
+        """List user's devices via GraphQL"""
+        self.reporter.step(
+            "graphql_list_user_devices", "Listing User Devices (GraphQL)..."
+        )
+
+        query = """
+        query ListMyDevices($nextToken: String) {
+          usersDevicesList(nextToken: $nextToken) {
+            devices {
+              id
+              type
+              attr {
+                key
+                value
+              }
+              roles
+              via
+            }
+            nextToken
+          }
+        }
+        """
+
+        data = self._graphql_request("device", query, {"nextToken": next_token})
+        devices = data.get("data", {}).get("usersDevicesList", {}).get("devices", [])
+        self.reporter.success(
+            "graphql_list_user_devices",
+            "Found {count} device(s) via GraphQL",
+            count=len(devices),
+        )
+        return data
+
+    @coalesced("graphql_get_device_state")
+    def graphql_get_device_state(self, device_id: str, shadow_name: str = "C1"):
+        """Get device state via GraphQL"""
+        self.reporter.step(
+            "graphql_get_device_state",
+            "Getting Device State {device_id} (GraphQL)...",
+            device_id=device_id,
+        )
+
+        query = """
+        query GetDeviceState($deviceId: ID!, $shadowName: String) {
+          devicesStatesGet(deviceId: $deviceId, shadowName: $shadowName) {
+            deviceId
+            shadowName
+            desired
+            reported
+            timestamp
+            version
+            connectionState {
+              connected
+              updatedTimestamp
+            }
+          }
+        }
+        """
+
+        data = self._graphql_request(
+            "device", query, {"deviceId": device_id, "shadowName": shadow_name}
+        )
+        self.reporter.success(
+            "graphql_get_device_state", "Device state retrieved via GraphQL"
+        )
+        return data
+
+    # ========== DATA SERVICE - GRAPHQL ==========
+
+    @coalesced("graphql_get_latest_measurements")
+    def graphql_get_latest_measurements(self, device_id: str):
+        """Get latest measurements via GraphQL"""
+        self.reporter.step(
+            "graphql_get_latest_measurements",
+            "Getting Latest Measurements {device_id} (GraphQL)...",
+            device_id=device_id,
+        )
+
+        query = """
+        query GetLatestMeasurements($deviceId: String!) {
+          devicesMeasurementsLatest(deviceId: $deviceId) {
+            deviceId
+            subId
+            timestamp
+            sessionId
+            type
+            data
+          }
+        }
+        """
+
+        data = self._graphql_request("data", query, {"deviceId": device_id})
+        measurements = data.get("data", {}).get("devicesMeasurementsLatest", [])
+        self.reporter.success(
+            "graphql_get_latest_measurements",
+            "Retrieved {count} measurement(s) via GraphQL",
+            count=len(measurements),
+        )
+        return data
+
+    def graphql_get_measurements_list(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        sampling_mode: str = "AVERAGE",
+        sample_amount: int = 100,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """Get measurements list via GraphQL
+
+        With stream=True, returns a JsonArrayStream of the measurement items.
+        """
+        self.reporter.step(
+            "graphql_get_measurements_list",
+            "Getting Measurements List {device_id} (GraphQL)...",
+            device_id=device_id,
+        )
+
+        query = """
+        query GetDeviceMeasurements($deviceId: String!, $startTimestamp: String!,
+                                    $endTimestamp: String!, $samplingMode: SamplingMode,
+                                    $sampleAmount: Int, $nextToken: String) {
+          devicesMeasurementsList(
+            deviceId: $deviceId
+            startTimestamp: $startTimestamp
+            endTimestamp: $endTimestamp
+            samplingMode: $samplingMode
+            sampleAmount: $sampleAmount
+            nextToken: $nextToken
+          ) {
+            measurementItems {
+              deviceId
+              subId
+              timestamp
+              sessionId
+              type
+              data
+            }
+            nextToken
+          }
+        }
+        """
+
+        success_message = "Retrieved {count} measurement(s) via GraphQL"
+        data = self._graphql_request(
+            "data",
+            query,
+            {
+                "deviceId": device_id,
+                "startTimestamp": start_timestamp,
+                "endTimestamp": end_timestamp,
+                "samplingMode": sampling_mode,
+                "sampleAmount": sample_amount,
+                "nextToken": next_token,
+            },
+            stream_items="measurementItems" if stream else None,
+            event="graphql_get_measurements_list",
+            success_message=success_message,
+        )
+        if stream:
+            return data
+        items = (
+            data.get("data", {})
+            .get("devicesMeasurementsList", {})
+            .get("measurementItems", [])
+        )
+        self.reporter.success(
+            "graphql_get_measurements_list",
+            success_message,
+            count=len(items),
+        )
+        return data
+
+    def graphql_get_sessions(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """Get device sessions via GraphQL
+
+        With stream=True, returns a JsonArrayStream of the sessions.
+        """
+        self.reporter.step(
+            "graphql_get_sessions",
+            "Getting Sessions {device_id} (GraphQL)...",
+            device_id=device_id,
+        )
+
+        query = """
+        query GetDeviceSessions($deviceId: String!, $startTimestamp: AWSDateTime!,
+                               $endTimestamp: AWSDateTime!, $nextToken: String) {
+          devicesSessionsList(
+            deviceId: $deviceId
+            startTimestamp: $startTimestamp
+            endTimestamp: $endTimestamp
+            nextToken: $nextToken
+          ) {
+            sessions {
+              deviceId
+              sessionId
+              organizationId
+              subId
+              timestamp
+              type
+              durationMs
+              stats
+            }
+            nextToken
+          }
+        }
+        """
+
+        success_message = "Retrieved {count} session(s) via GraphQL"
+        data = self._graphql_request(
+            "data",
+            query,
+            {
+                "deviceId": device_id,
+                "startTimestamp": start_timestamp,
+                "endTimestamp": end_timestamp,
+                "nextToken": next_token,
+            },
+            stream_items="sessions" if stream else None,
+            event="graphql_get_sessions",
+            success_message=success_message,
+        )
+        if stream:
+            return data
+        sessions = (
+            data.get("data", {}).get("devicesSessionsList", {}).get("sessions", [])
+        )
+        self.reporter.success(
+            "graphql_get_sessions",
+            success_message,
+            count=len(sessions),
+        )
+        return data
+
+    # ========== EVENTS SERVICE - GRAPHQL ==========
+
+    def graphql_get_device_events(
+        self,
+        device_id: str,
+        start_timestamp: Optional[str] = None,
+        end_timestamp: Optional[str] = None,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """Get device events via GraphQL
+
+        With stream=True, returns a JsonArrayStream of the events.
+        """
+        self.reporter.step(
+            "graphql_get_device_events",
+            "Getting Device Events {device_id} (GraphQL)...",
+            device_id=device_id,
+        )
+
+        query = """
+        query GetDeviceEvents($deviceId: ID!, $period: TimePeriod, $nextToken: String) {
+          devicesEventsList(
+            deviceId: $deviceId
+            period: $period
+            nextToken: $nextToken
+          ) {
+            events {
+              deviceId
+              timestamp
+              eventId
+              type
+              eventState
+              severity
+              sensorName
+              sensorValue
+              displayName
+            }
+            nextToken
+          }
+        }
+        """
+
+        variables = {"deviceId": device_id, "nextToken": next_token}
+        if start_timestamp and end_timestamp:
+            variables["period"] = {
+                "startTimestamp": start_timestamp,
+                "endTimestamp": end_timestamp,
+            }
+
+        success_message = "Retrieved {count} event(s) via GraphQL"
+        data = self._graphql_request(
+            "events",
+            query,
+            variables,
+            stream_items="events" if stream else None,
+            event="graphql_get_device_events",
+            success_message=success_message,
+        )
+        if stream:
+            return data
+        events = data.get("data", {}).get("devicesEventsList", {}).get("events", [])
+        self.reporter.success(
+            "graphql_get_device_events",
+            success_message,
+            count=len(events),
+        )
+        return data
+
+    @cached("graphql_get_event_metadata")
+    @coalesced("graphql_get_event_metadata")
+    def graphql_get_event_metadata(self, next_token: Optional[str] = None):
+        """Get event metadata via GraphQL"""
+        self.reporter.step(
+            "graphql_get_event_metadata", "Getting Event Metadata (GraphQL)..."
+        )
+
+        query = """
+        query GetEventMetadata($nextToken: String) {
+          eventsMetadataList(nextToken: $nextToken) {
+            eventMetadataItems {
+              eventId
+              name
+              description
+            }
+            nextToken
+          }
+        }
+        """
+
+        data = self._graphql_request("events", query, {"nextToken": next_token})
+        items = (
+            data.get("data", {})
+            .get("eventsMetadataList", {})
+            .get("eventMetadataItems", [])
+        )
+        self.reporter.success(
+            "graphql_get_event_metadata",
+            "Retrieved {count} event metadata item(s) via GraphQL",
+            count=len(items),
+        )
+        return data
+
+    # ========== BATCHED GRAPHQL ==========
+
+    def graphql_batch(
+        self, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    ) -> GraphQLBatch:
+        """Start a batch of aliased per-device GraphQL lookups"""
+        return GraphQLBatch(self, max_batch_size)
+
+    def graphql_batch_device_states(
+        self,
+        device_ids: Iterable[str],
+        shadow_name: str = "C1",
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get many device states in as few requests as possible (GraphQL)"""
+        self.reporter.step(
+            "graphql_batch_device_states", "Getting Device States (GraphQL batch)..."
+        )
+        batch = self.graphql_batch(max_batch_size)
+        results = {
+            device_id: batch.device_state(device_id, shadow_name)
+            for device_id in device_ids
+        }
+        batch.execute()
+        self.reporter.success(
+            "graphql_batch_device_states",
+            "Retrieved {count} device state(s)",
+            count=len(results),
+        )
+        return {device_id: result.result() for device_id, result in results.items()}
+
+    def graphql_batch_latest_measurements(
+        self,
+        device_ids: Iterable[str],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Get latest measurements of many devices in as few requests as possible"""
+        self.reporter.step(
+            "graphql_batch_latest_measurements",
+            "Getting Latest Measurements (GraphQL batch)...",
+        )
+        batch = self.graphql_batch(max_batch_size)
+        results = {
+            device_id: batch.latest_measurements(device_id) for device_id in device_ids
+        }
+        batch.execute()
+        self.reporter.success(
+            "graphql_batch_latest_measurements",
+            "Retrieved latest measurements for {count} device(s)",
+            count=len(results),
+        )
+        return {device_id: result.result() for device_id, result in results.items()}
+
+    # ========== PAGINATED ITERATORS ==========
+
+    def _iter_reported(
+        self,
+        items: Iterator[Dict[str, Any]],
+        event: str,
+        step_message: str,
+        success_message: str,
+        **fields,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield items, reporting one step and one success for all pages"""
+        self.reporter.step(event, step_message, **fields)
+        count = 0
+        for item in items:
+            count += 1
+            yield item
+        self.reporter.success(event, success_message, count=count, **fields)
+
+    def iter_telemetry_history(
+        self,
+        device_id: str,
+        start_time: str,
+        end_time: str,
+        cabin_id: str = "C1",
+        sampling_mode: Optional[str] = None,
+        sample_amount: Optional[int] = None,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every telemetry measurement across all pages
+
+        With stream=True each page is decoded while it downloads, so memory
+        stays bounded however long the range; pages are then not prefetched.
+        """
+        pages = iter_streamed_pages if stream else iter_pages
+        return self._iter_reported(
+            pages(
+                self._quietly(
+                    lambda next_token: self.get_telemetry_history(
+                        device_id,
+                        start_time,
+                        end_time,
+                        cabin_id,
+                        sampling_mode,
+                        sample_amount,
+                        next_token=next_token,
+                        stream=stream,
+                    )
+                ),
+                rest_page("measurements"),
+            ),
+            "get_telemetry_history",
+            "Getting Telemetry History for {device_id}...",
+            "Telemetry history retrieved ({count} measurements)",
+            device_id=device_id,
+        )
+
+    def iter_user_devices(self) -> Iterator[Dict[str, Any]]:
+        """Yield every device of the user across all pages (GraphQL)"""
+        return self._iter_reported(
+            iter_pages(
+                self._quietly(
+                    lambda next_token: self.graphql_list_user_devices(
+                        next_token=next_token
+                    )
+                ),
+                graphql_page("usersDevicesList", "devices"),
+            ),
+            "graphql_list_user_devices",
+            "Listing User Devices (GraphQL)...",
+            "Found {count} device(s) via GraphQL",
+        )
+
+    def iter_measurements(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        sampling_mode: str = "AVERAGE",
+        sample_amount: int = 100,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every measurement item across all pages (GraphQL)
+
+        stream works as for iter_telemetry_history.
+        """
+        pages = iter_streamed_pages if stream else iter_pages
+        return self._iter_reported(
+            pages(
+                self._quietly(
+                    lambda next_token: self.graphql_get_measurements_list(
+                        device_id,
+                        start_timestamp,
+                        end_timestamp,
+                        sampling_mode,
+                        sample_amount,
+                        next_token=next_token,
+                        stream=stream,
+                    )
+                ),
+                graphql_page("devicesMeasurementsList", "measurementItems"),
+            ),
+            "graphql_get_measurements_list",
+            "Getting Measurements List {device_id} (GraphQL)...",
+            "Retrieved {count} measurement(s) via GraphQL",
+            device_id=device_id,
+        )
+
+    def iter_sessions(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every session across all pages (GraphQL)
+
+        stream works as for iter_telemetry_history.
+        """
+        pages = iter_streamed_pages if stream else iter_pages
+        return self._iter_reported(
+            pages(
+                self._quietly(
+                    lambda next_token: self.graphql_get_sessions(
+                        device_id,
+                        start_timestamp,
+                        end_timestamp,
+                        next_token=next_token,
+                        stream=stream,
+                    )
+                ),
+                graphql_page("devicesSessionsList", "sessions"),
+            ),
+            "graphql_get_sessions",
+            "Getting Sessions {device_id} (GraphQL)...",
+            "Retrieved {count} session(s) via GraphQL",
+            device_id=device_id,
+        )
+
+    def iter_device_events(
+        self,
+        device_id: str,
+        start_timestamp: Optional[str] = None,
+        end_timestamp: Optional[str] = None,
+        stream: bool = False,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield every device event across all pages (GraphQL)
+
+        stream works as for iter_telemetry_history.
+        """
+        pages = iter_streamed_pages if stream else iter_pages
+        return self._iter_reported(
+            pages(
+                self._quietly(
+                    lambda next_token: self.graphql_get_device_events(
+                        device_id,
+                        start_timestamp,
+                        end_timestamp,
+                        next_token=next_token,
+                        stream=stream,
+                    )
+                ),
+                graphql_page("devicesEventsList", "events"),
+            ),
+            "graphql_get_device_events",
+            "Getting Device Events {device_id} (GraphQL)...",
+            "Retrieved {count} event(s) via GraphQL",
+            device_id=device_id,
+        )
+
+    def iter_event_metadata(self) -> Iterator[Dict[str, Any]]:
+        """Yield every event metadata item across all pages (GraphQL)"""
+        return self._iter_reported(
+            iter_pages(
+                self._quietly(
+                    lambda next_token: self.graphql_get_event_metadata(
+                        next_token=next_token
+                    )
+                ),
+                graphql_page("eventsMetadataList", "eventMetadataItems"),
+            ),
+            "graphql_get_event_metadata",
+            "Getting Event Metadata (GraphQL)...",
+            "Retrieved {count} event metadata item(s) via GraphQL",
+        )
@@ -0,0 +1,405 @@
+"""
+Harvia Async Facade
+Awaitable interface to HarviaAPI for fleet-wide sweeps from asyncio code.
+This is a thread-offload facade, not asyncio-native I/O: every call runs
+the blocking requests client on a bounded worker pool, so each request in
+flight holds one worker thread and concurrency is capped by the pool size.
+In exchange it shares the wrapped client's endpoints, tokens, pooled
+connections, caches and resilience, and returns the same response shapes.
+"""
+
+import asyncio
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+from harvia_api import HarviaAPI
+from harvia_coalesce import AsyncRequestCoalescer
+from harvia_stream import JsonArrayStream
+from harvia_transport import DEFAULT_POOL_SIZE
+
+DEFAULT_CONCURRENCY = 8
+# Items pulled per worker-pool call when iterating pages or streams
+ITER_BATCH_SIZE = 100
+
+
+def _take(iterator: Iterable[Any], count: int) -> List[Any]:
+    return list(itertools.islice(iterator, count))
+
+
+class AsyncStream:
+    """Async iteration over a JsonArrayStream, decoded on the worker pool
+
+    Iterate once, as with the stream itself; envelope and item_count are
+    the wrapped stream's and are complete once iteration ends.
+    """
+
+    def __init__(self, client: "ThreadedAsyncHarviaAPI", stream: JsonArrayStream):
+        self.client = client
+        self.stream = stream
+
+    @property
+    def envelope(self) -> Optional[Dict[str, Any]]:
+        return self.stream.envelope
+
+    @property
+    def item_count(self) -> int:
+        return self.stream.item_count
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self.client._iterate(self.stream)
+
+
+class ThreadedAsyncHarviaAPI:
+    """Async facade over HarviaAPI that runs its calls on a thread pool"""
+
+    def __init__(self, api: HarviaAPI, concurrency: int = DEFAULT_CONCURRENCY):
+        self.api = api
+        self.concurrency = concurrency
+        # Identical concurrent reads await one worker-pool call
+        self.coalescer = AsyncRequestCoalescer()
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="harvia-async"
+        )
+
+    @classmethod
+    async def create(
+        cls,
+        username: str,
+        password: str,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        **kwargs,
+    ) -> "ThreadedAsyncHarviaAPI":
+        """Build the sync client off the event loop and wrap it"""
+        kwargs.setdefault("pool_size", max(concurrency, DEFAULT_POOL_SIZE))
+        loop = asyncio.get_running_loop()
+        api = await loop.run_in_executor(
+            None, functools.partial(HarviaAPI, username, password, **kwargs)
+        )
+        return cls(api, concurrency)
+
+    async def _call(self, method: Callable, *args, **kwargs):
+        """Run a sync HarviaAPI method on the bounded worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(method, *args, **kwargs)
+        )
+
+    async def _iterate(self, items: Iterable[Any]) -> AsyncIterator[Any]:
+        """Drive a blocking iterator on the worker pool, a batch per call"""
+        iterator = iter(items)
+        try:
+            while True:
+                batch = await self._call(_take, iterator, ITER_BATCH_SIZE)
+                if not batch:
+                    return
+                for item in batch:
+                    yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()  # releases a half-read response or prefetch thread
+
+    async def _call_coalesced(self, method: Callable, *args):
+        """Like _call, but concurrent calls with equal arguments share one run"""
+        return await self.coalescer.run(
+            (self.api.username, method.__name__) + args,
+            lambda: self._call(method, *args),
+        )
+
+    async def close(self):
+        """Stop the worker pool, then close the wrapped client and its transport"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+        self.api.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # ========== AUTHENTICATION ==========
+
+    async def refresh_tokens(self):
+        return await self._call(self.api.refresh_tokens)
+
+    async def revoke_token(self):
+        return await self._call(self.api.revoke_token)
+
+    # ========== DEVICE SERVICE - REST API ==========
+
+    async def list_devices(self, max_results: int = 50):
+        return await self._call_coalesced(self.api.list_devices, max_results)
+
+    async def send_device_command(
+        self, device_id: str, command_type: str, state: str, cabin_id: str = "C1"
+    ):
+        return await self._call(
+            self.api.send_device_command, device_id, command_type, state, cabin_id
+        )
+
+    async def get_device_state(self, device_id: str, sub_id: str = "C1"):
+        return await self._call_coalesced(self.api.get_device_state, device_id, sub_id)
+
+    async def update_device_target(
+        self,
+        device_id: str,
+        temperature: Optional[float] = None,
+        humidity: Optional[float] = None,
+        cabin_id: str = "C1",
+    ):
+        return await self._call(
+            self.api.update_device_target, device_id, temperature, humidity, cabin_id
+        )
+
+    async def update_device_profile(
+        self, device_id: str, profile: str, cabin_id: str = "C1"
+    ):
+        return await self._call(
+            self.api.update_device_profile, device_id, profile, cabin_id
+        )
+
+    # ========== DATA SERVICE - REST API ==========
+
+    async def get_latest_data(self, device_id: str, cabin_id: str = "C1"):
+        return await self._call_coalesced(self.api.get_latest_data, device_id, cabin_id)
+
+    async def get_telemetry_history(
+        self,
+        device_id: str,
+        start_time: str,
+        end_time: str,
+        cabin_id: str = "C1",
+        sampling_mode: Optional[str] = None,
+        sample_amount: Optional[int] = None,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """With stream=True, returns an AsyncStream of the measurements"""
+        data = await self._call(
+            self.api.get_telemetry_history,
+            device_id,
+            start_time,
+            end_time,
+            cabin_id,
+            sampling_mode,
+            sample_amount,
+            next_token=next_token,
+            stream=stream,
+        )
+        return AsyncStream(self, data) if stream else data
+
+    # ========== GRAPHQL ==========
+
+    async def graphql_get_device(self, device_id: str):
+        return await self._call_coalesced(self.api.graphql_get_device, device_id)
+
+    async def graphql_list_user_devices(self, next_token: Optional[str] = None):
+        return await self._call_coalesced(
+            self.api.graphql_list_user_devices, next_token
+        )
+
+    async def graphql_get_device_state(self, device_id: str, shadow_name: str = "C1"):
+        return await self._call_coalesced(
+            self.api.graphql_get_device_state, device_id, shadow_name
+        )
+
+    async def graphql_get_latest_measurements(self, device_id: str):
+        return await self._call_coalesced(
+            self.api.graphql_get_latest_measurements, device_id
+        )
+
+    async def graphql_get_measurements_list(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        sampling_mode: str = "AVERAGE",
+        sample_amount: int = 100,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """With stream=True, returns an AsyncStream of the measurement items"""
+        data = await self._call(
+            self.api.graphql_get_measurements_list,
+            device_id,
+            start_timestamp,
+            end_timestamp,
+            sampling_mode,
+            sample_amount,
+            next_token=next_token,
+            stream=stream,
+        )
+        return AsyncStream(self, data) if stream else data
+
+    async def graphql_get_sessions(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """With stream=True, returns an AsyncStream of the sessions"""
+        data = await self._call(
+            self.api.graphql_get_sessions,
+            device_id,
+            start_timestamp,
+            end_timestamp,
+            next_token=next_token,
+            stream=stream,
+        )
+        return AsyncStream(self, data) if stream else data
+
+    async def graphql_get_device_events(
+        self,
+        device_id: str,
+        start_timestamp: Optional[str] = None,
+        end_timestamp: Optional[str] = None,
+        next_token: Optional[str] = None,
+        stream: bool = False,
+    ):
+        """With stream=True, returns an AsyncStream of the events"""
+        data = await self._call(
+            self.api.graphql_get_device_events,
+            device_id,
+            start_timestamp,
+            end_timestamp,
+            next_token=next_token,
+            stream=stream,
+        )
+        return AsyncStream(self, data) if stream else data
+
+    async def graphql_get_event_metadata(self, next_token: Optional[str] = None):
+        return await self._call_coalesced(
+            self.api.graphql_get_event_metadata, next_token
+        )
+
+    # ========== PAGINATED ITERATORS ==========
+
+    def iter_telemetry_history(
+        self,
+        device_id: str,
+        start_time: str,
+        end_time: str,
+        cabin_id: str = "C1",
+        sampling_mode: Optional[str] = None,
+        sample_amount: Optional[int] = None,
+        stream: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over HarviaAPI.iter_telemetry_history"""
+        return self._iterate(
+            self.api.iter_telemetry_history(
+                device_id,
+                start_time,
+                end_time,
+                cabin_id,
+                sampling_mode,
+                sample_amount,
+                stream=stream,
+            )
+        )
+
+    def iter_user_devices(self) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over HarviaAPI.iter_user_devices"""
+        return self._iterate(self.api.iter_user_devices())
+
+    def iter_measurements(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        sampling_mode: str = "AVERAGE",
+        sample_amount: int = 100,
+        stream: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over HarviaAPI.iter_measurements"""
+        return self._iterate(
+            self.api.iter_measurements(
+                device_id,
+                start_timestamp,
+                end_timestamp,
+                sampling_mode,
+                sample_amount,
+                stream=stream,
+            )
+        )
+
+    def iter_sessions(
+        self,
+        device_id: str,
+        start_timestamp: str,
+        end_timestamp: str,
+        stream: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over HarviaAPI.iter_sessions"""
+        return self._iterate(
+            self.api.iter_sessions(
+                device_id, start_timestamp, end_timestamp, stream=stream
+            )
+        )
+
+    def iter_device_events(
+        self,
+        device_id: str,
+        start_timestamp: Optional[str] = None,
+        end_timestamp: Optional[str] = None,
+        stream: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over HarviaAPI.iter_device_events"""
+        return self._iterate(
+            self.api.iter_device_events(
+                device_id, start_timestamp, end_timestamp, stream=stream
+            )
+        )
+
+    def iter_event_metadata(self) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over HarviaAPI.iter_event_metadata"""
+        return self._iterate(self.api.iter_event_metadata())
+
+    # ========== FAN-OUT ==========
+
+    async def map_devices(
+        self, fetch: Callable, device_ids: Iterable[str], *args, **kwargs
+    ) -> Dict[str, Any]:
+        """Call an async method for every device concurrently
+
+        Failures are returned in place of the result so one bad device does
+        not abort the whole sweep.
+        """
+        device_ids = list(device_ids)
+        results = await asyncio.gather(
+            *(fetch(device_id, *args, **kwargs) for device_id in device_ids),
+            return_exceptions=True,
+        )
+        return dict(zip(device_ids, results))
+
+    async def sweep(
+        self,
+        device_ids: Iterable[str],
+        cabin_id: str = "C1",
+        start_timestamp: Optional[str] = None,
+        end_timestamp: Optional[str] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Fetch latest data, state and events for every device concurrently"""
+        device_ids = list(device_ids)
+        latest, states, events = await asyncio.gather(
+            self.map_devices(self.get_latest_data, device_ids, cabin_id),
+            self.map_devices(self.get_device_state, device_ids, cabin_id),
+            self.map_devices(
+                self.graphql_get_device_events,
+                device_ids,
+                start_timestamp,
+                end_timestamp,
+            ),
+        )
+        return {
+            device_id: {
+                "latest": latest[device_id],
+                "state": states[device_id],
+                "events": events[device_id],
+            }
+            for device_id in device_ids
+        }
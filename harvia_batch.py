@@ -0,0 +1,179 @@
+"""
+Harvia GraphQL Batching
+Collects many per-device GraphQL lookups and sends them as one aliased
+document per service (up to max_batch_size fields each), then splits the
+response back into per-lookup results shaped like the single-call methods,
+each with only the errors that belong to its alias.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MAX_BATCH_SIZE = 25
+
+DEVICE_STATE_SELECTION = """
+    deviceId
+    shadowName
+    desired
+    reported
+    timestamp
+    version
+    connectionState {
+      connected
+      updatedTimestamp
+    }
+"""
+
+LATEST_MEASUREMENTS_SELECTION = """
+    deviceId
+    subId
+    timestamp
+    sessionId
+    type
+    data
+"""
+
+
+class BatchResult:
+    """Placeholder for one lookup's response, filled in by GraphQLBatch.execute"""
+
+    def __init__(self, service: str, field: str):
+        self.service = service
+        self.field = field
+        self.response: Optional[Dict[str, Any]] = None
+
+    @property
+    def done(self) -> bool:
+        return self.response is not None
+
+    @property
+    def data(self) -> Any:
+        """The field's value, as found under response["data"][field]"""
+        return self.result().get("data", {}).get(self.field)
+
+    @property
+    def errors(self) -> List[Dict[str, Any]]:
+        return self.result().get("errors", [])
+
+    def result(self) -> Dict[str, Any]:
+        """Response shaped like the matching single-call graphql_* method"""
+        if self.response is None:
+            raise RuntimeError("Batch has not been executed yet")
+        return self.response
+
+
+class _Lookup:
+    def __init__(self, field, arguments, selection, result):
+        self.field = field
+        self.arguments = arguments  # {name: (graphql_type, value)}
+        self.selection = selection
+        self.result = result
+
+
+class GraphQLBatch:
+    """Aliased multi-device GraphQL batching"""
+
+    def __init__(
+        self, api, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, workers: int = 4
+    ):
+        self.api = api
+        self.max_batch_size = max_batch_size
+        self.workers = workers
+        self._pending: Dict[str, List[_Lookup]] = {}
+
+    def add(
+        self,
+        service: str,
+        field: str,
+        arguments: Dict[str, Tuple[str, Any]],
+        selection: str,
+    ) -> BatchResult:
+        """Queue one field lookup; arguments map name -> (GraphQL type, value)"""
+        result = BatchResult(service, field)
+        self._pending.setdefault(service, []).append(
+            _Lookup(field, arguments, selection, result)
+        )
+        return result
+
+    def device_state(self, device_id: str, shadow_name: str = "C1") -> BatchResult:
+        """Queue a graphql_get_device_state lookup"""
+        return self.add(
+            "device",
+            "devicesStatesGet",
+            {"deviceId": ("ID!", device_id), "shadowName": ("String", shadow_name)},
+            DEVICE_STATE_SELECTION,
+        )
+
+    def latest_measurements(self, device_id: str) -> BatchResult:
+        """Queue a graphql_get_latest_measurements lookup"""
+        return self.add(
+            "data",
+            "devicesMeasurementsLatest",
+            {"deviceId": ("String!", device_id)},
+            LATEST_MEASUREMENTS_SELECTION,
+        )
+
+    def execute(self):
+        """Send every queued lookup, one aliased document per service chunk"""
+        chunks = []
+        for service, lookups in self._pending.items():
+            for i in range(0, len(lookups), self.max_batch_size):
+                chunks.append((service, lookups[i : i + self.max_batch_size]))
+        self._pending = {}
+
+        if len(chunks) <= 1 or self.workers <= 1:
+            for chunk in chunks:
+                self._send(*chunk)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for future in [executor.submit(self._send, *chunk) for chunk in chunks]:
+                future.result()
+
+    def _send(self, service: str, lookups: List[_Lookup]):
+        query, variables = build_document(lookups)
+        try:
+            response = self.api._graphql_request(service, query, variables)
+        except Exception as e:
+            for lookup in lookups:
+                lookup.result.response = {
+                    "data": {lookup.field: None},
+                    "errors": [{"message": str(e)}],
+                }
+            return
+
+        data = response.get("data") or {}
+        errors_by_alias: Dict[Optional[str], List[Dict[str, Any]]] = {}
+        for error in response.get("errors") or []:
+            path = error.get("path") or [None]
+            errors_by_alias.setdefault(path[0], []).append(error)
+
+        for index, lookup in enumerate(lookups):
+            alias = f"a{index}"
+            result = {"data": {lookup.field: data.get(alias)}}
+            # Errors without a path cannot be attributed, so every alias gets them
+            errors = errors_by_alias.get(alias, []) + errors_by_alias.get(None, [])
+            if errors:
+                result["errors"] = errors
+            lookup.result.response = result
+
+
+def build_document(lookups: List[_Lookup]) -> Tuple[str, Dict[str, Any]]:
+    """Render lookups as one query with fields aliased a0, a1, ..."""
+    definitions = []
+    fields = []
+    variables = {}
+    for index, lookup in enumerate(lookups):
+        alias = f"a{index}"
+        call_args = []
+        for name, (graphql_type, value) in lookup.arguments.items():
+            variable = f"{alias}_{name}"
+            definitions.append(f"${variable}: {graphql_type}")
+            call_args.append(f"{name}: ${variable}")
+            variables[variable] = value
+        fields.append(
+            f"  {alias}: {lookup.field}({', '.join(call_args)}) {{{lookup.selection}}}"
+        )
+
+    query = f"query Batch({', '.join(definitions)}) {{\n" + "\n".join(fields) + "\n}"
+    return query, variables
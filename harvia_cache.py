@@ -0,0 +1,262 @@
+"""
+Harvia Response Cache
+TTL + LRU cache for read-only API calls whose data changes rarely (device
+lists, device details, event metadata). Entries are keyed by endpoint and
+arguments, expire after a per-endpoint TTL and are tagged with their device
+so write methods can invalidate exactly what they may have changed. An
+optional SQLite backend keeps entries across runs.
+"""
+
+import copy
+import functools
+import inspect
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from harvia_endpoints import default_cache_dir
+
+DEFAULT_MAX_ENTRIES = 256
+
+# Device tag of entries that cover every device, such as device lists
+ANY_DEVICE = "*"
+
+# Seconds each cached endpoint stays fresh; endpoints not listed are not cached
+DEFAULT_TTLS = {
+    "list_devices": 10 * 60,
+    "graphql_list_user_devices": 10 * 60,
+    "graphql_get_device": 10 * 60,
+    "graphql_get_event_metadata": 24 * 3600,
+}
+
+DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    device_id TEXT,
+    expires_at REAL NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_device ON responses (device_id);
+"""
+
+
+class DiskBackend:
+    """SQLite store for cache entries that should outlive the process"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_cache_dir() / "responses.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(DISK_SCHEMA)
+
+    def get(self, key: str) -> Optional[Tuple[float, Optional[str], Any]]:
+        """Look up (expires_at, device_id, value) for a key"""
+        row = self._db.execute(
+            "SELECT expires_at, device_id, value FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        return (row[0], row[1] or None, json.loads(row[2])) if row else None
+
+    def put(
+        self,
+        key: str,
+        endpoint: str,
+        device_id: Optional[str],
+        expires_at: float,
+        value: Any,
+    ):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, endpoint, device_id, expires_at, value)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, endpoint, device_id or "", expires_at, json.dumps(value)),
+            )
+
+    def delete(self, endpoint: Optional[str] = None, device_id: Optional[str] = None):
+        """Delete by endpoint and/or device tag"""
+        clauses, params = [], []
+        if endpoint is not None:
+            clauses.append("endpoint = ?")
+            params.append(endpoint)
+        if device_id is not None:
+            clauses.append("device_id = ?")
+            params.append(device_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._db:
+            self._db.execute(f"DELETE FROM responses{where}", params)
+
+    def prune(self, max_entries: int):
+        """Drop expired entries, then the soonest-expiring beyond max_entries"""
+        with self._db:
+            self._db.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE key NOT IN"
+                " (SELECT key FROM responses ORDER BY expires_at DESC LIMIT ?)",
+                (max_entries,),
+            )
+
+    def close(self):
+        self._db.close()
+
+
+class ResponseCache:
+    """Bounded in-memory LRU of API responses with per-endpoint TTLs"""
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        disk: Optional[DiskBackend] = None,
+    ):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        # key -> (expires_at, endpoint, device_id, value), oldest use first
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[str], Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        if self.disk is not None:
+            self.disk.prune(max_entries)
+
+    @classmethod
+    def on_disk(cls, path: Optional[Path] = None, **kwargs) -> "ResponseCache":
+        """Cache that also persists entries in SQLite across runs"""
+        return cls(disk=DiskBackend(path), **kwargs)
+
+    @staticmethod
+    def make_key(scope: str, endpoint: str, arguments: Dict[str, Any]) -> str:
+        return json.dumps([scope, endpoint, arguments], sort_keys=True, default=str)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a key; returns (found, a copy of the value)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, copy.deepcopy(entry[3])
+                del self._entries[key]
+
+            if self.disk is not None:
+                stored = self.disk.get(key)
+                if stored is not None and stored[0] > now:
+                    expires_at, device_id, value = stored
+                    endpoint = json.loads(key)[1]
+                    self._remember(key, expires_at, endpoint, device_id, value)
+                    self.hits += 1
+                    return True, copy.deepcopy(value)
+
+            self.misses += 1
+            return False, None
+
+    def put(self, key: str, endpoint: str, device_id: Optional[str], value: Any):
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._remember(key, expires_at, endpoint, device_id, copy.deepcopy(value))
+            if self.disk is not None:
+                self.disk.put(key, endpoint, device_id, expires_at, value)
+
+    def _remember(self, key, expires_at, endpoint, device_id, value):
+        self._entries[key] = (expires_at, endpoint, device_id, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(
+        self, endpoint: Optional[str] = None, device_id: Optional[str] = None
+    ):
+        """Drop entries by endpoint and/or device; no arguments clears everything
+
+        Entries tagged ANY_DEVICE (such as device lists) are dropped together
+        with any device's entries, since a write can change what they contain.
+        """
+        with self._lock:
+            for key, (_, entry_endpoint, entry_device, _) in list(
+                self._entries.items()
+            ):
+                if endpoint is not None and entry_endpoint != endpoint:
+                    continue
+                if device_id is not None and entry_device not in (
+                    device_id,
+                    ANY_DEVICE,
+                ):
+                    continue
+                del self._entries[key]
+
+            if self.disk is not None:
+                if device_id is None:
+                    self.disk.delete(endpoint)
+                else:
+                    self.disk.delete(endpoint, device_id)
+                    self.disk.delete(endpoint, ANY_DEVICE)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+        }
+
+
+def bound_arguments(
+    signature: inspect.Signature, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """A method call's arguments by name, defaults included, without self"""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = dict(bound.arguments)
+    arguments.pop("self", None)
+    return arguments
+
+
+def cached(endpoint: str, any_device: bool = False) -> Callable:
+    """Serve a HarviaAPI read method from self.cache when it has a fresh entry
+
+    The call's arguments form the cache key. A device_id argument, if the
+    method has one, tags the entry for invalidation; any_device marks
+    results that a write to any device may change. GraphQL responses
+    carrying errors are never cached.
+    """
+
+    def decorate(method: Callable) -> Callable:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, "cache", None)
+            if cache is None or endpoint not in cache.ttls:
+                return method(self, *args, **kwargs)
+
+            arguments = bound_arguments(signature, (self,) + args, kwargs)
+            key = cache.make_key(self.username, endpoint, arguments)
+
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            value = method(self, *args, **kwargs)
+            if not (isinstance(value, dict) and value.get("errors")):
+                device_id = ANY_DEVICE if any_device else arguments.get("device_id")
+                cache.put(key, endpoint, device_id, value)
+            return value
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,136 @@
+"""
+Harvia Request Coalescing
+Collapses identical concurrent read requests into one upstream call. The
+first caller for a key runs the request; everyone asking for the same key
+while it is in flight waits for that result instead of sending their own.
+Sits below the response cache, so a cold-cache stampede costs one request.
+"""
+
+import asyncio
+import copy
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from harvia_cache import bound_arguments
+
+
+class RequestCoalescer:
+    """Single-flight execution of identical concurrent calls across threads"""
+
+    def __init__(self):
+        self.hits = 0  # calls answered by another caller's request
+        self.misses = 0  # calls that went upstream
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Return fetch()'s result, sharing one call among concurrent callers
+
+        Waiters get a deep copy of the result (or the same exception), so
+        callers can never see each other's changes.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "in_flight": len(self._in_flight),
+        }
+
+
+class AsyncRequestCoalescer:
+    """Single-flight execution of identical concurrent calls across tasks"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fetch()'s result, sharing one call among concurrent tasks"""
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.hits += 1
+            # shield: a cancelled waiter must not cancel the shared request
+            return copy.deepcopy(await asyncio.shield(future))
+
+        self.misses += 1
+        future = self._in_flight[key] = asyncio.ensure_future(fetch())
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                self._forget(key, future)
+            else:
+                # Cancelled leader: the request runs on for the waiters
+                future.add_done_callback(lambda _: self._forget(key, future))
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        """Drop a finished call, unless a newer one has taken its key"""
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "in_flight": len(self._in_flight),
+        }
+
+
+def call_key(scope: str, endpoint: str, arguments: Dict[str, Any]) -> str:
+    return json.dumps([scope, endpoint, arguments], sort_keys=True, default=str)
+
+
+def coalesced(endpoint: str) -> Callable:
+    """Share one in-flight HarviaAPI read among identical concurrent calls
+
+    Uses self.coalescer; the username and the call's arguments form the key,
+    as for the response cache, so a coalescer shared by clients of different
+    users never hands one user's response to another.
+    """
+
+    def decorate(method: Callable) -> Callable:
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            coalescer = getattr(self, "coalescer", None)
+            if coalescer is None:
+                return method(self, *args, **kwargs)
+            arguments = bound_arguments(signature, (self,) + args, kwargs)
+            return coalescer.run(
+                call_key(self.username, endpoint, arguments),
+                lambda: method(self, *args, **kwargs),
+            )
+
+        return wrapper
+
+    return decorate
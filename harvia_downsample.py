@@ -0,0 +1,304 @@
+"""
+Harvia Downsampling
+Client-side downsampling of raw measurement series onto a fixed time grid,
+so raw data fetched once can be served at any zoom level without asking
+the server to sample again. Three methods: bucket average, min/max envelope
+and Largest-Triangle-Three-Buckets. All are vectorized with NumPy and fed
+chunk by chunk, e.g. one page or one TelemetryFrame at a time; memory is
+bounded by the bucket count (plus two buckets of points for LTTB), not by
+the length of the series.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+METHODS = ("average", "minmax", "lttb")
+
+
+def bucket_index(
+    timestamps: np.ndarray, start_ms: int, end_ms: int, buckets: int
+) -> np.ndarray:
+    """Bucket of each epoch-ms timestamp on an even grid over [start_ms, end_ms]"""
+    span = end_ms - start_ms + 1
+    return (timestamps.astype(np.int64) - start_ms) * buckets // span
+
+
+def bucket_starts(start_ms: int, end_ms: int, buckets: int) -> np.ndarray:
+    """Epoch-ms start of every bucket on the grid"""
+    span = end_ms - start_ms + 1
+    offsets = np.arange(buckets, dtype=np.int64) * span
+    return start_ms + (offsets + buckets - 1) // buckets
+
+
+class Downsampler(ABC):
+    """Chunked downsampling of one series onto buckets over [start_ms, end_ms]
+
+    Feed (timestamps, values) chunks with add(); NaN values and samples
+    outside the range are ignored. result() returns (timestamps, values).
+    """
+
+    def __init__(self, start_ms: int, end_ms: int, buckets: int):
+        if buckets < 1:
+            raise ValueError("buckets must be at least 1")
+        if end_ms < start_ms:
+            raise ValueError("end_ms must not be before start_ms")
+        self.start_ms = int(start_ms)
+        self.end_ms = int(end_ms)
+        self.buckets = int(buckets)
+
+    def _clean(self, timestamps, values) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(timestamps, values, bucket) of the usable samples in a chunk"""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        keep = (
+            ~np.isnan(values)
+            & (timestamps >= self.start_ms)
+            & (timestamps <= self.end_ms)
+        )
+        if not keep.all():
+            timestamps, values = timestamps[keep], values[keep]
+        index = bucket_index(timestamps, self.start_ms, self.end_ms, self.buckets)
+        return timestamps, values, index
+
+    @abstractmethod
+    def add(self, timestamps, values) -> "Downsampler":
+        """Feed one chunk of samples"""
+
+    def extend(self, chunks: Iterable[Tuple[np.ndarray, np.ndarray]]) -> "Downsampler":
+        for timestamps, values in chunks:
+            self.add(timestamps, values)
+        return self
+
+    @abstractmethod
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values) of the downsampled series"""
+
+
+class BucketAverage(Downsampler):
+    """Mean of each non-empty bucket, stamped with the bucket start
+
+    Chunks may arrive in any order.
+    """
+
+    def __init__(self, start_ms: int, end_ms: int, buckets: int):
+        super().__init__(start_ms, end_ms, buckets)
+        self.sums = np.zeros(self.buckets)
+        self.counts = np.zeros(self.buckets, dtype=np.int64)
+
+    def add(self, timestamps, values) -> "BucketAverage":
+        _, values, index = self._clean(timestamps, values)
+        if index.size:
+            self.sums += np.bincount(index, weights=values, minlength=self.buckets)
+            self.counts += np.bincount(index, minlength=self.buckets)
+        return self
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        filled = self.counts > 0
+        starts = bucket_starts(self.start_ms, self.end_ms, self.buckets)
+        return starts[filled], self.sums[filled] / self.counts[filled]
+
+
+class MinMaxEnvelope(Downsampler):
+    """Lowest and highest sample of each bucket
+
+    result() gives both extremes at their own timestamps in time order, so
+    a line drawn through them keeps every spike; envelope() gives the
+    per-bucket bounds for a shaded band. Chunks may arrive in any order.
+    """
+
+    def __init__(self, start_ms: int, end_ms: int, buckets: int):
+        super().__init__(start_ms, end_ms, buckets)
+        self.lows = np.full(self.buckets, np.inf)
+        self.highs = np.full(self.buckets, -np.inf)
+        self.low_times = np.zeros(self.buckets, dtype=np.int64)
+        self.high_times = np.zeros(self.buckets, dtype=np.int64)
+
+    def add(self, timestamps, values) -> "MinMaxEnvelope":
+        timestamps, values, index = self._clean(timestamps, values)
+        if not index.size:
+            return self
+        if np.any(index[1:] < index[:-1]):
+            order = np.argsort(index, kind="stable")
+            index, values, timestamps = index[order], values[order], timestamps[order]
+        starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+        buckets = index[starts]
+        group = np.repeat(np.arange(starts.size), np.diff(np.r_[starts, index.size]))
+        lows = np.minimum.reduceat(values, starts)
+        highs = np.maximum.reduceat(values, starts)
+        low_times = timestamps[_first_per_group(values == lows[group], group)]
+        high_times = timestamps[_first_per_group(values == highs[group], group)]
+
+        lower = lows < self.lows[buckets]
+        self.lows[buckets[lower]] = lows[lower]
+        self.low_times[buckets[lower]] = low_times[lower]
+        higher = highs > self.highs[buckets]
+        self.highs[buckets[higher]] = highs[higher]
+        self.high_times[buckets[higher]] = high_times[higher]
+        return self
+
+    def envelope(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(bucket starts, lows, highs) of the non-empty buckets"""
+        filled = np.isfinite(self.lows)
+        starts = bucket_starts(self.start_ms, self.end_ms, self.buckets)
+        return starts[filled], self.lows[filled], self.highs[filled]
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        filled = np.isfinite(self.lows)
+        low_times, high_times = self.low_times[filled], self.high_times[filled]
+        lows, highs = self.lows[filled], self.highs[filled]
+        # Per bucket: the earlier extreme first, and only once if they coincide
+        low_first = low_times <= high_times
+        times = np.column_stack(
+            (
+                np.where(low_first, low_times, high_times),
+                np.where(low_first, high_times, low_times),
+            )
+        )
+        values = np.column_stack(
+            (np.where(low_first, lows, highs), np.where(low_first, highs, lows))
+        )
+        keep = np.ones(times.shape, dtype=bool)
+        keep[:, 1] = times[:, 1] != times[:, 0]
+        return times[keep], values[keep]
+
+
+def _first_per_group(mask: np.ndarray, group: np.ndarray) -> np.ndarray:
+    """Position of the first True in each group of a group-sorted mask"""
+    hits = np.flatnonzero(mask)
+    groups = group[hits]
+    return hits[np.r_[True, groups[1:] != groups[:-1]]]
+
+
+class LTTB(Downsampler):
+    """Largest-Triangle-Three-Buckets on the time grid
+
+    Keeps the first and last sample and, per non-empty bucket, the sample
+    forming the largest triangle with the previously kept sample and the
+    mean of the next non-empty bucket; at most buckets + 2 points. Chunks
+    must arrive in time order. A bucket is decided as soon as the bucket
+    after it is complete, so only about two buckets of samples are held.
+    """
+
+    def __init__(self, start_ms: int, end_ms: int, buckets: int):
+        super().__init__(start_ms, end_ms, buckets)
+        self._times = np.empty(0, dtype=np.int64)
+        self._values = np.empty(0)
+        self._index = np.empty(0, dtype=np.int64)
+        self._kept_times = []
+        self._kept_values = []
+        self._anchor: Optional[Tuple[float, float]] = None
+        self._last_time: Optional[int] = None
+
+    def add(self, timestamps, values) -> "LTTB":
+        timestamps, values, index = self._clean(timestamps, values)
+        if not index.size:
+            return self
+        if (self._last_time is not None and timestamps[0] < self._last_time) or (
+            timestamps.size > 1 and np.any(np.diff(timestamps) < 0)
+        ):
+            raise ValueError("LTTB chunks must arrive in time order")
+        self._last_time = int(timestamps[-1])
+
+        if self._anchor is None:
+            self._keep(timestamps[:1], values[:1])
+            timestamps, values, index = timestamps[1:], values[1:], index[1:]
+
+        self._times = np.concatenate((self._times, timestamps))
+        self._values = np.concatenate((self._values, values))
+        self._index = np.concatenate((self._index, index))
+        # The newest bucket may still grow and decides the one before it
+        self._select(final=False)
+        return self
+
+    def _keep(self, times: np.ndarray, values: np.ndarray):
+        self._kept_times.append(times)
+        self._kept_values.append(values)
+        self._anchor = (float(times[-1]), float(values[-1]))
+
+    def _select(self, final: bool):
+        index = self._index
+        if not index.size:
+            return
+        starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+        ends = np.r_[starts[1:], index.size]
+        # Buckets that can be decided now: all but the last two, or at the end
+        # every bucket, the last one against the final sample
+        decided = len(starts) if final else len(starts) - 2
+        if decided <= 0:
+            return
+
+        times = self._times.astype(np.float64)
+        values = self._values
+        chosen = np.empty(decided, dtype=np.int64)
+        anchor_time, anchor_value = self._anchor
+        for bucket in range(decided):
+            lo, hi = starts[bucket], ends[bucket]
+            if bucket + 1 < len(starts):
+                next_lo, next_hi = starts[bucket + 1], ends[bucket + 1]
+                target_time = times[next_lo:next_hi].mean()
+                target_value = values[next_lo:next_hi].mean()
+            else:
+                target_time, target_value = times[-1], values[-1]
+            areas = np.abs(
+                (anchor_time - target_time) * (values[lo:hi] - anchor_value)
+                - (anchor_time - times[lo:hi]) * (target_value - anchor_value)
+            )
+            best = lo + int(np.argmax(areas))
+            chosen[bucket] = best
+            anchor_time, anchor_value = times[best], values[best]
+
+        self._keep(self._times[chosen], values[chosen])
+        rest = ends[decided - 1]
+        self._times = self._times[rest:]
+        self._values = self._values[rest:]
+        self._index = self._index[rest:]
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._index.size:
+            last_time, last_value = self._times[-1:], self._values[-1:]
+            self._select(final=True)
+            if self._kept_times[-1][-1] != last_time[0]:
+                self._keep(last_time, last_value)
+        if not self._kept_times:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(self._kept_times), np.concatenate(self._kept_values)
+
+
+DOWNSAMPLERS = {"average": BucketAverage, "minmax": MinMaxEnvelope, "lttb": LTTB}
+
+
+def downsampler(method: str, start_ms: int, end_ms: int, buckets: int) -> Downsampler:
+    """Create the Downsampler for a method name ("average", "minmax", "lttb")"""
+    try:
+        cls = DOWNSAMPLERS[method.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown downsampling method: {method} (use {', '.join(METHODS)})"
+        ) from None
+    return cls(start_ms, end_ms, buckets)
+
+
+def downsample(
+    timestamps,
+    values,
+    buckets: int,
+    method: str = "lttb",
+    start_ms: Optional[int] = None,
+    end_ms: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a whole series at once
+
+    The grid spans start_ms..end_ms, by default the series' own first and
+    last timestamp.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if not timestamps.size:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    if start_ms is None:
+        start_ms = int(timestamps.min())
+    if end_ms is None:
+        end_ms = int(timestamps.max())
+    sampler = downsampler(method, start_ms, end_ms, buckets)
+    return sampler.add(timestamps, values).result()
@@ -0,0 +1,114 @@
+"""
+Harvia Endpoints Discovery
+Disk-cached copy of the https://prod.api.harvia.io/endpoints configuration.
+A fresh cache costs no network round trip, a stale one is served immediately
+while a background thread revalidates it, and a failed refresh falls back to
+the last good copy.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from harvia_transport import HarviaTransport
+
+ENDPOINTS_URL = "https://prod.api.harvia.io/endpoints"
+DEFAULT_ENDPOINTS_TTL = 24 * 3600
+
+
+def default_cache_dir() -> Path:
+    """Directory for on-disk Harvia client state (HARVIA_CACHE_DIR overrides)"""
+    override = os.getenv("HARVIA_CACHE_DIR")
+    if override:
+        return Path(override).expanduser()
+    base = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "harvia"
+
+
+class EndpointsCache:
+    """Endpoints configuration cached on disk with a TTL"""
+
+    def __init__(
+        self,
+        http: HarviaTransport,
+        path: Optional[Path] = None,
+        ttl: float = DEFAULT_ENDPOINTS_TTL,
+        url: str = ENDPOINTS_URL,
+    ):
+        self.http = http
+        self.path = Path(path) if path else default_cache_dir() / "endpoints.json"
+        self.ttl = ttl
+        self.url = url
+        self.source = None  # "cache", "stale" or "network" after load()
+        self._revalidating = threading.Lock()
+
+    def load(self) -> Dict[str, Any]:
+        """Get the endpoints, touching the network only when there is no cache"""
+        cached = self._read()
+        if cached is None:
+            return self.refresh()
+
+        if time.time() - cached["fetchedAt"] < self.ttl:
+            self.source = "cache"
+        else:
+            self.source = "stale"
+            self.revalidate_in_background()
+        return cached["endpoints"]
+
+    def refresh(self) -> Dict[str, Any]:
+        """Fetch the endpoints and rewrite the cache, falling back to a stale copy"""
+        try:
+            response = self.http.get(self.url, auth=False)
+            response.raise_for_status()
+            endpoints = response.json()["endpoints"]
+        except Exception:
+            cached = self._read()
+            if cached is None:
+                raise
+            self.source = "stale"
+            return cached["endpoints"]
+
+        self._write(endpoints)
+        self.source = "network"
+        return endpoints
+
+    def revalidate_in_background(self):
+        """Refresh the cache on a daemon thread unless a refresh is already running"""
+        if not self._revalidating.acquire(blocking=False):
+            return
+
+        def revalidate():
+            try:
+                self.refresh()
+            except Exception:
+                pass  # keep serving the stale copy; the next load retries
+            finally:
+                self._revalidating.release()
+
+        threading.Thread(
+            target=revalidate, name="harvia-endpoints", daemon=True
+        ).start()
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if "endpoints" not in cached or "fetchedAt" not in cached:
+            return None
+        return cached
+
+    def _write(self, endpoints: Dict[str, Any]):
+        """Atomically replace the cache file"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetchedAt": time.time(), "endpoints": endpoints}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # a read-only cache dir only costs us the discovery round trip
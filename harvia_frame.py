@@ -0,0 +1,226 @@
+"""
+Harvia Telemetry Frame
+Columnar, NumPy-backed view of measurement results: one contiguous int64
+epoch-ms timestamp array plus one float64 array per sensor field, with NaN
+where a sample has no value for that field. Frames are built straight from
+an item iterator, so paginated results never need to exist as a dict list.
+"""
+
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from harvia_history import measurement_data
+
+NAN = float("nan")
+
+
+class TelemetryFrame:
+    """Columnar telemetry: int64 timestamps and one float64 array per field"""
+
+    def __init__(self, timestamps: np.ndarray, fields: Dict[str, np.ndarray]):
+        order = None
+        if len(timestamps) > 1 and np.any(np.diff(timestamps) < 0):
+            order = np.argsort(timestamps, kind="stable")
+        self.timestamps = np.ascontiguousarray(
+            timestamps if order is None else timestamps[order], dtype=np.int64
+        )
+        self.fields = {
+            name: np.ascontiguousarray(
+                values if order is None else values[order], dtype=np.float64
+            )
+            for name, values in fields.items()
+        }
+
+    # ========== CONSTRUCTION ==========
+
+    @classmethod
+    def from_items(
+        cls, items: Iterable[Dict[str, Any]], sub_id: Optional[str] = None
+    ) -> "TelemetryFrame":
+        """Build a frame from measurement items, consuming them one at a time
+
+        Pass an iter_* generator to convert paginated results without
+        materializing them. sub_id keeps only that cabin's samples.
+        """
+        timestamps = array("q")
+        columns: Dict[str, array] = {}
+
+        for item in items:
+            if sub_id is not None and item.get("subId") != sub_id:
+                continue
+            row = len(timestamps)
+            timestamps.append(int(item["timestamp"]))
+
+            for name, value in measurement_data(item).items():
+                if isinstance(value, bool):
+                    value = float(value)
+                elif not isinstance(value, (int, float)):
+                    continue
+                column = columns.get(name)
+                if column is None:
+                    # Field first seen here: earlier rows had no value for it
+                    column = columns[name] = array("d", [NAN]) * row
+                column.append(value)
+
+            for column in columns.values():
+                if len(column) == row:
+                    column.append(NAN)
+
+        return cls(
+            np.frombuffer(timestamps, dtype=np.int64).copy(),
+            {
+                name: np.frombuffer(column, dtype=np.float64).copy()
+                for name, column in columns.items()
+            },
+        )
+
+    @classmethod
+    def from_telemetry_history(
+        cls, response: Dict[str, Any], sub_id: Optional[str] = None
+    ) -> "TelemetryFrame":
+        """Build a frame from a get_telemetry_history response"""
+        return cls.from_items(response.get("measurements") or [], sub_id)
+
+    @classmethod
+    def from_measurements_list(
+        cls, response: Dict[str, Any], sub_id: Optional[str] = None
+    ) -> "TelemetryFrame":
+        """Build a frame from a graphql_get_measurements_list response"""
+        result = (response.get("data") or {}).get("devicesMeasurementsList") or {}
+        return cls.from_items(result.get("measurementItems") or [], sub_id)
+
+    @classmethod
+    def concat(cls, frames: Iterable["TelemetryFrame"]) -> "TelemetryFrame":
+        """Join frames, filling fields missing from a frame with NaN"""
+        frames = list(frames)
+        names: List[str] = []
+        for frame in frames:
+            names.extend(name for name in frame.fields if name not in names)
+        timestamps = [frame.timestamps for frame in frames]
+        return cls(
+            np.concatenate(timestamps) if timestamps else np.empty(0, np.int64),
+            {
+                name: np.concatenate(
+                    [
+                        frame.fields.get(name, np.full(len(frame), np.nan))
+                        for frame in frames
+                    ]
+                )
+                for name in names
+            },
+        )
+
+    # ========== ACCESS ==========
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.fields[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.fields
+
+    def __repr__(self) -> str:
+        return f"TelemetryFrame({len(self)} rows, fields={list(self.fields)})"
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.fields)
+
+    def slice(
+        self, start_ms: Optional[int] = None, end_ms: Optional[int] = None
+    ) -> "TelemetryFrame":
+        """Rows with start_ms <= timestamp <= end_ms (views, no copies)"""
+        lo, hi = 0, len(self)
+        if start_ms is not None:
+            lo = np.searchsorted(self.timestamps, start_ms, "left")
+        if end_ms is not None:
+            hi = np.searchsorted(self.timestamps, end_ms, "right")
+        return self._take(slice(lo, hi))
+
+    def _take(self, index) -> "TelemetryFrame":
+        frame = TelemetryFrame.__new__(TelemetryFrame)
+        frame.timestamps = self.timestamps[index]
+        frame.fields = {name: values[index] for name, values in self.fields.items()}
+        return frame
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield rows as {"timestamp": ..., field: value} dicts, skipping NaN"""
+        names = list(self.fields)
+        for i, timestamp in enumerate(self.timestamps.tolist()):
+            row = {"timestamp": timestamp}
+            for name in names:
+                value = self.fields[name][i]
+                if not np.isnan(value):
+                    row[name] = float(value)
+            yield row
+
+    # ========== ANALYSIS ==========
+
+    def resample(self, bucket_ms: int, how: str = "mean") -> "TelemetryFrame":
+        """Aggregate into fixed time buckets ("mean", "min", "max", "sum", "count")
+
+        Empty buckets are left out; the result timestamps are bucket starts.
+        """
+        if not len(self):
+            return self._take(slice(0, 0))
+
+        buckets = self.timestamps // bucket_ms
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        fields = {
+            name: _reduce(values, starts, how) for name, values in self.fields.items()
+        }
+        return TelemetryFrame(buckets[starts] * bucket_ms, fields)
+
+    def downsample(
+        self,
+        name: str,
+        buckets: int,
+        method: str = "lttb",
+        start_ms: Optional[int] = None,
+        end_ms: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values) of one field reduced to about buckets points
+
+        method is "average", "minmax" or "lttb"; see harvia_downsample.
+        """
+        from harvia_downsample import downsample
+
+        return downsample(
+            self.timestamps, self.fields[name], buckets, method, start_ms, end_ms
+        )
+
+    def aggregate(self) -> Dict[str, Dict[str, float]]:
+        """Per-field count, min, max and mean over the whole frame"""
+        stats = {}
+        for name, values in self.fields.items():
+            valid = values[~np.isnan(values)]
+            stats[name] = {
+                "count": int(valid.size),
+                "min": float(valid.min()) if valid.size else NAN,
+                "max": float(valid.max()) if valid.size else NAN,
+                "mean": float(valid.mean()) if valid.size else NAN,
+            }
+        return stats
+
+
+def _reduce(values: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """NaN-aware reduction of contiguous row groups beginning at starts"""
+    missing = np.isnan(values)
+    counts = np.add.reduceat((~missing).astype(np.float64), starts)
+    if how == "count":
+        return counts
+    if how in ("mean", "sum"):
+        sums = np.add.reduceat(np.where(missing, 0.0, values), starts)
+        if how == "sum":
+            return sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+    if how == "min":
+        return np.fmin.reduceat(values, starts)
+    if how == "max":
+        return np.fmax.reduceat(values, starts)
+    raise ValueError(f"Unknown aggregation: {how}")
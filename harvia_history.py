@@ -0,0 +1,186 @@
+"""
+Harvia History Fetcher
+Splits long telemetry ranges into time windows, fetches the windows
+concurrently on a bounded worker pool and streams the merged result in
+timestamp order, dropping duplicates at window boundaries. The windows
+report nothing themselves; each fetch reports one step and one success
+through the client's reporter.
+"""
+
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+DEFAULT_WORKERS = 4
+DEFAULT_WINDOW_MS = 24 * 3600 * 1000
+
+Timestamp = Union[int, float, str, datetime]
+
+
+def to_epoch_ms(value: Timestamp) -> int:
+    """Convert epoch millis, an ISO8601 string or a datetime to epoch millis"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    if isinstance(value, (int, float)):
+        return int(value)
+    if value.isdigit():
+        return int(value)
+    return to_epoch_ms(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+
+def measurement_key(item: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Identity of a measurement for boundary de-duplication"""
+    return (item.get("timestamp"), item.get("subId"), item.get("type"))
+
+
+def measurement_data(item: Dict[str, Any]) -> Dict[str, Any]:
+    """The data object of a measurement item
+
+    GraphQL returns it as a JSON string (AWSJSON), REST as an object.
+    """
+    data = item.get("data")
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return {}
+    return data if isinstance(data, dict) else {}
+
+
+class HistoryFetcher:
+    """Parallel time-window sharding for telemetry history"""
+
+    def __init__(
+        self,
+        api,
+        workers: int = DEFAULT_WORKERS,
+        window_ms: int = DEFAULT_WINDOW_MS,
+    ):
+        self.api = api
+        self.workers = workers
+        self.window_ms = window_ms
+
+    def windows(self, start_ms: int, end_ms: int) -> List[Tuple[int, int]]:
+        """Split an inclusive [start, end] range into inclusive windows"""
+        windows = []
+        window_start = start_ms
+        while window_start <= end_ms:
+            window_end = min(window_start + self.window_ms - 1, end_ms)
+            windows.append((window_start, window_end))
+            window_start = window_end + 1
+        return windows
+
+    def iter_telemetry_history(
+        self,
+        device_id: str,
+        start_time: Timestamp,
+        end_time: Timestamp,
+        cabin_id: str = "C1",
+        sampling_mode: Optional[str] = None,
+        sample_amount: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield REST telemetry history for the range in timestamp order
+
+        Sampling options apply per window, so sample_amount is the number of
+        samples in each window rather than over the whole range.
+        """
+        return self._iter_sharded(
+            lambda start_ms, end_ms: self.api.iter_telemetry_history(
+                device_id,
+                str(start_ms),
+                str(end_ms),
+                cabin_id,
+                sampling_mode,
+                sample_amount,
+            ),
+            to_epoch_ms(start_time),
+            to_epoch_ms(end_time),
+            "get_telemetry_history",
+            "Getting Telemetry History for {device_id} in {windows} window(s)...",
+            "Telemetry history retrieved ({count} measurements)",
+            device_id=device_id,
+        )
+
+    def iter_measurements(
+        self,
+        device_id: str,
+        start_timestamp: Timestamp,
+        end_timestamp: Timestamp,
+        sampling_mode: str = "AVERAGE",
+        sample_amount: int = 100,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield GraphQL measurement items for the range in timestamp order
+
+        Sampling options apply per window, as for iter_telemetry_history.
+        """
+        return self._iter_sharded(
+            lambda start_ms, end_ms: self.api.iter_measurements(
+                device_id, str(start_ms), str(end_ms), sampling_mode, sample_amount
+            ),
+            to_epoch_ms(start_timestamp),
+            to_epoch_ms(end_timestamp),
+            "graphql_get_measurements_list",
+            "Getting Measurements List {device_id} in {windows} window(s) "
+            "(GraphQL)...",
+            "Retrieved {count} measurement(s) via GraphQL",
+            device_id=device_id,
+        )
+
+    def _iter_sharded(
+        self,
+        fetch_window: Callable[[int, int], Iterator[Dict[str, Any]]],
+        start_ms: int,
+        end_ms: int,
+        event: str,
+        step_message: str,
+        success_message: str,
+        **fields,
+    ) -> Iterator[Dict[str, Any]]:
+        """Fetch windows concurrently and yield them merged, in order"""
+
+        def fetch(window: Tuple[int, int]) -> List[Dict[str, Any]]:
+            with self.api.quiet():
+                items = list(fetch_window(*window))
+            items.sort(key=lambda item: int(item["timestamp"]))
+            return items
+
+        windows = deque(self.windows(start_ms, end_ms))
+        reporter = self.api.reporter
+        reporter.step(event, step_message, windows=len(windows), **fields)
+        count = 0
+        # Keep a bounded number of windows in flight so memory stays flat
+        max_in_flight = self.workers * 2
+        last_timestamp = None
+        last_keys = set()
+
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="harvia-history"
+        ) as executor:
+            in_flight = deque()
+            try:
+                while windows or in_flight:
+                    while windows and len(in_flight) < max_in_flight:
+                        in_flight.append(executor.submit(fetch, windows.popleft()))
+
+                    for item in in_flight.popleft().result():
+                        timestamp = int(item["timestamp"])
+                        key = measurement_key(item)
+                        if last_timestamp is not None and (
+                            timestamp < last_timestamp
+                            or (timestamp == last_timestamp and key in last_keys)
+                        ):
+                            continue
+                        if timestamp != last_timestamp:
+                            last_timestamp = timestamp
+                            last_keys = set()
+                        last_keys.add(key)
+                        count += 1
+                        yield item
+            finally:
+                for future in in_flight:
+                    future.cancel()
+        reporter.success(event, success_message, count=count, **fields)
@@ -0,0 +1,419 @@
+"""
+Harvia Metrics
+Per-endpoint request instrumentation for the shared transport: latency
+histograms split into connect, server and decode time, response sizes,
+item counts and status codes, labelled by service and by REST path or
+GraphQL operation name. Exported as Prometheus text from a small local HTTP
+endpoint and as a JSON snapshot. A transport without metrics skips all of it.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+ITEMS_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000)
+
+_OPERATION_NAME = re.compile(r"^\s*(?:query|mutation|subscription)\s+(\w+)")
+
+# ========== CONNECT TIMING ==========
+
+_connect_time = threading.local()
+
+
+def take_connect_time() -> float:
+    """Seconds this thread spent opening connections since the last call"""
+    elapsed = getattr(_connect_time, "seconds", 0.0)
+    _connect_time.seconds = 0.0
+    return elapsed
+
+
+class _TimedConnect:
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _connect_time.seconds = getattr(_connect_time, "seconds", 0.0) + (
+                time.perf_counter() - start
+            )
+
+
+class TimedHTTPConnection(_TimedConnect, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnect, HTTPSConnection):
+    """Connect time here includes the TLS handshake"""
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report their connect time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+# ========== RECORDING ==========
+
+
+def endpoint_label(url: str, json_body: Any = None) -> str:
+    """GraphQL operation name for GraphQL posts, otherwise the URL path"""
+    if isinstance(json_body, dict) and isinstance(json_body.get("query"), str):
+        match = _OPERATION_NAME.match(json_body["query"])
+        return match.group(1) if match else "anonymous"
+    return urlsplit(url).path or "/"
+
+
+def count_items(payload: Any) -> int:
+    """Number of items in a response
+
+    That is the length of the first list found near the top, or 1 for a
+    single record.
+    """
+    if isinstance(payload, list):
+        return len(payload)
+    if not isinstance(payload, dict):
+        return 0
+    if isinstance(payload.get("data"), dict):
+        payload = payload["data"]
+    for value in payload.values():
+        if isinstance(value, list):
+            return len(value)
+        if isinstance(value, dict):
+            for inner in value.values():
+                if isinstance(inner, list):
+                    return len(inner)
+            return 1
+    return 1 if payload else 0
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+
+class Metrics:
+    """Thread-safe request metrics keyed by (service, endpoint)"""
+
+    def __init__(self):
+        self.started = time.time()
+        self._latency: Dict[Tuple[str, str, str], _Histogram] = {}
+        self._bytes: Dict[Tuple[str, str], _Histogram] = {}
+        self._items: Dict[Tuple[str, str], _Histogram] = {}
+        self._statuses: Dict[Tuple[str, str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, table, key, buckets, value):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = _Histogram(buckets)
+        histogram.observe(value)
+
+    def record_response(
+        self,
+        service: str,
+        endpoint: str,
+        status: int,
+        total: Optional[float],
+        connect: float,
+        server: float,
+        size: Optional[int],
+    ):
+        """Record a response; total is None when it is only known later"""
+        with self._lock:
+            for phase, seconds in (
+                ("connect", connect),
+                ("server", server),
+                ("total", total),
+            ):
+                if seconds is None:
+                    continue
+                self._observe(
+                    self._latency, (service, endpoint, phase), LATENCY_BUCKETS, seconds
+                )
+            if size is not None:
+                self._observe(self._bytes, (service, endpoint), BYTES_BUCKETS, size)
+            key = (service, endpoint, str(status))
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def record_error(self, service: str, endpoint: str, error: BaseException):
+        with self._lock:
+            key = (service, endpoint, type(error).__name__)
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def record_decode(
+        self,
+        service: str,
+        endpoint: str,
+        seconds: float,
+        items: int,
+        total: Optional[float] = None,
+    ):
+        with self._lock:
+            if total is not None:
+                self._observe(
+                    self._latency, (service, endpoint, "total"), LATENCY_BUCKETS, total
+                )
+            self._observe(
+                self._latency, (service, endpoint, "decode"), LATENCY_BUCKETS, seconds
+            )
+            self._observe(self._items, (service, endpoint), ITEMS_BUCKETS, items)
+
+    def instrument(
+        self,
+        service: str,
+        endpoint: str,
+        response,
+        connect: float,
+        total: float,
+        streamed: bool = False,
+    ):
+        """Record a finished response and time its later .json() decode
+
+        server is the time from sending to parsed headers minus connecting;
+        total is the whole exchange including the body download. A streamed
+        response (stream=True) has only its headers when this runs, so its
+        total, decode time and items are recorded through the
+        response.stream_metrics hook once a JsonArrayStream has consumed the
+        whole body; a stream abandoned early records none of them.
+        """
+        elapsed = response.elapsed.total_seconds()
+        size = None
+        if response._content_consumed:
+            size = len(response.content or b"")
+        elif response.headers.get("Content-Length", "").isdigit():
+            size = int(response.headers["Content-Length"])
+        self.record_response(
+            service,
+            endpoint,
+            response.status_code,
+            None if streamed else total,
+            connect,
+            max(elapsed - connect, 0.0),
+            size,
+        )
+
+        if streamed:
+            headers_done = time.perf_counter()
+
+            def stream_metrics(decode_seconds: float, items: int):
+                body = time.perf_counter() - headers_done
+                self.record_decode(
+                    service, endpoint, decode_seconds, items, total=total + body
+                )
+
+            response.stream_metrics = stream_metrics
+            return response
+
+        decode = response.json
+
+        def json_with_metrics(**kwargs):
+            start = time.perf_counter()
+            data = decode(**kwargs)
+            self.record_decode(
+                service, endpoint, time.perf_counter() - start, count_items(data)
+            )
+            return data
+
+        response.json = json_with_metrics
+        return response
+
+    # ========== EXPORT ==========
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All metrics as plain JSON-serializable data"""
+
+        def histogram(h: _Histogram) -> Dict[str, Any]:
+            return {
+                "count": h.count,
+                "sum": h.sum,
+                "mean": h.sum / h.count if h.count else 0.0,
+                "buckets": dict(zip(map(str, h.buckets), h.cumulative())),
+            }
+
+        with self._lock:
+            endpoints: Dict[str, Dict[str, Any]] = {}
+
+            def entry(service, endpoint):
+                return endpoints.setdefault(
+                    f"{service} {endpoint}",
+                    {"service": service, "endpoint": endpoint, "latency": {}},
+                )
+
+            for (service, endpoint, phase), h in self._latency.items():
+                entry(service, endpoint)["latency"][phase] = histogram(h)
+            for (service, endpoint), h in self._bytes.items():
+                entry(service, endpoint)["response_bytes"] = histogram(h)
+            for (service, endpoint), h in self._items.items():
+                entry(service, endpoint)["items"] = histogram(h)
+            for (service, endpoint, status), count in self._statuses.items():
+                entry(service, endpoint).setdefault("statuses", {})[status] = count
+        return {"started": self.started, "endpoints": list(endpoints.values())}
+
+    def prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def labels(**values: str) -> str:
+            return "{" + ",".join(
+                f'{name}="{_escape(value)}"' for name, value in values.items()
+            ) + "}"
+
+        def histograms(name, help_text, table, label_names):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, h in sorted(table.items()):
+                values = dict(zip(label_names, key))
+                for bound, count in zip(h.buckets, h.cumulative()):
+                    lines.append(
+                        f"{name}_bucket{labels(**values, le=str(bound))} {count}"
+                    )
+                lines.append(f"{name}_bucket{labels(**values, le='+Inf')} {h.count}")
+                lines.append(f"{name}_sum{labels(**values)} {h.sum}")
+                lines.append(f"{name}_count{labels(**values)} {h.count}")
+
+        with self._lock:
+            histograms(
+                "harvia_request_duration_seconds",
+                "Request latency by phase (connect, server, decode, total)",
+                self._latency,
+                ("service", "endpoint", "phase"),
+            )
+            histograms(
+                "harvia_response_bytes",
+                "Response body size in bytes",
+                self._bytes,
+                ("service", "endpoint"),
+            )
+            histograms(
+                "harvia_response_items",
+                "Items in decoded responses",
+                self._items,
+                ("service", "endpoint"),
+            )
+            lines.append("# HELP harvia_responses_total Responses by status or error")
+            lines.append("# TYPE harvia_responses_total counter")
+            for (service, endpoint, status), count in sorted(self._statuses.items()):
+                lines.append(
+                    "harvia_responses_total"
+                    f"{labels(service=service, endpoint=endpoint, status=status)} "
+                    f"{count}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(label_value: str) -> str:
+    return (
+        label_value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving /metrics (Prometheus) and /metrics.json"""
+
+    def __init__(self, metrics: Metrics, port: int, host: str = "127.0.0.1"):
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                path = urlsplit(handler.path).path
+                if path == "/metrics":
+                    body = metrics.prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot()).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    handler.send_error(404)
+                    return
+                handler.send_response(200)
+                handler.send_header("Content-Type", content_type)
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="harvia-metrics", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def enable_from_env(transport) -> Optional[Metrics]:
+    """Turn on metrics when HARVIA_METRICS_PORT or HARVIA_METRICS_JSON is set
+
+    HARVIA_METRICS_PORT also starts the local exporter on that port.
+    """
+    port = os.getenv("HARVIA_METRICS_PORT")
+    if not port and not os.getenv("HARVIA_METRICS_JSON"):
+        return None
+    transport.metrics = Metrics()
+    if port:
+        MetricsServer(transport.metrics, int(port)).start()
+    return transport.metrics
+
+
+def write_snapshot_from_env(metrics: Optional[Metrics]):
+    """Write the JSON snapshot to HARVIA_METRICS_JSON, if set"""
+    path = os.getenv("HARVIA_METRICS_JSON")
+    if metrics is None or not path:
+        return
+    with open(os.path.expanduser(path), "w", encoding="utf-8") as f:
+        json.dump(metrics.snapshot(), f, indent=2)
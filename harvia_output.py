@@ -0,0 +1,185 @@
+"""
+Harvia Output
+Pluggable reporting for the Harvia clients. Library code emits events with
+a level, a name, a message template and structured fields; the reporter
+decides what becomes of them: nothing (the default), JSON lines for log
+collectors, or rich console output for the CLI front ends. Templates are
+only formatted by reporters that show them, and rich is only imported when
+a console reporter is built.
+"""
+
+import json
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, TextIO
+
+
+class Reporter:
+    """Discards every event; base class of the other reporters"""
+
+    enabled = False
+    console = None  # rich Console of reporters that render with rich
+
+    def emit(self, level: str, event: str, message: str, fields: Dict[str, Any]):
+        pass
+
+    def header(self, event: str, message: str, **fields):
+        if self.enabled:
+            self.emit("header", event, message, fields)
+
+    def step(self, event: str, message: str, **fields):
+        if self.enabled:
+            self.emit("step", event, message, fields)
+
+    def success(self, event: str, message: str, **fields):
+        if self.enabled:
+            self.emit("success", event, message, fields)
+
+    def info(self, event: str, message: str, **fields):
+        if self.enabled:
+            self.emit("info", event, message, fields)
+
+    def warning(self, event: str, message: str, **fields):
+        if self.enabled:
+            self.emit("warning", event, message, fields)
+
+    def error(self, event: str, message: str, **fields):
+        if self.enabled:
+            self.emit("error", event, message, fields)
+
+    def debug(self, event: str, message: str, **fields):
+        if self.enabled:
+            self.emit("debug", event, message, fields)
+
+    def data(self, event: str, title: str, payload: Any):
+        """A whole API result, e.g. for the demo's response panels"""
+        if self.enabled:
+            self.emit("data", event, title, {"data": payload})
+
+
+class ProgressFilter(Reporter):
+    """Passes every event but step and success on to another reporter
+
+    Used for the pages and windows of one user-level call, which reports a
+    single step and success itself; errors and warnings still get through.
+    """
+
+    def __init__(self, reporter: Reporter):
+        self.reporter = reporter
+        self.enabled = reporter.enabled
+        self.console = reporter.console
+
+    def emit(self, level: str, event: str, message: str, fields: Dict[str, Any]):
+        if level not in ("step", "success"):
+            self.reporter.emit(level, event, message, fields)
+
+
+def render(message: str, fields: Dict[str, Any]) -> str:
+    """Fill a message template, falling back to the raw template on a bad key"""
+    try:
+        return message.format(**fields)
+    except (KeyError, IndexError, ValueError):
+        return message
+
+
+class JsonLinesReporter(Reporter):
+    """One JSON object per event: time, level, event, message and fields"""
+
+    enabled = True
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, level: str, event: str, message: str, fields: Dict[str, Any]):
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level,
+            "event": event,
+            "message": render(message, fields),
+        }
+        record.update(fields)
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class RichReporter(Reporter):
+    """Console output for the CLI front ends
+
+    styles maps event names to a rich style that overrides the level's.
+    With timestamps, every line but headers and data starts with the time.
+    """
+
+    enabled = True
+
+    LEVEL_STYLES = {
+        "step": "bold cyan",
+        "info": "cyan",
+        "warning": "yellow",
+        "error": "red",
+        "debug": "dim",
+    }
+
+    def __init__(
+        self,
+        console=None,
+        styles: Optional[Dict[str, str]] = None,
+        timestamps: bool = False,
+        **console_options,
+    ):
+        if console is None:
+            from rich.console import Console
+
+            console = Console(**console_options)
+        self.console = console
+        self.styles = styles or {}
+        self.timestamps = timestamps
+        self._lock = threading.Lock()
+
+    def emit(self, level: str, event: str, message: str, fields: Dict[str, Any]):
+        from rich.text import Text
+
+        text = render(message, fields)
+        with self._lock:
+            if level == "header":
+                from rich.panel import Panel
+
+                title, _, body = text.partition("\n")
+                content = Text(title, style="bold blue")
+                if body:
+                    content.append("\n" + body)
+                self.console.print(Panel.fit(content, border_style="blue"))
+                return
+            if level == "data":
+                from rich.json import JSON
+                from rich.panel import Panel
+
+                self.console.print(
+                    Panel(JSON.from_data(fields["data"], default=str), title=text)
+                )
+                return
+
+            line = Text()
+            if level == "step":
+                line.append("\n")
+            if self.timestamps:
+                line.append(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] ")
+            if level == "success":
+                line.append("✓ ", style="green")
+            style = self.styles.get(event, self.LEVEL_STYLES.get(level))
+            line.append(text, style=style)
+            self.console.print(line)
+
+
+def reporter_from_env(default: str = "rich", **rich_options) -> Reporter:
+    """Build the reporter selected by HARVIA_OUTPUT (rich, json or quiet)"""
+    mode = os.getenv("HARVIA_OUTPUT", default).lower()
+    if mode == "quiet":
+        return Reporter()
+    if mode == "json":
+        return JsonLinesReporter()
+    return RichReporter(**rich_options)
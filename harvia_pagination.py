@@ -0,0 +1,80 @@
+"""
+Harvia Pagination
+Lazily follows nextToken across pages and yields items one at a time.
+The next page is fetched on a background thread while the caller works
+through the current one, so at most two pages are held in memory.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+
+def iter_pages(
+    fetch_page: Callable[[Optional[str]], Any],
+    extract: Callable[[Any], Tuple[List[Any], Optional[str]]],
+    prefetch: bool = True,
+) -> Iterator[Any]:
+    """Yield every item across all pages of a nextToken-paginated endpoint
+
+    fetch_page(next_token) returns one raw response (next_token is None for
+    the first page) and extract(response) splits it into (items, next_token).
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = fetch_page(None)
+        while True:
+            items, next_token = extract(page)
+            pending = None
+            if next_token and executor is not None:
+                pending = executor.submit(fetch_page, next_token)
+
+            # Drop our reference so the page can be freed while items are consumed
+            page = None
+            yield from items
+            items = None
+
+            if not next_token:
+                return
+            page = pending.result() if pending is not None else fetch_page(next_token)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def graphql_page(
+    field: str, items_key: str
+) -> Callable[[Any], Tuple[List[Any], Optional[str]]]:
+    """Build an extract() for a GraphQL list field such as devicesEventsList"""
+
+    def extract(response: Any) -> Tuple[List[Any], Optional[str]]:
+        result = (response.get("data") or {}).get(field) or {}
+        return result.get(items_key) or [], result.get("nextToken")
+
+    return extract
+
+
+def rest_page(items_key: str) -> Callable[[Any], Tuple[List[Any], Optional[str]]]:
+    """Build an extract() for a REST response such as telemetry-history"""
+
+    def extract(response: Any) -> Tuple[List[Any], Optional[str]]:
+        return response.get(items_key) or [], response.get("nextToken")
+
+    return extract
+
+
+def iter_streamed_pages(
+    fetch_stream: Callable[[Optional[str]], Any],
+    extract: Callable[[Any], Tuple[List[Any], Optional[str]]],
+) -> Iterator[Any]:
+    """Like iter_pages, for pages fetched as JsonArrayStreams
+
+    Items are yielded while each page downloads. A page's nextToken is only
+    known once its body has been read, so the next page is not prefetched.
+    """
+    next_token = None
+    while True:
+        stream = fetch_stream(next_token)
+        yield from stream
+        _, next_token = extract(stream.envelope)
+        if not next_token:
+            return
@@ -0,0 +1,102 @@
+"""
+Harvia Adaptive Polling
+Poll scheduler that stays at the fastest interval while a cabin is active
+(presence non-zero or recently changed) and backs off exponentially up to a
+cap while it is idle. Samples whose timestamp has not advanced are counted
+as stale so callers can skip the work for them, and the effective request
+rate is tracked so the API load can be compared with fixed-interval polling.
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_MIN_INTERVAL = 5.0
+DEFAULT_MAX_INTERVAL = 60.0
+DEFAULT_BACKOFF = 2.0
+DEFAULT_ACTIVE_HOLD = 120.0
+
+
+class AdaptivePoller:
+    """Exponential idle back-off for one polled series"""
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        backoff: float = DEFAULT_BACKOFF,
+        active_hold: float = DEFAULT_ACTIVE_HOLD,
+    ):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Need 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.active_hold = active_hold
+
+        self.interval = min_interval
+        self.last_value: Optional[Any] = None
+        self.last_sample_timestamp: Optional[Any] = None
+        self.last_active_time: Optional[float] = None
+
+        self.started = time.monotonic()
+        self.requests = 0
+        self.stale = 0
+        self.errors = 0
+
+    def record(self, value: Any, sample_timestamp: Any = None) -> bool:
+        """Account for one poll and pick the next interval
+
+        Returns False when the sample timestamp has not advanced since the
+        previous poll, meaning the caller can skip processing it.
+        """
+        now = time.monotonic()
+        self.requests += 1
+
+        fresh = (
+            sample_timestamp is None
+            or self.last_sample_timestamp is None
+            or sample_timestamp != self.last_sample_timestamp
+        )
+        if not fresh:
+            self.stale += 1
+        self.last_sample_timestamp = sample_timestamp
+
+        if fresh and (value != self.last_value or value):
+            self.last_active_time = now
+        self.last_value = value
+
+        if (
+            self.last_active_time is not None
+            and now - self.last_active_time < self.active_hold
+        ):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return fresh
+
+    def record_error(self):
+        """Account for a failed poll; back off as if the series were idle"""
+        self.requests += 1
+        self.errors += 1
+        self.interval = min(self.interval * self.backoff, self.max_interval)
+
+    def reset(self):
+        """Return to the fastest interval, e.g. after a user-visible change"""
+        self.interval = self.min_interval
+        self.last_active_time = time.monotonic()
+
+    @property
+    def requests_per_minute(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.requests * 60 / elapsed if elapsed > 0 else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Request counters and the effective vs. fixed-interval request rate"""
+        return {
+            "requests": self.requests,
+            "stale": self.stale,
+            "errors": self.errors,
+            "interval": self.interval,
+            "requests_per_minute": self.requests_per_minute,
+            "fixed_requests_per_minute": 60 / self.min_interval,
+        }
@@ -0,0 +1,227 @@
+"""
+Harvia Presence History
+Fixed-size ring buffer of (timestamp, presence) samples for one cabin, with
+rolling statistics over a recent time window: time-weighted moving average,
+share of time with motion, motion-event rate and longest still period.
+Samples live in preallocated arrays and the statistics are kept as running
+sums, so every update and query is amortized O(1) and memory is fixed by the
+capacity however long the monitor runs.
+"""
+
+import time
+from array import array
+from collections import deque
+from typing import Any, Dict, Optional
+
+DEFAULT_CAPACITY = 720  # one hour of samples at the fastest 5 s poll
+DEFAULT_WINDOW = 600.0  # seconds of history the statistics cover
+
+
+class PresenceHistory:
+    """Rolling presence statistics of one cabin
+
+    Each sample holds until the next one, so averages are time-weighted and
+    the adaptive poller's slower idle samples are not under-counted. A
+    motion event is a change from zero to non-zero presence; a still period
+    runs from one motion sample to the next motion event (or to now).
+    """
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, window: float = DEFAULT_WINDOW
+    ):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self.window = window
+
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._durations = array("d", bytes(8 * capacity))  # until the next sample
+        self._onsets = array("b", bytes(capacity))
+        self._start = 0
+        self._size = 0
+
+        # Running sums over the buffered samples
+        self._covered = 0.0
+        self._weighted = 0.0
+        self._active = 0.0
+        self._events = 0
+
+        self.last_motion_time: Optional[float] = None
+        # Still periods (start, end) with decreasing lengths: the front is the
+        # longest one still in the window (a sliding-window maximum)
+        self._still: deque = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ========== UPDATES ==========
+
+    def add(self, timestamp: float, value: float):
+        """Append a sample; timestamps must not go backwards"""
+        onset = False
+        if self._size:
+            newest = (self._start + self._size - 1) % self.capacity
+            previous = self._values[newest]
+            duration = max(timestamp - self._times[newest], 0.0)
+            self._durations[newest] = duration
+            self._covered += duration
+            self._weighted += previous * duration
+            if previous > 0:
+                self._active += duration
+            onset = previous == 0 and value > 0
+
+        if value > 0:
+            if onset and self.last_motion_time is not None:
+                self._push_still(self.last_motion_time, timestamp)
+            self.last_motion_time = timestamp
+
+        if self._size == self.capacity:
+            self._drop_oldest()
+        slot = (self._start + self._size) % self.capacity
+        self._times[slot] = timestamp
+        self._values[slot] = value
+        self._durations[slot] = 0.0
+        self._onsets[slot] = onset
+        self._size += 1
+        self._events += onset
+        self._expire(timestamp)
+
+    def _push_still(self, start: float, end: float):
+        length = end - start
+        while self._still and self._still[-1][1] - self._still[-1][0] <= length:
+            self._still.pop()
+        self._still.append((start, end))
+
+    def _drop_oldest(self):
+        oldest = self._start
+        duration = self._durations[oldest]
+        self._covered -= duration
+        self._weighted -= self._values[oldest] * duration
+        if self._values[oldest] > 0:
+            self._active -= duration
+        self._events -= self._onsets[oldest]
+        self._start = (oldest + 1) % self.capacity
+        self._size -= 1
+
+    def _expire(self, now: float):
+        """Drop samples whose hold ended before the window"""
+        horizon = now - self.window
+        while self._size > 1:
+            oldest = self._start
+            if self._times[oldest] + self._durations[oldest] > horizon:
+                break
+            self._drop_oldest()
+        horizon = self._horizon(now)
+        while self._still and self._still[0][1] <= horizon:
+            self._still.popleft()
+
+    def _horizon(self, now: float) -> float:
+        """Start of the span the statistics cover"""
+        if not self._size:
+            return now
+        return max(now - self.window, self._times[self._start])
+
+    # ========== STATISTICS ==========
+
+    def _totals(self, now: float):
+        """(covered, weighted, active) seconds over the window up to now
+
+        Adds the newest sample's hold until now and trims the part of the
+        oldest sample's hold that lies before the window.
+        """
+        newest = (self._start + self._size - 1) % self.capacity
+        hold = max(now - self._times[newest], 0.0)
+        value = self._values[newest]
+        covered = self._covered + hold
+        weighted = self._weighted + value * hold
+        active = self._active + (hold if value > 0 else 0.0)
+
+        oldest = self._start
+        early = min(now - self.window - self._times[oldest], self._durations[oldest])
+        if early > 0 and self._size > 1:
+            covered -= early
+            weighted -= self._values[oldest] * early
+            if self._values[oldest] > 0:
+                active -= early
+        return max(covered, 0.0), max(weighted, 0.0), max(active, 0.0)
+
+    def moving_average(self, now: Optional[float] = None) -> Optional[float]:
+        """Time-weighted mean presence over the window (smooths PIR noise)"""
+        if not self._size:
+            return None
+        now = time.time() if now is None else now
+        self._expire(now)
+        covered, weighted, _ = self._totals(now)
+        if covered <= 0:
+            return self._values[(self._start + self._size - 1) % self.capacity]
+        return weighted / covered
+
+    def activity(self, now: Optional[float] = None) -> Optional[float]:
+        """Share of the window with non-zero presence, 0.0 to 1.0"""
+        if not self._size:
+            return None
+        now = time.time() if now is None else now
+        self._expire(now)
+        covered, _, active = self._totals(now)
+        if covered <= 0:
+            newest = (self._start + self._size - 1) % self.capacity
+            return 1.0 if self._values[newest] > 0 else 0.0
+        return min(active / covered, 1.0)
+
+    def motion_events(self, now: Optional[float] = None) -> int:
+        """Motion events (zero to non-zero changes) within the window"""
+        if not self._size:
+            return 0
+        now = time.time() if now is None else now
+        self._expire(now)
+        events = self._events
+        if self._onsets[self._start] and self._times[self._start] < now - self.window:
+            events -= 1
+        return events
+
+    def event_rate(self, now: Optional[float] = None) -> float:
+        """Motion events per minute over the covered part of the window"""
+        now = time.time() if now is None else now
+        events = self.motion_events(now)
+        span = now - self._horizon(now)
+        return events * 60.0 / span if span > 0 else 0.0
+
+    def longest_still(self, now: Optional[float] = None) -> float:
+        """Longest still period within the window, in seconds"""
+        if not self._size:
+            return 0.0
+        now = time.time() if now is None else now
+        self._expire(now)
+        horizon = self._horizon(now)
+        longest = 0.0
+        if self._still:
+            # Only the oldest period can reach back past the horizon; the
+            # next one is the longest of the rest
+            start, end = self._still[0]
+            longest = end - max(start, horizon)
+            if len(self._still) > 1:
+                start, end = self._still[1]
+                longest = max(longest, end - start)
+
+        newest = (self._start + self._size - 1) % self.capacity
+        if self._values[newest] == 0:
+            still_since = self.last_motion_time
+            if still_since is None:
+                still_since = self._times[self._start]
+            longest = max(longest, now - max(still_since, horizon))
+        return max(longest, 0.0)
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """All rolling statistics, e.g. as structured report fields"""
+        now = time.time() if now is None else now
+        self._expire(now)
+        return {
+            "samples": self._size,
+            "window_seconds": now - self._horizon(now),
+            "moving_average": self.moving_average(now),
+            "activity": self.activity(now),
+            "motion_events": self.motion_events(now),
+            "events_per_minute": self.event_rate(now),
+            "longest_still_seconds": self.longest_still(now),
+        }
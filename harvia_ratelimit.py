@@ -0,0 +1,196 @@
+"""
+Harvia Rate Limiting
+Client-side token buckets, one per backend service, that pace requests
+before they are sent. Callers never fail on an empty bucket: each takes a
+reservation and waits its turn, so concurrent threads and tasks queue in
+arrival order. A file-backed bucket shares one budget between every local
+process (presence monitor, fleet sweeps, demo runs) through a file lock;
+it is opt-in, as each request then locks and rewrites the bucket file.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+# (requests per second, burst) per service, named as in the endpoints config
+DEFAULT_RATES: Dict[str, Tuple[float, float]] = {
+    "RestApi.generics": (2.0, 5),
+    "RestApi.device": (5.0, 10),
+    "RestApi.data": (10.0, 20),
+    "GraphQL.device": (5.0, 10),
+    "GraphQL.data": (10.0, 20),
+    "GraphQL.events": (5.0, 10),
+}
+
+
+class TokenBucket:
+    """In-process token bucket shared by threads and asyncio tasks"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens now and return how long to wait before using them
+
+        The balance may go negative; later callers then wait behind earlier
+        ones, which keeps the queue fair.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= tokens
+            return max(-self._tokens / self.rate, 0.0)
+
+
+class FileTokenBucket:
+    """Token bucket whose state lives in a file shared by local processes"""
+
+    def __init__(self, path: Path, rate: float, capacity: float):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.rate = rate
+        self.capacity = capacity
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take tokens from the shared budget; returns the wait in seconds"""
+        with self._thread_lock, self._locked():
+            now = time.time()
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    state = json.load(f)
+                balance = min(
+                    self.capacity,
+                    state["tokens"] + (now - state["updated"]) * self.rate,
+                )
+            except (OSError, ValueError, KeyError):
+                balance = self.capacity
+            balance -= tokens
+
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"tokens": balance, "updated": now}, f)
+            os.replace(tmp_path, self.path)
+            return max(-balance / self.rate, 0.0)
+
+
+class RateLimiter:
+    """Per-service request pacing with wait-time metrics
+
+    Services missing from rates are not limited. With shared_dir the
+    buckets are files, so every process using that directory shares them.
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        shared_dir: Optional[Path] = None,
+    ):
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+        self._buckets: Dict[str, object] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, rates: Optional[Dict[str, Tuple[float, float]]] = None):
+        """Limiter whose budget is shared by all local processes"""
+        # Imported here: harvia_endpoints depends on the transport, which
+        # depends on this module
+        from harvia_endpoints import default_cache_dir
+
+        return cls(rates, default_cache_dir() / "ratelimit")
+
+    @classmethod
+    def from_env(cls) -> Optional["RateLimiter"]:
+        """Build the limiter selected by HARVIA_RATE_LIMIT (local, shared, off)
+
+        The default is a per-process limiter; the file-backed shared budget
+        is opt-in, since it takes a file lock on every request.
+        """
+        mode = os.getenv("HARVIA_RATE_LIMIT", "local").lower()
+        if mode == "off":
+            return None
+        if mode == "shared":
+            return cls.shared()
+        return cls()
+
+    def _bucket(self, service: str):
+        bucket = self._buckets.get(service)
+        if bucket is None and service in self.rates:
+            with self._lock:
+                bucket = self._buckets.get(service)
+                if bucket is None:
+                    rate, capacity = self.rates[service]
+                    if self.shared_dir is not None:
+                        bucket = FileTokenBucket(
+                            self.shared_dir / f"{service}.json", rate, capacity
+                        )
+                    else:
+                        bucket = TokenBucket(rate, capacity)
+                    self._buckets[service] = bucket
+        return bucket
+
+    def _reserve(self, service: str) -> float:
+        bucket = self._bucket(service)
+        wait = bucket.reserve() if bucket is not None else 0.0
+        with self._lock:
+            stats = self._stats.setdefault(
+                service,
+                {"requests": 0, "delayed": 0, "wait_total": 0.0, "wait_max": 0.0},
+            )
+            stats["requests"] += 1
+            if wait > 0:
+                stats["delayed"] += 1
+                stats["wait_total"] += wait
+                stats["wait_max"] = max(stats["wait_max"], wait)
+        return wait
+
+    def acquire(self, service: str) -> float:
+        """Block until the service may be called; returns the time waited"""
+        wait = self._reserve(service)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, service: str) -> float:
+        """Like acquire, but waits without blocking the event loop"""
+        wait = self._reserve(service)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-service request count and time spent waiting for the bucket"""
+        with self._lock:
+            return {service: dict(stats) for service, stats in self._stats.items()}
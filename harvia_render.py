@@ -0,0 +1,371 @@
+"""
+Harvia Rendering
+Output for large API results in the CLI front ends. Arrays longer than a few
+rows are summarized instead of printed: item count, per-field count, min,
+max and mean, the first and last rows, and a fixed-width sparkline per
+numeric field. Summaries are built one item at a time, so streamed results
+are summarized without being held in memory and can be redrawn live while
+pages arrive. Full results can go to a raw JSON-lines file instead.
+"""
+
+import json
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from harvia_output import Reporter
+from harvia_stream import dumps
+
+SUMMARY_THRESHOLD = 10  # arrays longer than this are summarized
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+LIVE_REFRESH_SECONDS = 0.1
+
+
+# ========== SUMMARIES ==========
+
+
+def numeric_fields(item: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """(name, value) for every number in an item, nested names dotted
+
+    Objects one level down ("data") are included, also when they arrive as
+    JSON strings as in GraphQL measurement items. Booleans count as 0/1.
+    """
+    if not isinstance(item, dict):
+        return
+    for name, value in item.items():
+        if isinstance(value, bool):
+            yield prefix + name, float(value)
+        elif isinstance(value, (int, float)):
+            yield prefix + name, float(value)
+        elif prefix:
+            continue
+        elif isinstance(value, dict):
+            yield from numeric_fields(value, name + ".")
+        elif isinstance(value, str) and value.startswith("{"):
+            try:
+                nested = json.loads(value)
+            except ValueError:
+                continue
+            yield from numeric_fields(nested, name + ".")
+
+
+class Sparkline:
+    """Bucket means of an unbounded series in at most width buckets
+
+    When the buckets run out, neighbours are merged and each bucket covers
+    twice as many positions, so memory stays fixed however long the series.
+    """
+
+    __slots__ = ("width", "stride", "sums", "counts")
+
+    def __init__(self, width: int = 40):
+        self.width = width
+        self.stride = 1
+        self.sums: List[float] = []
+        self.counts: List[int] = []
+
+    def add(self, position: int, value: float):
+        bucket = position // self.stride
+        while bucket >= self.width:
+            self._halve()
+            bucket = position // self.stride
+        while len(self.sums) <= bucket:
+            self.sums.append(0.0)
+            self.counts.append(0)
+        self.sums[bucket] += value
+        self.counts[bucket] += 1
+
+    def _halve(self):
+        self.sums = [sum(self.sums[i : i + 2]) for i in range(0, len(self.sums), 2)]
+        self.counts = [
+            sum(self.counts[i : i + 2]) for i in range(0, len(self.counts), 2)
+        ]
+        self.stride *= 2
+
+    def render(self) -> str:
+        means = [
+            total / count if count else None
+            for total, count in zip(self.sums, self.counts)
+        ]
+        present = [mean for mean in means if mean is not None]
+        if not present:
+            return ""
+        low, high = min(present), max(present)
+        span = high - low
+        top = len(SPARK_BLOCKS) - 1
+        return "".join(
+            " "
+            if mean is None
+            else SPARK_BLOCKS[int((mean - low) / span * top) if span else top // 2]
+            for mean in means
+        )
+
+
+class FieldStats:
+    """Running count, min, max and mean of one numeric field"""
+
+    __slots__ = ("count", "min", "max", "total", "sparkline")
+
+    def __init__(self, width: int):
+        self.count = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.total = 0.0
+        self.sparkline = Sparkline(width)
+
+    def add(self, position: int, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.sparkline.add(position, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+
+class ArraySummary:
+    """Summary of an array built item by item
+
+    Keeps the first head and last tail items and FieldStats per numeric
+    field; everything else is dropped as soon as it has been counted.
+    """
+
+    def __init__(self, head: int = 3, tail: int = 3, width: int = 40):
+        self.count = 0
+        self.head: List[Any] = []
+        self.tail: deque = deque(maxlen=tail)
+        self.fields: Dict[str, FieldStats] = {}
+        self._head_size = head
+        self._width = width
+
+    def add(self, item: Any):
+        position = self.count
+        self.count += 1
+        if len(self.head) < self._head_size:
+            self.head.append(item)
+        else:
+            self.tail.append(item)
+        for name, value in numeric_fields(item):
+            stats = self.fields.get(name)
+            if stats is None:
+                stats = self.fields[name] = FieldStats(self._width)
+            stats.add(position, value)
+
+    def extend(self, items: Iterable[Any]) -> "ArraySummary":
+        for item in items:
+            self.add(item)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The summary as plain JSON-serializable data"""
+        return {
+            "count": self.count,
+            "fields": {
+                name: {
+                    "count": stats.count,
+                    "min": stats.min,
+                    "max": stats.max,
+                    "mean": stats.mean,
+                    "sparkline": stats.sparkline.render(),
+                }
+                for name, stats in self.fields.items()
+            },
+            "head": self.head,
+            "tail": list(self.tail),
+        }
+
+    def renderable(self, title: str):
+        """rich tables: field statistics with sparklines, then head/tail rows"""
+        from rich.console import Group
+        from rich.table import Table
+
+        stats_table = Table(title=f"{title} ({self.count} items)", title_justify="left")
+        stats_table.add_column("Field", style="cyan")
+        stats_table.add_column("Count", justify="right")
+        stats_table.add_column("Min", justify="right")
+        stats_table.add_column("Max", justify="right")
+        stats_table.add_column("Mean", justify="right")
+        stats_table.add_column("Trend", style="green", no_wrap=True)
+        for name, stats in self.fields.items():
+            stats_table.add_row(
+                name,
+                str(stats.count),
+                f"{stats.min:g}",
+                f"{stats.max:g}",
+                f"{stats.mean:.4g}",
+                stats.sparkline.render(),
+            )
+
+        columns = _row_columns(self.head)
+        rows_table = Table(show_edge=False, box=None, header_style="bold")
+        for column in columns:
+            rows_table.add_column(
+                column, overflow="ellipsis", no_wrap=True, max_width=32
+            )
+        tail = list(self.tail)
+        for item in self.head:
+            rows_table.add_row(*_cells(item, columns))
+        if tail and self.count > len(self.head) + len(tail):
+            rows_table.add_row(*(["…"] + [""] * (len(columns) - 1)), style="dim")
+        for item in tail:
+            rows_table.add_row(*_cells(item, columns))
+
+        parts = [stats_table] if self.fields else []
+        if columns:
+            parts.append(rows_table)
+        return Group(*parts)
+
+
+def _row_columns(items: List[Any], limit: int = 8) -> List[str]:
+    """Scalar top-level keys of the first items, in order, at most limit"""
+    columns: List[str] = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        for name, value in item.items():
+            if name not in columns and not isinstance(value, (dict, list)):
+                columns.append(name)
+    return columns[:limit]
+
+
+def _cells(item: Any, columns: List[str]) -> List[str]:
+    if not isinstance(item, dict):
+        return [str(item)] + [""] * (len(columns) - 1)
+    return ["" if item.get(c) is None else str(item.get(c)) for c in columns]
+
+
+def large_arrays(
+    payload: Any, threshold: int = SUMMARY_THRESHOLD, path: str = ""
+) -> Iterator[Tuple[str, List[Any]]]:
+    """(dotted path, list) for every list longer than threshold in payload"""
+    if isinstance(payload, dict):
+        for name, value in payload.items():
+            child = f"{path}.{name}" if path else name
+            yield from large_arrays(value, threshold, child)
+    elif isinstance(payload, list):
+        if len(payload) > threshold:
+            yield path, payload
+        else:
+            for i, value in enumerate(payload):
+                yield from large_arrays(value, threshold, f"{path}[{i}]")
+
+
+def summarize(payload: Any, threshold: int = SUMMARY_THRESHOLD) -> Any:
+    """payload with every list longer than threshold replaced by its summary"""
+    if isinstance(payload, dict):
+        return {name: summarize(value, threshold) for name, value in payload.items()}
+    if isinstance(payload, list):
+        if len(payload) > threshold:
+            return {"summary": ArraySummary().extend(payload).to_dict()}
+        return [summarize(value, threshold) for value in payload]
+    return payload
+
+
+def elide(payload: Any, threshold: int = SUMMARY_THRESHOLD) -> Any:
+    """payload with every list longer than threshold replaced by a note"""
+    if isinstance(payload, dict):
+        return {name: elide(value, threshold) for name, value in payload.items()}
+    if isinstance(payload, list):
+        if len(payload) > threshold:
+            return f"<{len(payload)} items, summarized below>"
+        return [elide(value, threshold) for value in payload]
+    return payload
+
+
+# ========== OUTPUT ==========
+
+
+def show(
+    reporter: Reporter,
+    event: str,
+    title: str,
+    payload: Any,
+    threshold: int = SUMMARY_THRESHOLD,
+):
+    """Report an API result with its large arrays summarized
+
+    On a console the rest of the result is printed as JSON and each large
+    array as summary tables; other reporters get the summarized data.
+    """
+    console = reporter.console
+    if console is None:
+        if reporter.enabled:
+            reporter.data(event, title, summarize(payload, threshold))
+        return
+    arrays = list(large_arrays(payload, threshold))
+    if not arrays:
+        reporter.data(event, title, payload)
+        return
+    reporter.data(event, title, elide(payload, threshold))
+    for path, items in arrays:
+        console.print(ArraySummary().extend(items).renderable(path))
+
+
+def show_stream(
+    reporter: Reporter, event: str, title: str, items: Iterable[Any]
+) -> ArraySummary:
+    """Summarize items as they arrive, redrawing a live view on a console
+
+    Consumes items; returns the final summary.
+    """
+    summary = ArraySummary()
+    console = reporter.console
+    if console is None:
+        summary.extend(items)
+        if reporter.enabled:
+            reporter.data(event, title, {"summary": summary.to_dict()})
+        return summary
+
+    from rich.live import Live
+
+    with Live(
+        summary.renderable(title), console=console, auto_refresh=False
+    ) as live:
+        last = time.monotonic()
+        for item in items:
+            summary.add(item)
+            now = time.monotonic()
+            if now - last >= LIVE_REFRESH_SECONDS:
+                live.update(summary.renderable(title), refresh=True)
+                last = now
+        live.update(summary.renderable(title), refresh=True)
+    return summary
+
+
+class RawWriter:
+    """Full results as compact JSON lines: {"event": ..., "data": ...}
+
+    Nothing is pretty-printed or summarized. Streamed items pass through
+    tee and are written one by one as the data array of a single line.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+
+    def write(self, event: str, payload: Any):
+        self._file.write(dumps({"event": event, "data": payload}) + b"\n")
+
+    def tee(self, event: str, items: Iterable[Any]) -> Iterator[Any]:
+        """Yield items unchanged while writing them"""
+        self._file.write(b'{"event":' + dumps(event) + b',"data":[')
+        try:
+            for i, item in enumerate(items):
+                if i:
+                    self._file.write(b",")
+                self._file.write(dumps(item))
+                yield item
+        finally:
+            self._file.write(b"]}\n")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> "RawWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,260 @@
+"""
+Harvia Resilience
+Retry and circuit-breaker layer under every transport request. Transient
+failures (connection errors, timeouts, 429/5xx answers) are retried with
+exponential backoff and full jitter, honouring Retry-After. Non-idempotent
+requests are only retried when the server provably did not process them.
+Each backend service gets a circuit breaker that fails fast while the
+service is down and lets a single probe through once it may have recovered.
+"""
+
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+DEFAULT_MAX_ATTEMPTS = 4
+DEFAULT_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+DEFAULT_MAX_RETRY_AFTER = 60.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The service's circuit is open, so the request was not sent"""
+
+
+def is_graphql_read(query: str) -> bool:
+    """True unless the GraphQL document is a mutation (or subscription)"""
+    body = re.sub(r"#[^\n]*", "", query).lstrip()
+    return not body.startswith(("mutation", "subscription"))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """How often and how long to wait before resending a request"""
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff: float = DEFAULT_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+        retry_statuses=RETRY_STATUSES,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given 0-based attempt"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def response_delay(
+        self, attempt: int, response: requests.Response
+    ) -> Optional[float]:
+        """Delay before retrying a response, or None if it should not be retried
+
+        A Retry-After header wins over backoff; one longer than
+        max_retry_after gives up so the caller sees the throttling answer.
+        """
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is None:
+            return self.backoff_delay(attempt)
+        if retry_after > self.max_retry_after:
+            return None
+        return retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one service"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started: Optional[float] = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may go out now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probe_started = None
+            if self.state == HALF_OPEN and (
+                self.probe_started is None
+                or now - self.probe_started >= self.reset_timeout
+            ):
+                self.probe_started = now  # this request is the probe
+                return
+            self.rejected += 1
+            retry_in = max(self.reset_timeout - (now - self.opened_at), 0)
+        raise CircuitOpenError(
+            f"Circuit for {self.name} is open after repeated failures; "
+            f"retrying in {retry_in:.0f}s"
+        )
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probe_started = None
+
+
+class Resilience:
+    """Retries with backoff plus one circuit breaker per backend service"""
+
+    def __init__(
+        self,
+        policy: Optional[RetryPolicy] = None,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout: float = DEFAULT_RESET_TIMEOUT,
+    ):
+        self.policy = policy or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.retries: Dict[str, int] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, service: str) -> CircuitBreaker:
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    service,
+                    CircuitBreaker(service, self.failure_threshold, self.reset_timeout),
+                )
+        return breaker
+
+    # ========== REQUESTS ==========
+
+    def call(
+        self,
+        service: str,
+        method: str,
+        send: Callable[[], requests.Response],
+        idempotent: Optional[bool] = None,
+    ) -> requests.Response:
+        """Run send() under the service's breaker, retrying transient failures
+
+        idempotent defaults to the HTTP method's semantics; pass True for
+        POSTs that only read (GraphQL queries).
+        """
+        breaker = self.breaker(service)
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            breaker.before_request()
+            last_attempt = attempt + 1 >= self.policy.max_attempts
+            try:
+                response = send()
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                breaker.record_failure()
+                # A connect timeout means the request never reached the server
+                safe = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+                if last_attempt or not safe:
+                    raise
+                delay = self.policy.backoff_delay(attempt)
+            else:
+                status = response.status_code
+                if status not in self.policy.retry_statuses:
+                    breaker.record_success()
+                    return response
+
+                # 429 means throttled, not down; it was not processed either
+                if status == 429:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
+                if last_attempt or not (idempotent or status == 429):
+                    return response
+                delay = self.policy.response_delay(attempt, response)
+                if delay is None:
+                    return response
+                response.close()
+
+            with self._lock:
+                self.retries[service] = self.retries.get(service, 0) + 1
+            time.sleep(delay)
+            attempt += 1
+
+    # ========== STATS ==========
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-service retry counts and circuit breaker state"""
+        services = set(self.retries) | set(self._breakers)
+        stats = {}
+        for service in sorted(services):
+            breaker = self._breakers.get(service)
+            stats[service] = {
+                "retries": self.retries.get(service, 0),
+                "state": breaker.state if breaker else CLOSED,
+                "consecutive_failures": breaker.failures if breaker else 0,
+                "times_opened": breaker.times_opened if breaker else 0,
+                "rejected": breaker.rejected if breaker else 0,
+            }
+        return stats
+
+    def summary(self) -> Tuple[int, int]:
+        """(total retries, number of services whose circuit is not closed)"""
+        retries = sum(self.retries.values())
+        open_circuits = sum(
+            1 for breaker in self._breakers.values() if breaker.state != CLOSED
+        )
+        return retries, open_circuits
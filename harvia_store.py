@@ -0,0 +1,454 @@
+"""
+Harvia Telemetry Store
+Local SQLite copy of raw device measurements with span-based sync.
+TelemetryStore mirrors HarviaAPI.get_telemetry_history and
+graphql_get_measurements_list. It downloads only the part of a range that
+is not stored yet and answers fully covered ranges locally, sampling them
+on the client when a sampling mode is requested. downsample_history and
+downsample_measurements serve any chart resolution from the stored raw
+data with the NumPy engine in harvia_downsample (analysis extra).
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from harvia_endpoints import default_cache_dir
+from harvia_history import HistoryFetcher, Timestamp, measurement_data, to_epoch_ms
+
+# Measurements newer than this may still be arriving upstream, so coverage
+# never extends past now - SETTLE_MS
+SETTLE_MS = 60 * 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    source TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    cabin_id TEXT NOT NULL,
+    sub_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (source, device_id, cabin_id, timestamp, sub_id, type)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS coverage_spans (
+    source TEXT NOT NULL,
+    device_id TEXT NOT NULL,
+    cabin_id TEXT NOT NULL,
+    start_ms INTEGER NOT NULL,
+    end_ms INTEGER NOT NULL,
+    PRIMARY KEY (source, device_id, cabin_id, start_ms)
+) WITHOUT ROWID;
+"""
+
+# REST history is per cabin; GraphQL measurements span every cabin of a device
+REST = "rest"
+GRAPHQL = "graphql"
+ALL_CABINS = "*"
+
+
+class TelemetryStore:
+    """Incrementally synced local telemetry history"""
+
+    def __init__(
+        self,
+        api,
+        path: Optional[Path] = None,
+        fetcher: Optional[HistoryFetcher] = None,
+    ):
+        self.api = api
+        self.path = Path(path) if path else default_cache_dir() / "telemetry.sqlite3"
+        self.fetcher = fetcher or HistoryFetcher(api)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Carry over coverage stored as a single span per series"""
+        if self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'coverage'"
+        ).fetchone():
+            with self._db:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO coverage_spans"
+                    " SELECT source, device_id, cabin_id, start_ms, watermark_ms"
+                    " FROM coverage"
+                )
+                self._db.execute("DROP TABLE coverage")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ========== COVERAGE ==========
+
+    def coverage(
+        self, source: str, device_id: str, cabin_id: str
+    ) -> List[Tuple[int, int]]:
+        """Get the stored (start_ms, end_ms) spans of a series in time order
+
+        Spans never overlap or touch: adjacent ones are merged when stored.
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT start_ms, end_ms FROM coverage_spans"
+                " WHERE source = ? AND device_id = ? AND cabin_id = ?"
+                " ORDER BY start_ms",
+                (source, device_id, cabin_id),
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def missing_spans(
+        self, source: str, device_id: str, cabin_id: str, start_ms: int, end_ms: int
+    ) -> List[Tuple[int, int]]:
+        """Work out which parts of [start_ms, end_ms] still need downloading
+
+        Only the gaps between stored spans that fall inside the request are
+        returned, so a request far from anything stored fetches just itself.
+        """
+        end_ms = min(end_ms, int(time.time() * 1000) - SETTLE_MS)
+        spans = []
+        position = start_ms  # first millisecond not known to be covered
+        for covered_start, covered_end in self.coverage(source, device_id, cabin_id):
+            if position > end_ms or covered_start > end_ms:
+                break
+            if covered_end < position:
+                continue
+            if covered_start > position:
+                spans.append((position, covered_start - 1))
+            position = covered_end + 1
+        if position <= end_ms:
+            spans.append((position, end_ms))
+        return spans
+
+    def _add_coverage(
+        self, source: str, device_id: str, cabin_id: str, start_ms: int, end_ms: int
+    ):
+        """Mark a span covered, merging it with stored spans it overlaps or touches"""
+        params = (source, device_id, cabin_id, start_ms - 1, end_ms + 1)
+        touching = (
+            " FROM coverage_spans"
+            " WHERE source = ? AND device_id = ? AND cabin_id = ?"
+            " AND end_ms >= ? AND start_ms <= ?"
+        )
+        for covered_start, covered_end in self._db.execute(
+            "SELECT start_ms, end_ms" + touching, params
+        ).fetchall():
+            start_ms = min(start_ms, covered_start)
+            end_ms = max(end_ms, covered_end)
+        self._db.execute("DELETE" + touching, params)
+        self._db.execute(
+            "INSERT INTO coverage_spans (source, device_id, cabin_id, start_ms, end_ms)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (source, device_id, cabin_id, start_ms, end_ms),
+        )
+
+    # ========== STORAGE ==========
+
+    def _store_span(
+        self,
+        source: str,
+        device_id: str,
+        cabin_id: str,
+        span: Tuple[int, int],
+        items: Iterable[Dict[str, Any]],
+        batch_size: int = 1000,
+    ):
+        """Insert a downloaded span and mark it covered once it is complete"""
+        sql = (
+            "INSERT OR REPLACE INTO measurements"
+            " (source, device_id, cabin_id, sub_id, timestamp, type, item)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)"
+        )
+        batch = []
+        for item in items:
+            batch.append(
+                (
+                    source,
+                    device_id,
+                    cabin_id,
+                    item.get("subId") or "",
+                    int(item["timestamp"]),
+                    item.get("type") or "",
+                    json.dumps(item, separators=(",", ":")),
+                )
+            )
+            if len(batch) >= batch_size:
+                with self._lock, self._db:
+                    self._db.executemany(sql, batch)
+                batch = []
+
+        with self._lock, self._db:
+            if batch:
+                self._db.executemany(sql, batch)
+            self._add_coverage(source, device_id, cabin_id, *span)
+
+    def query(
+        self, source: str, device_id: str, cabin_id: str, start_ms: int, end_ms: int
+    ) -> List[Dict[str, Any]]:
+        """Read stored measurements for a range in timestamp order"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT item FROM measurements"
+                " WHERE source = ? AND device_id = ? AND cabin_id = ?"
+                " AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                (source, device_id, cabin_id, start_ms, end_ms),
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    # ========== SYNC ==========
+
+    def sync_telemetry_history(
+        self,
+        device_id: str,
+        start_time: Timestamp,
+        end_time: Timestamp,
+        cabin_id: str = "C1",
+    ) -> int:
+        """Download the raw REST history not stored yet"""
+        start_ms, end_ms = to_epoch_ms(start_time), to_epoch_ms(end_time)
+        spans = self.missing_spans(REST, device_id, cabin_id, start_ms, end_ms)
+        for span in spans:
+            self._store_span(
+                REST,
+                device_id,
+                cabin_id,
+                span,
+                self.fetcher.iter_telemetry_history(device_id, *span, cabin_id),
+            )
+        return len(spans)
+
+    def sync_measurements(
+        self, device_id: str, start_timestamp: Timestamp, end_timestamp: Timestamp
+    ) -> int:
+        """Download the raw GraphQL measurements not stored yet"""
+        start_ms, end_ms = to_epoch_ms(start_timestamp), to_epoch_ms(end_timestamp)
+        spans = self.missing_spans(GRAPHQL, device_id, ALL_CABINS, start_ms, end_ms)
+        for span in spans:
+            self._store_span(
+                GRAPHQL,
+                device_id,
+                ALL_CABINS,
+                span,
+                self.fetcher.iter_measurements(
+                    device_id, *span, sampling_mode="NONE", sample_amount=None
+                ),
+            )
+        return len(spans)
+
+    # ========== HarviaAPI-COMPATIBLE READS ==========
+
+    def get_telemetry_history(
+        self,
+        device_id: str,
+        start_time: Timestamp,
+        end_time: Timestamp,
+        cabin_id: str = "C1",
+        sampling_mode: Optional[str] = None,
+        sample_amount: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Serve HarviaAPI.get_telemetry_history from the local store"""
+        start_ms, end_ms = to_epoch_ms(start_time), to_epoch_ms(end_time)
+        self.sync_telemetry_history(device_id, start_ms, end_ms, cabin_id)
+
+        items = self.query(REST, device_id, cabin_id, start_ms, end_ms)
+        if sampling_mode and sampling_mode.lower() != "none" and sample_amount:
+            items = sample_locally(
+                items, start_ms, end_ms, sampling_mode, sample_amount
+            )
+        return {"deviceId": device_id, "shadowName": cabin_id, "measurements": items}
+
+    def graphql_get_measurements_list(
+        self,
+        device_id: str,
+        start_timestamp: Timestamp,
+        end_timestamp: Timestamp,
+        sampling_mode: str = "AVERAGE",
+        sample_amount: int = 100,
+    ) -> Dict[str, Any]:
+        """Serve HarviaAPI.graphql_get_measurements_list from the local store"""
+        start_ms, end_ms = to_epoch_ms(start_timestamp), to_epoch_ms(end_timestamp)
+        self.sync_measurements(device_id, start_ms, end_ms)
+
+        items = self.query(GRAPHQL, device_id, ALL_CABINS, start_ms, end_ms)
+        if sampling_mode and sampling_mode.lower() != "none" and sample_amount:
+            items = sample_locally(
+                items, start_ms, end_ms, sampling_mode, sample_amount
+            )
+        return {
+            "data": {
+                "devicesMeasurementsList": {
+                    "measurementItems": items,
+                    "nextToken": None,
+                }
+            }
+        }
+
+    # ========== LOCAL DOWNSAMPLING ==========
+
+    def downsample_history(
+        self,
+        device_id: str,
+        start_time: Timestamp,
+        end_time: Timestamp,
+        field: str,
+        buckets: int,
+        method: str = "lttb",
+        cabin_id: str = "C1",
+    ):
+        """Sync the raw REST history once, then downsample one field locally
+
+        Returns (timestamps, values) NumPy arrays of about buckets points;
+        method is "average", "minmax" or "lttb". Zooming in or out again
+        only re-reads the store.
+        """
+        start_ms, end_ms = to_epoch_ms(start_time), to_epoch_ms(end_time)
+        self.sync_telemetry_history(device_id, start_ms, end_ms, cabin_id)
+        return self._downsample(
+            REST, device_id, cabin_id, start_ms, end_ms, field, buckets, method, None
+        )
+
+    def downsample_measurements(
+        self,
+        device_id: str,
+        start_timestamp: Timestamp,
+        end_timestamp: Timestamp,
+        field: str,
+        buckets: int,
+        method: str = "lttb",
+        sub_id: str = "C1",
+    ):
+        """downsample_history for the raw GraphQL measurements of one cabin"""
+        start_ms, end_ms = to_epoch_ms(start_timestamp), to_epoch_ms(end_timestamp)
+        self.sync_measurements(device_id, start_ms, end_ms)
+        return self._downsample(
+            GRAPHQL,
+            device_id,
+            ALL_CABINS,
+            start_ms,
+            end_ms,
+            field,
+            buckets,
+            method,
+            sub_id,
+        )
+
+    def iter_series(
+        self,
+        source: str,
+        device_id: str,
+        cabin_id: str,
+        start_ms: int,
+        end_ms: int,
+        field: str,
+        sub_id: Optional[str] = None,
+        chunk_size: int = 10000,
+    ):
+        """Yield (timestamps, values) NumPy chunks of one stored data field
+
+        SQLite extracts the field, so items are never decoded in Python.
+        Values are NaN where an item lacks the field.
+        """
+        import numpy as np
+
+        # data is an object in REST items and a JSON string in GraphQL items;
+        # the inner json_extract reads both
+        sql = (
+            "SELECT timestamp, CASE typeof(value) WHEN 'integer' THEN value"
+            " WHEN 'real' THEN value END FROM ("
+            " SELECT timestamp, sub_id,"
+            " json_extract(json_extract(item, '$.data'), ?) AS value"
+            " FROM measurements"
+            " WHERE source = ? AND device_id = ? AND cabin_id = ?"
+            " AND timestamp BETWEEN ? AND ?"
+        )
+        params = [f"$.{json.dumps(field)}", source, device_id, cabin_id]
+        params += [start_ms, end_ms]
+        if sub_id is not None:
+            sql += " AND sub_id = ?"
+            params.append(sub_id)
+        with self._lock:
+            cursor = self._db.execute(sql + ") ORDER BY timestamp", params)
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                chunk = np.array(rows, dtype=np.float64)
+                yield chunk[:, 0].astype(np.int64), chunk[:, 1]
+        finally:
+            cursor.close()
+
+    def _downsample(
+        self,
+        source: str,
+        device_id: str,
+        cabin_id: str,
+        start_ms: int,
+        end_ms: int,
+        field: str,
+        buckets: int,
+        method: str,
+        sub_id: Optional[str],
+    ):
+        from harvia_downsample import downsampler
+
+        sampler = downsampler(method, start_ms, end_ms, buckets)
+        return sampler.extend(
+            self.iter_series(
+                source, device_id, cabin_id, start_ms, end_ms, field, sub_id
+            )
+        ).result()
+
+
+def sample_locally(
+    items: List[Dict[str, Any]],
+    start_ms: int,
+    end_ms: int,
+    sampling_mode: str,
+    sample_amount: int,
+) -> List[Dict[str, Any]]:
+    """Reduce raw items to sample_amount time buckets
+
+    "average" averages the numeric data fields of each bucket (per cabin and
+    type); any other mode keeps the first item of each bucket.
+    """
+    bucket_ms = max((end_ms - start_ms + 1) / sample_amount, 1)
+    average = sampling_mode.lower() == "average"
+    buckets: Dict[Tuple[int, Any, Any], List[Dict[str, Any]]] = {}
+    for item in items:
+        index = int((int(item["timestamp"]) - start_ms) // bucket_ms)
+        key = (index, item.get("subId"), item.get("type"))
+        buckets.setdefault(key, []).append(item)
+
+    sampled = []
+    for bucket in buckets.values():
+        first = bucket[0]
+        if not average or len(bucket) == 1:
+            sampled.append(first)
+            continue
+
+        entries = [measurement_data(entry) for entry in bucket]
+        data = {}
+        for key, value in entries[0].items():
+            values = [
+                entry[key]
+                for entry in entries
+                if isinstance(entry.get(key), (int, float))
+            ]
+            data[key] = sum(values) / len(values) if values else value
+        if isinstance(first.get("data"), str):
+            data = json.dumps(data)
+        sampled.append(dict(first, data=data))
+
+    sampled.sort(key=lambda item: int(item["timestamp"]))
+    return sampled
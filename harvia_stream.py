@@ -0,0 +1,228 @@
+"""
+Harvia Streaming JSON
+Decodes the items of one large array in a response body (measurements,
+measurementItems, sessions, events) while the bytes arrive, instead of
+buffering the whole body and building the full object graph first. Only
+the items of roughly one chunk are held at a time; everything outside the
+array (nextToken, errors) is decoded once the body ends. Runs of complete
+items are decoded in one call to orjson when it is installed, otherwise to
+the standard library's C decoder. gzip is negotiated by requests and
+undone chunk by chunk.
+"""
+
+import json
+import re
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Give up splitting a chunk after this many separators that turned out to
+# be inside an item; the chunk is then decoded together with the next one
+MAX_SPLIT_ATTEMPTS = 3
+
+_WHITESPACE = b" \t\r\n"
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}:,]')
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON with the fastest available backend"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data: Any) -> bytes:
+    """Encode compact JSON with the fastest available backend"""
+    if orjson is not None:
+        return orjson.dumps(data, default=str)
+    return json.dumps(data, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def find_array_start(buffer: bytes, key: str) -> int:
+    """Offset just past the '[' opening the first array stored under key
+
+    Returns -1 if the buffer does not (yet) contain it.
+    """
+    target = json.dumps(key).encode("utf-8")
+    tokens = _TOKEN.finditer(buffer)
+    previous = None
+    for token in tokens:
+        text = token.group()
+        if text == b":" and previous == target:
+            following = next(tokens, None)
+            if following is not None and following.group() == b"[":
+                return following.end()
+        previous = text
+    return -1
+
+
+def _split_point(buffer: bytes, end: int) -> Tuple[int, int]:
+    """Positions around the last '},{' item separator before end
+
+    Returns (just past the '}', the '{') or (-1, -1). The separator may
+    still be inside an item; the caller checks by decoding.
+    """
+    comma = buffer.rfind(b",", 0, end)
+    while comma > 0:
+        before = comma - 1
+        while before >= 0 and buffer[before] in _WHITESPACE:
+            before -= 1
+        after = comma + 1
+        while after < len(buffer) and buffer[after] in _WHITESPACE:
+            after += 1
+        if (
+            before >= 0
+            and buffer[before] == 0x7D  # }
+            and after < len(buffer)
+            and buffer[after] == 0x7B  # {
+        ):
+            return before + 1, after
+        comma = buffer.rfind(b",", 0, comma)
+    return -1, -1
+
+
+def _find_container(document: Any, key: str) -> Optional[Dict[str, Any]]:
+    """The first object, in document order, holding a list under key"""
+    if isinstance(document, dict):
+        if isinstance(document.get(key), list):
+            return document
+        children = document.values()
+    elif isinstance(document, list):
+        children = document
+    else:
+        return None
+    for child in children:
+        container = _find_container(child, key)
+        if container is not None:
+            return container
+    return None
+
+
+class JsonArrayStream:
+    """Items of one JSON array in a streamed body, decoded as bytes arrive
+
+    Iterate once for the items. Afterwards envelope holds the rest of the
+    document with the array emptied, e.g. for its nextToken, item_count the
+    number of items and decode_seconds the time spent decoding. on_complete,
+    if given, is called with the envelope and on_decoded with
+    (decode_seconds, item_count); on_error with the exception if reading or
+    decoding the body fails.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[bytes],
+        items_key: str,
+        on_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+        close: Optional[Callable[[], None]] = None,
+        on_decoded: Optional[Callable[[float, int], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        self.items_key = items_key
+        self.envelope: Optional[Dict[str, Any]] = None
+        self.item_count = 0
+        self.decode_seconds = 0.0
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._on_decoded = on_decoded
+        self._on_error = on_error
+        self._close = close
+        self._started = False
+
+    @classmethod
+    def from_response(
+        cls,
+        response,
+        items_key: str,
+        on_complete: Optional[Callable[[Dict[str, Any]], None]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> "JsonArrayStream":
+        """Stream a requests response sent with stream=True
+
+        Reports to the response's stream_metrics hook, set by transport
+        metrics, once the body is fully decoded.
+        """
+        return cls(
+            response.iter_content(chunk_size),
+            items_key,
+            on_complete,
+            close=response.close,
+            on_decoded=getattr(response, "stream_metrics", None),
+            on_error=on_error,
+        )
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._started:
+            raise RuntimeError("A JsonArrayStream can only be iterated once")
+        self._started = True
+        try:
+            yield from self._decode()
+        except Exception as e:
+            if self._on_error is not None:
+                self._on_error(e)
+            raise
+        finally:
+            if self._close is not None:
+                self._close()
+
+    def _decode(self) -> Iterator[Any]:
+        prefix = None  # document up to and including the array's '['
+        buffer = b""
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            started = time.perf_counter()
+            buffer += chunk
+            if prefix is None:
+                start = find_array_start(buffer, self.items_key)
+                if start < 0:
+                    self.decode_seconds += time.perf_counter() - started
+                    continue
+                prefix, buffer = buffer[:start], buffer[start:]
+            items, buffer = self._complete_items(buffer)
+            self.decode_seconds += time.perf_counter() - started
+            self.item_count += len(items)
+            yield from items
+
+        # The rest: the last items, the closing ']' and what follows it
+        started = time.perf_counter()
+        document = loads(buffer if prefix is None else prefix + buffer)
+        container = _find_container(document, self.items_key)
+        items = []
+        if container is not None:
+            items = container[self.items_key]
+            container[self.items_key] = []
+        self.decode_seconds += time.perf_counter() - started
+        self.item_count += len(items)
+        yield from items
+        self.envelope = document
+        if self._on_decoded is not None:
+            self._on_decoded(self.decode_seconds, self.item_count)
+        if self._on_complete is not None:
+            self._on_complete(document)
+
+    def _complete_items(self, buffer: bytes) -> Tuple[List[Any], bytes]:
+        """Decode the complete items at the front of the buffer
+
+        buffer starts at an item boundary; returns the items and the rest.
+        """
+        end = len(buffer)
+        for _ in range(MAX_SPLIT_ATTEMPTS):
+            cut, next_item = _split_point(buffer, end)
+            if cut < 0:
+                break
+            try:
+                items = loads(b"[" + buffer[:cut] + b"]")
+            except ValueError:
+                end = cut - 1  # that separator was inside an item
+                continue
+            return items, buffer[next_item:]
+        return [], buffer
+
@@ -0,0 +1,261 @@
+"""
+Harvia GraphQL Subscriptions
+Client for the AppSync real-time WebSocket endpoint (graphql-ws protocol).
+Handles connection init, keep-alive timeouts, automatic reconnect with
+backoff and re-subscription, and reconnects with the new id token when the
+TokenManager rotates it. Requires the optional websocket-client package.
+"""
+
+import base64
+import json
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+try:
+    import websocket
+except ImportError:  # pragma: no cover - optional dependency
+    websocket = None
+
+DEFAULT_KEEPALIVE_TIMEOUT_MS = 300000
+
+MEASUREMENTS_FEED_SUBSCRIPTION = """
+subscription MeasurementsFeed($receiver: ID!) {
+  devicesMeasurementsUpdateFeed(receiver: $receiver) {
+    receiver
+    item {
+      deviceId
+      subId
+      timestamp
+      sessionId
+      type
+      data
+    }
+  }
+}
+"""
+
+
+class SubscriptionError(Exception):
+    """The server rejected the connection or the subscription"""
+
+
+def token_username(id_token: str) -> str:
+    """Read the cognito:username claim (the feed receiver) from an id token"""
+    payload = id_token.split(".")[1]
+    payload += "=" * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))["cognito:username"]
+
+
+def _encode(obj: Dict[str, Any]) -> str:
+    return base64.b64encode(json.dumps(obj).encode("utf-8")).decode("utf-8")
+
+
+class SubscriptionClient:
+    """One GraphQL subscription kept alive across reconnects"""
+
+    def __init__(
+        self,
+        https_url: str,
+        wss_url: str,
+        tokens,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        on_data: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_resume: Optional[Callable[[], None]] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0,
+        connect_timeout: float = 10.0,
+    ):
+        if websocket is None:
+            raise ImportError(
+                "GraphQL subscriptions need the websocket-client package "
+                "(pip install websocket-client)"
+            )
+        self.https_url = https_url
+        self.wss_url = wss_url
+        self.host = urlsplit(https_url).netloc
+        self.tokens = tokens
+        self.query = query
+        self.variables = variables or {}
+        self.on_data = on_data
+        self.on_error = on_error
+        self.on_resume = on_resume
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connect_timeout = connect_timeout
+
+        self.connections = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.subscribed = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ws = None
+
+    # ========== LIFECYCLE ==========
+
+    def start(self):
+        """Run the subscription on a daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run_forever, name="harvia-subscription", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Unsubscribe and close the connection"""
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def run_forever(self):
+        """Stay subscribed until stop(), reconnecting with exponential backoff"""
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            try:
+                self._run_connection()
+                delay = self.reconnect_delay
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                if self.on_error:
+                    self.on_error(e)
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    # ========== PROTOCOL ==========
+
+    def _authorization(self, id_token: str) -> Dict[str, str]:
+        return {"host": self.host, "Authorization": f"Bearer {id_token}"}
+
+    def _connection_url(self, id_token: str) -> str:
+        header = _encode(self._authorization(id_token))
+        return f"{self.wss_url}?header={header}&payload=e30="
+
+    def _recv(self, ws) -> Dict[str, Any]:
+        raw = ws.recv()
+        if not raw:
+            raise ConnectionError("Connection closed by server")
+        return json.loads(raw)
+
+    def _run_connection(self):
+        """Hold one connection until stop, token rotation or a server complete"""
+        id_token = self.tokens.ensure_fresh()
+        ws = websocket.create_connection(
+            self._connection_url(id_token),
+            subprotocols=["graphql-ws"],
+            timeout=self.connect_timeout,
+        )
+        self._ws = ws
+        subscription_id = str(uuid.uuid4())
+        try:
+            ws.send(json.dumps({"type": "connection_init"}))
+            message = self._recv(ws)
+            while message.get("type") == "ka":
+                message = self._recv(ws)
+            if message.get("type") != "connection_ack":
+                raise SubscriptionError(f"Connection refused: {message}")
+            keepalive_timeout = (
+                message.get("payload", {}).get(
+                    "connectionTimeoutMs", DEFAULT_KEEPALIVE_TIMEOUT_MS
+                )
+                / 1000
+            )
+
+            ws.send(
+                json.dumps(
+                    {
+                        "id": subscription_id,
+                        "type": "start",
+                        "payload": {
+                            "data": json.dumps(
+                                {"query": self.query, "variables": self.variables}
+                            ),
+                            "extensions": {
+                                "authorization": self._authorization(id_token)
+                            },
+                        },
+                    }
+                )
+            )
+
+            ws.settimeout(1.0)
+            last_seen = time.monotonic()
+            while not self._stop.is_set():
+                if self.tokens.ensure_fresh() != id_token:
+                    return  # token rotated: reconnect with the new one
+
+                try:
+                    message = self._recv(ws)
+                except websocket.WebSocketTimeoutException:
+                    if time.monotonic() - last_seen > keepalive_timeout:
+                        raise ConnectionError("Keep-alive timed out")
+                    continue
+                last_seen = time.monotonic()
+
+                message_type = message.get("type")
+                if message_type == "start_ack":
+                    self.connections += 1
+                    self.subscribed.set()
+                    if self.connections > 1:
+                        self.reconnects += 1
+                        if self.on_resume:
+                            self.on_resume()
+                elif message_type == "data":
+                    self.messages += 1
+                    if self.on_data:
+                        self.on_data(message.get("payload", {}).get("data") or {})
+                elif message_type in ("error", "connection_error"):
+                    raise SubscriptionError(f"Subscription error: {message}")
+                elif message_type == "complete":
+                    return
+        finally:
+            self.subscribed.clear()
+            self._ws = None
+            try:
+                if ws.connected:
+                    ws.send(json.dumps({"type": "stop", "id": subscription_id}))
+                ws.close()
+            except Exception:
+                pass
+
+
+def measurements_feed(
+    endpoints_config: Dict[str, Any],
+    tokens,
+    on_item: Callable[[Dict[str, Any]], None],
+    **kwargs,
+) -> SubscriptionClient:
+    """Subscribe to devicesMeasurementsUpdateFeed for the token's user
+
+    on_item gets each pushed measurement item with its data already decoded.
+    """
+
+    def on_data(data: Dict[str, Any]):
+        item = (data.get("devicesMeasurementsUpdateFeed") or {}).get("item")
+        if not item:
+            return
+        if isinstance(item.get("data"), str):
+            item["data"] = json.loads(item["data"])
+        on_item(item)
+
+    service = endpoints_config["GraphQL"]["data"]
+    return SubscriptionClient(
+        service["https"],
+        service["wss"],
+        tokens,
+        MEASUREMENTS_FEED_SUBSCRIPTION,
+        {"receiver": token_username(tokens.ensure_fresh())},
+        on_data=on_data,
+        **kwargs,
+    )
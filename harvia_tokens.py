@@ -0,0 +1,323 @@
+"""
+Harvia Token Store
+Persists id/access/refresh tokens between runs so new processes can skip
+the username/password exchange. The store is a JSON file keyed by username,
+guarded by an advisory file lock and readable only by its owner.
+TokenManager keeps the live token fresh for a shared transport.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from harvia_endpoints import default_cache_dir
+from harvia_transport import HarviaTransport
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no fcntl
+    fcntl = None
+
+# Treat an id token as expired this many seconds early
+EXPIRY_MARGIN = 300
+# Background refresh retries back off from the first delay up to the cap
+REFRESH_RETRY_INITIAL = 5
+REFRESH_RETRY_MAX = 300
+
+
+class TokenStore:
+    """File-locked, permission-restricted on-disk token cache"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_cache_dir() / "tokens.json"
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self):
+        """Hold an exclusive lock for a read-modify-write of the store"""
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _read_all(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_all(self, records: Dict[str, Dict[str, Any]]):
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, self.path)
+
+    def load(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get the stored tokens for a user"""
+        try:
+            with self._locked():
+                return self._read_all().get(username)
+        except OSError:
+            return None
+
+    def save(self, username: str, tokens: Dict[str, Any]):
+        """Store a user's tokens"""
+        try:
+            with self._locked():
+                records = self._read_all()
+                records[username] = tokens
+                self._write_all(records)
+        except OSError:
+            pass  # an unwritable store only costs a password login next run
+
+    def clear(self, username: str):
+        """Forget a user's tokens"""
+        try:
+            with self._locked():
+                records = self._read_all()
+                if records.pop(username, None) is not None:
+                    self._write_all(records)
+        except OSError:
+            pass
+
+
+def is_valid(tokens: Optional[Dict[str, Any]], margin: float = EXPIRY_MARGIN) -> bool:
+    """Check that a token record holds an id token that is not about to expire"""
+    return bool(
+        tokens
+        and tokens.get("idToken")
+        and tokens.get("expiresAt", 0) - margin > time.time()
+    )
+
+
+def is_rejected(error: Exception) -> bool:
+    """Check whether the auth API refused the request itself (a 4xx answer)"""
+    return (
+        isinstance(error, requests.HTTPError)
+        and error.response is not None
+        and 400 <= error.response.status_code < 500
+    )
+
+
+def password_login(
+    http: HarviaTransport, rest_api_base: str, username: str, password: str
+) -> Dict[str, Any]:
+    """Exchange username/password for a fresh token record"""
+    response = http.post(
+        f"{rest_api_base}/auth/token",
+        auth=False,
+        json={"username": username, "password": password},
+    )
+    response.raise_for_status()
+
+    tokens = response.json()
+    return {
+        "idToken": tokens["idToken"],
+        "accessToken": tokens["accessToken"],
+        "refreshToken": tokens["refreshToken"],
+        "expiresAt": time.time() + tokens["expiresIn"],
+    }
+
+
+def refresh_login(
+    http: HarviaTransport, rest_api_base: str, username: str, refresh_token: str
+) -> Dict[str, Any]:
+    """Exchange a refresh token for a new token record"""
+    response = http.post(
+        f"{rest_api_base}/auth/refresh",
+        auth=False,
+        json={"refreshToken": refresh_token, "email": username},
+    )
+    response.raise_for_status()
+
+    tokens = response.json()
+    return {
+        "idToken": tokens["idToken"],
+        "accessToken": tokens["accessToken"],
+        # /auth/refresh does not rotate the refresh token
+        "refreshToken": tokens.get("refreshToken", refresh_token),
+        "expiresAt": time.time() + tokens["expiresIn"],
+    }
+
+
+def load_or_authenticate(
+    http: HarviaTransport,
+    rest_api_base: str,
+    username: str,
+    password: str,
+    store: TokenStore,
+) -> Tuple[Dict[str, Any], str]:
+    """Get usable tokens as cheaply as possible
+
+    Tries the stored id token, then /auth/refresh with the stored refresh
+    token, and only then the password exchange. Returns the token record and
+    which of "stored", "refreshed" or "password" produced it.
+    """
+    tokens = store.load(username)
+    if is_valid(tokens):
+        return tokens, "stored"
+
+    if tokens and tokens.get("refreshToken"):
+        try:
+            tokens = refresh_login(
+                http, rest_api_base, username, tokens["refreshToken"]
+            )
+            store.save(username, tokens)
+            return tokens, "refreshed"
+        except Exception:
+            pass  # expired or revoked refresh token; fall back to the password
+
+    tokens = password_login(http, rest_api_base, username, password)
+    store.save(username, tokens)
+    return tokens, "password"
+
+
+class TokenManager:
+    """Keeps one id token fresh for every thread sharing a transport
+
+    Refreshes run on a background timer ahead of expiry. Callers that find the
+    token expired, or get a 401, all wait on a single in-flight refresh
+    instead of each calling /auth/refresh.
+    """
+
+    def __init__(
+        self,
+        http: HarviaTransport,
+        rest_api_base: str,
+        username: str,
+        password: str,
+        store: TokenStore,
+        refresh_margin: float = EXPIRY_MARGIN,
+    ):
+        self.http = http
+        self.rest_api_base = rest_api_base
+        self.username = username
+        self.password = password
+        self.store = store
+        self.refresh_margin = refresh_margin
+        self.tokens: Optional[Dict[str, Any]] = None
+        self.source = None
+        self.refresh_count = 0
+        self._failures = 0  # background refreshes failed in a row
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    @classmethod
+    def for_transport(
+        cls,
+        http: HarviaTransport,
+        rest_api_base: str,
+        username: str,
+        password: str,
+        store: TokenStore,
+    ) -> "TokenManager":
+        """Reuse the manager already driving a shared transport, or start one
+
+        A transport sends a single bearer token, so it can only be shared by
+        clients of one user: another user's client raises ValueError instead
+        of taking the transport over.
+        """
+        current = http.authenticator
+        if isinstance(current, cls) and current.username == username:
+            return current
+        if current is not None and getattr(current, "username", username) != username:
+            raise ValueError(
+                f"Transport is already authenticated as {current.username!r}; "
+                "give each user's client its own HarviaTransport"
+            )
+
+        manager = cls(http, rest_api_base, username, password, store)
+        manager.start()
+        if current is not None and hasattr(current, "stop"):
+            current.stop()  # so its timer stops writing tokens into the transport
+        http.authenticator = manager
+        return manager
+
+    def start(self):
+        """Load or obtain tokens and schedule the first background refresh"""
+        with self._lock:
+            tokens, self.source = load_or_authenticate(
+                self.http, self.rest_api_base, self.username, self.password, self.store
+            )
+            self._apply(tokens)
+
+    def stop(self):
+        """Cancel the background refresh"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _apply(self, tokens: Dict[str, Any]):
+        self.tokens = tokens
+        self._failures = 0
+        self.http.set_bearer_token(tokens["idToken"])
+        self._schedule(tokens["expiresAt"] - self.refresh_margin - time.time())
+
+    def _schedule(self, delay: float):
+        self.stop()
+        self._timer = threading.Timer(max(delay, 1), self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            if is_rejected(e):
+                # The password exchange was refused: retrying cannot help, and
+                # the next call that needs a token raises the error instead
+                return
+            # Transient failure: back off; callers still refresh inline meanwhile
+            self._failures += 1
+            delay = REFRESH_RETRY_INITIAL * 2 ** min(self._failures - 1, 16)
+            self._schedule(min(delay, REFRESH_RETRY_MAX))
+
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """Refresh the tokens once for all concurrent callers
+
+        When stale_token is given and another caller has already replaced it
+        while we waited for the lock, that newer token is returned as is.
+        """
+        with self._lock:
+            if stale_token is not None and self.tokens["idToken"] != stale_token:
+                return self.tokens["idToken"]
+
+            try:
+                tokens = refresh_login(
+                    self.http,
+                    self.rest_api_base,
+                    self.username,
+                    self.tokens["refreshToken"],
+                )
+            except Exception:
+                tokens = password_login(
+                    self.http, self.rest_api_base, self.username, self.password
+                )
+            self.store.save(self.username, tokens)
+            self.refresh_count += 1
+            self._apply(tokens)
+            return tokens["idToken"]
+
+    def ensure_fresh(self) -> str:
+        """Get an id token that is not about to expire"""
+        tokens = self.tokens
+        if is_valid(tokens, margin=0):
+            return tokens["idToken"]
+        return self.refresh(stale_token=tokens["idToken"])
+
+    def handle_unauthorized(self, rejected_token: Optional[str]) -> str:
+        """Get a replacement for a token the API answered 401 to"""
+        return self.refresh(stale_token=rejected_token)
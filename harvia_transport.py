@@ -0,0 +1,203 @@
+"""
+Harvia HTTP Transport
+Pooled keep-alive HTTP sessions shared by the Harvia API clients.
+One requests.Session per endpoint host, so repeated polls and sweeps
+reuse warm TCP+TLS connections instead of reconnecting on every call.
+Requests are paced by a per-service RateLimiter and run under a
+Resilience layer (retries and circuit breakers).
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from harvia_metrics import Metrics, TimedHTTPAdapter, endpoint_label, take_connect_time
+from harvia_ratelimit import RateLimiter
+from harvia_resilience import Resilience
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30
+
+
+class HarviaTransport:
+    """Pooled HTTP sessions keyed by endpoint host"""
+
+    def __init__(
+        self,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        resilience: Optional[Resilience] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.headers = {"Accept": "application/json"}
+        if headers:
+            self.headers.update(headers)
+        self.bearer_token = None
+        # Optional TokenManager-like object: ensure_fresh() / handle_unauthorized()
+        self.authenticator = None
+        # Retries and circuit breakers; set to None to send every request once
+        self.resilience = resilience if resilience is not None else Resilience()
+        # Client-side pacing per service; set to None to send unpaced
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        # Per-endpoint latency/size instrumentation; None (default) is off
+        self.metrics: Optional[Metrics] = None
+        self._services: Dict[str, str] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def set_bearer_token(self, token: Optional[str]):
+        """Set the token sent as 'Authorization: Bearer' on authenticated calls"""
+        self.bearer_token = token
+
+    def register_endpoints(self, endpoints_config: Dict[str, Any]):
+        """Name services after the endpoints config, e.g. "RestApi.data"
+
+        URLs that match no registered service are grouped by host.
+        """
+        for api in ("RestApi", "GraphQL"):
+            for service, urls in (endpoints_config.get(api) or {}).items():
+                url = (urls or {}).get("https")
+                if url:
+                    self._services[url.rstrip("/")] = f"{api}.{service}"
+
+    def service_for(self, url: str) -> str:
+        """Service name used for rate limits, retries and circuit breakers"""
+        best = None
+        for prefix in self._services:
+            if url.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self._services[best] if best else urlsplit(url).netloc
+
+    def session_for(self, url: str) -> requests.Session:
+        """Get (or create) the pooled session for the URL's host"""
+        parts = urlsplit(url)
+        key = f"{parts.scheme}://{parts.netloc}"
+
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = TimedHTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.pool_size
+                )
+                session.mount(f"{parts.scheme}://", adapter)
+                self._sessions[key] = session
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        auth: bool = True,
+        headers: Optional[Dict[str, str]] = None,
+        idempotent: Optional[bool] = None,
+        **kwargs,
+    ) -> requests.Response:
+        """Send a request over the host's pooled session
+
+        Authenticated requests get a fresh bearer token from the authenticator
+        and are retried exactly once with a new token if the API answers 401.
+        Transient failures are retried by the resilience layer; idempotent
+        overrides the method's default (pass True for read-only POSTs).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.session_for(url)
+        service = self.service_for(url)
+
+        def send() -> requests.Response:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(service)
+            token = None
+            if auth:
+                if self.authenticator is not None:
+                    token = self.authenticator.ensure_fresh()
+                else:
+                    token = self.bearer_token
+
+            request_headers = {}
+            if token:
+                request_headers["Authorization"] = f"Bearer {token}"
+            if headers:
+                request_headers.update(headers)
+
+            response = self._send(
+                session, service, method, url, request_headers, kwargs
+            )
+
+            if (
+                response.status_code == 401
+                and auth
+                and self.authenticator is not None
+            ):
+                response.close()
+                token = self.authenticator.handle_unauthorized(token)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(service)
+                request_headers["Authorization"] = f"Bearer {token}"
+                response = self._send(
+                    session, service, method, url, request_headers, kwargs
+                )
+            return response
+
+        if self.resilience is None:
+            return send()
+        return self.resilience.call(service, method, send, idempotent)
+
+    def _send(
+        self,
+        session: requests.Session,
+        service: str,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        kwargs: Dict[str, Any],
+    ) -> requests.Response:
+        """One HTTP exchange, recorded in metrics when they are enabled"""
+        metrics = self.metrics
+        if metrics is None:
+            return session.request(method, url, headers=headers, **kwargs)
+
+        endpoint = endpoint_label(url, kwargs.get("json"))
+        take_connect_time()
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, headers=headers, **kwargs)
+        except Exception as e:
+            metrics.record_error(service, endpoint, e)
+            raise
+        total = time.perf_counter() - start
+        return metrics.instrument(
+            service,
+            endpoint,
+            response,
+            take_connect_time(),
+            total,
+            streamed=kwargs.get("stream", False),
+        )
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def close(self):
+        """Close all pooled sessions"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
@@ -3,113 +3,237 @@
 Harvia Sauna Motion Monitor
 Polls the API and logs motion detection changes.
 Uses PIR sensor data - detects movement, not static presence.
+Watches every cabin of every device with one bounded worker pool.
 """
 
+import heapq
+import json
 import os
+import queue
 import time
-from datetime import datetime
-from typing import Optional
-
-import requests
-from dotenv import load_dotenv
-from rich.console import Console
-from rich.panel import Panel
-
-# Load environment variables
-load_dotenv()
-
-# Initialize Rich console
-console = Console()
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from harvia_batch import GraphQLBatch
+from harvia_endpoints import EndpointsCache
+from harvia_metrics import enable_from_env, write_snapshot_from_env
+from harvia_output import Reporter, reporter_from_env
+from harvia_pagination import iter_pages, rest_page
+from harvia_polling import DEFAULT_MAX_INTERVAL, AdaptivePoller
+from harvia_presence import DEFAULT_CAPACITY, DEFAULT_WINDOW, PresenceHistory
+from harvia_ratelimit import RateLimiter
+from harvia_resilience import is_graphql_read
+from harvia_tokens import TokenManager, TokenStore
+from harvia_transport import DEFAULT_POOL_SIZE, HarviaTransport
+
+# Console styles of the motion events, over the reporter's per-level defaults
+MOTION_STYLES = {
+    "motion_started": "bold green",
+    "motion_increasing": "green",
+}
+
+
+class CabinState:
+    """Motion timeline and poll schedule of one device cabin"""
+
+    __slots__ = (
+        "device_id",
+        "cabin_id",
+        "label",
+        "poller",
+        "history",
+        "last_motion_value",
+        "last_motion_time",
+        "last_nonzero_time",
+        "last_warning_time",
+        "last_error",
+        "failed_polls",
+    )
+
+    def __init__(
+        self,
+        device_id: str,
+        cabin_id: str,
+        poller: AdaptivePoller,
+        history: Optional[PresenceHistory] = None,
+    ):
+        self.device_id = device_id
+        self.cabin_id = cabin_id
+        self.label = f"{device_id}/{cabin_id}"
+        self.poller = poller
+        self.history = history or PresenceHistory()
+        self.last_motion_value = None
+        self.last_motion_time = None
+        self.last_nonzero_time = None
+        self.last_warning_time = None
+        self.last_error: Optional[str] = None  # set while polls keep failing
+        self.failed_polls = 0  # in a row
 
 
 class MotionMonitor:
-    """Monitor sauna motion detection (PIR sensor)"""
-
-    def __init__(self, username: str, password: str, poll_interval: int = 5):
+    """Monitor sauna motion detection (PIR sensor) across all devices"""
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        poll_interval: int = 5,
+        max_poll_interval: float = DEFAULT_MAX_INTERVAL,
+        concurrency: int = 8,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        transport: Optional[HarviaTransport] = None,
+        endpoints_cache: Optional[EndpointsCache] = None,
+        token_store: Optional[TokenStore] = None,
+        reporter: Optional[Reporter] = None,
+        activity_window: float = DEFAULT_WINDOW,
+    ):
         self.username = username
         self.password = password
         self.poll_interval = poll_interval
+        self.max_poll_interval = max(max_poll_interval, poll_interval)
+        self.concurrency = concurrency
+        # Seconds of presence history behind the activity statistics
+        self.activity_window = activity_window
+        self.http = transport or HarviaTransport(pool_size=pool_size)
+        self.endpoints_cache = endpoints_cache or EndpointsCache(self.http)
+        self.token_store = token_store or TokenStore()
+        # Motion changes and status events; the default reports nothing
+        self.reporter = reporter or Reporter()
         self.endpoints_config = None
-        self.id_token = None
-        self.token_expiry = None
-        self.device_id = None
-        self.last_motion_value = None
-        self.last_motion_time = None
-        self.last_nonzero_time = None
+        self.tokens: Optional[TokenManager] = None
+        self.cabins: List[CabinState] = []
+        self.warning_interval = 30  # Show warning every 30 seconds
 
-        # Fetch endpoints and authenticate
+        # Fetch endpoints, authenticate and find every cabin to watch
         self._fetch_endpoints()
         self._authenticate()
-        self._get_device_id()
+        self._discover_cabins()
 
     def _fetch_endpoints(self):
         """Fetch API endpoints configuration"""
-        response = requests.get("https://prod.api.harvia.io/endpoints")
-        response.raise_for_status()
-        self.endpoints_config = response.json()["endpoints"]
+        self.endpoints_config = self.endpoints_cache.load()
+        self.http.register_endpoints(self.endpoints_config)
 
     def _authenticate(self):
-        """Authenticate and get JWT tokens"""
+        """Authenticate and keep JWT tokens fresh in the background"""
         rest_api_base = self.endpoints_config["RestApi"]["generics"]["https"]
 
-        response = requests.post(
-            f"{rest_api_base}/auth/token",
-            headers={"Content-Type": "application/json"},
-            json={"username": self.username, "password": self.password},
+        self.tokens = TokenManager.for_transport(
+            self.http, rest_api_base, self.username, self.password, self.token_store
         )
-        response.raise_for_status()
 
-        tokens = response.json()
-        self.id_token = tokens["idToken"]
-        self.token_expiry = time.time() + tokens["expiresIn"]
+    def _graphql_request(
+        self, service: str, query: str, variables: Optional[Dict] = None
+    ):
+        """Make a GraphQL request"""
+        graphql_endpoint = self.endpoints_config["GraphQL"][service]["https"]
+
+        response = self.http.post(
+            graphql_endpoint,
+            json={"query": query, "variables": variables or {}},
+            idempotent=is_graphql_read(query),
+        )
+        response.raise_for_status()
+        return response.json()
 
-    def _refresh_token_if_needed(self):
-        """Refresh token if it's about to expire"""
-        if time.time() >= self.token_expiry - 300:  # Refresh 5 minutes before expiry
-            rest_api_base = self.endpoints_config["RestApi"]["generics"]["https"]
+    def _iter_device_ids(self):
+        """Yield the ID of every device of the user, across all pages"""
+        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
 
-            response = requests.post(
-                f"{rest_api_base}/auth/refresh",
-                headers={"Content-Type": "application/json"},
-                json={"refreshToken": self.refresh_token, "email": self.username},
-            )
+        def fetch_page(next_token):
+            params = {"maxResults": 50}
+            if next_token:
+                params["nextToken"] = next_token
+            response = self.http.get(f"{rest_api_base}/devices", params=params)
             response.raise_for_status()
+            return response.json()
 
-            tokens = response.json()
-            self.id_token = tokens["idToken"]
-            self.token_expiry = time.time() + tokens["expiresIn"]
+        for device in iter_pages(fetch_page, rest_page("devices")):
+            yield device["name"]
 
-    def _get_device_id(self):
-        """Get the first device ID"""
-        rest_api_base = self.endpoints_config["RestApi"]["device"]["https"]
-
-        response = requests.get(
-            f"{rest_api_base}/devices?maxResults=1",
-            headers={"Authorization": f"Bearer {self.id_token}"},
-        )
-        response.raise_for_status()
+    def _discover_cabins(self):
+        """Find every cabin with a PIR sensor on every device
 
-        devices = response.json().get("devices", [])
-        if not devices:
+        Cabins are read from the devices' latest measurements in batched
+        GraphQL requests; a device that reports no presence data yet is
+        watched on its default cabin C1.
+        """
+        device_ids = list(self._iter_device_ids())
+        if not device_ids:
             raise Exception("No devices found")
 
-        self.device_id = devices[0]["name"]
-        console.print(f"[cyan]Monitoring device: {self.device_id}[/cyan]")
+        batch = GraphQLBatch(self)
+        latest = {
+            device_id: batch.latest_measurements(device_id)
+            for device_id in device_ids
+        }
+        batch.execute()
+
+        for device_id, result in latest.items():
+            cabin_ids = []
+            for item in result.data or []:
+                data = item.get("data") or {}
+                if isinstance(data, str):
+                    data = json.loads(data)
+                if "presence" in data and item.get("subId") not in cabin_ids:
+                    cabin_ids.append(item.get("subId"))
+            for cabin_id in sorted(cabin_ids) or ["C1"]:
+                self.cabins.append(
+                    CabinState(
+                        device_id,
+                        cabin_id,
+                        AdaptivePoller(self.poll_interval, self.max_poll_interval),
+                        self._new_history(),
+                    )
+                )
+
+        self.reporter.info(
+            "cabins_discovered",
+            "Monitoring {cabins} cabin(s) on {devices} device(s)",
+            cabins=len(self.cabins),
+            devices=len(device_ids),
+        )
 
-    def get_motion_value(self) -> Optional[int]:
-        """Get current motion sensor value"""
-        self._refresh_token_if_needed()
+    def _new_history(self) -> PresenceHistory:
+        """Presence ring buffer big enough for the window at the fastest poll"""
+        capacity = int(self.activity_window / self.poll_interval) + 1
+        return PresenceHistory(max(capacity, DEFAULT_CAPACITY), self.activity_window)
 
+    def get_motion_sample(
+        self, cabin: CabinState
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """Get a cabin's current motion sensor value and the sample's timestamp"""
         rest_api_base = self.endpoints_config["RestApi"]["data"]["https"]
 
-        response = requests.get(
-            f"{rest_api_base}/data/latest-data?deviceId={self.device_id}&cabinId=C1",
-            headers={"Authorization": f"Bearer {self.id_token}"},
+        response = self.http.get(
+            f"{rest_api_base}/data/latest-data",
+            params={"deviceId": cabin.device_id, "cabinId": cabin.cabin_id},
         )
         response.raise_for_status()
 
         data = response.json()
-        return data.get("data", {}).get("presence")
+        return data.get("data", {}).get("presence"), data.get("timestamp")
+
+    def get_motion_value(self, cabin: CabinState) -> Optional[int]:
+        """Get a cabin's current motion sensor value"""
+        return self.get_motion_sample(cabin)[0]
+
+    def _report(
+        self, level: str, event: str, cabin: CabinState, message: str, **fields
+    ):
+        """Report a cabin event, naming the cabin when watching more than one"""
+        if not self.reporter.enabled:
+            return
+        if len(self.cabins) > 1:
+            message = "{cabin} " + message
+        getattr(self.reporter, level)(
+            event,
+            message,
+            cabin=cabin.label,
+            device_id=cabin.device_id,
+            cabin_id=cabin.cabin_id,
+            **fields,
+        )
 
     def format_time_since(self, seconds: float) -> str:
         """Format seconds into human-readable time"""
@@ -125,132 +249,460 @@ class MotionMonitor:
                 return f"{hours} hour{'s' if hours != 1 else ''} {minutes} minute{'s' if minutes != 1 else ''}"
             return f"{hours} hour{'s' if hours != 1 else ''}"
 
-    def log_motion_change(self, old_value: Optional[int], new_value: int):
-        """Log motion change with timestamp"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        current_time = time.time()
+    def activity_fields(self, cabin: CabinState, now: float) -> Dict[str, Any]:
+        """A cabin's rolling presence statistics as report fields"""
+        stats = cabin.history.stats(now)
+        return {
+            "activity": stats["activity"] or 0.0,
+            "moving_average": stats["moving_average"],
+            "motion_events": stats["motion_events"],
+            "events_per_minute": stats["events_per_minute"],
+            "longest_still": self.format_time_since(stats["longest_still_seconds"]),
+            "longest_still_seconds": round(stats["longest_still_seconds"]),
+            "window": self.format_time_since(stats["window_seconds"]),
+        }
+
+    def log_motion_change(
+        self,
+        cabin: CabinState,
+        old_value: Optional[int],
+        new_value: int,
+        current_time: Optional[float] = None,
+    ):
+        """Log a cabin's motion change"""
+        if current_time is None:
+            current_time = time.time()
+        # Time of the previous motion, before this sample updates it
+        last_nonzero_time = cabin.last_nonzero_time
 
         # Update last motion time if we detect motion
         if new_value > 0:
-            self.last_nonzero_time = current_time
+            cabin.last_nonzero_time = current_time
 
         if old_value is None:
             # Initial state
             if new_value == 0:
-                console.print(
-                    f"[{timestamp}] [yellow]Initial state: No motion detected[/yellow]"
+                self._report(
+                    "warning",
+                    "motion_initial",
+                    cabin,
+                    "Initial state: No motion detected",
+                    presence=new_value,
                 )
             else:
-                console.print(
-                    f"[{timestamp}] [yellow]Initial state: Motion detected ({new_value})[/yellow]"
+                self._report(
+                    "warning",
+                    "motion_initial",
+                    cabin,
+                    "Initial state: Motion detected ({presence})",
+                    presence=new_value,
                 )
-                self.last_nonzero_time = current_time
 
         elif old_value == 0 and new_value > 0:
             # Motion started
-            if self.last_nonzero_time and current_time - self.last_nonzero_time > 30:
-                time_since = self.format_time_since(current_time - self.last_nonzero_time)
-                console.print(
-                    f"[{timestamp}] [bold green]🚶 Motion detected ({new_value})[/bold green] - Last motion: {time_since} ago"
+            if last_nonzero_time and current_time - last_nonzero_time > 30:
+                idle = current_time - last_nonzero_time
+                self._report(
+                    "info",
+                    "motion_started",
+                    cabin,
+                    "🚶 Motion detected ({presence}) - Last motion: {since} ago",
+                    presence=new_value,
+                    since=self.format_time_since(idle),
+                    idle_seconds=round(idle),
+                    **self.activity_fields(cabin, current_time),
                 )
             else:
-                console.print(
-                    f"[{timestamp}] [bold green]🚶 Motion detected ({new_value})[/bold green]"
+                self._report(
+                    "info",
+                    "motion_started",
+                    cabin,
+                    "🚶 Motion detected ({presence})",
+                    presence=new_value,
+                    **self.activity_fields(cabin, current_time),
                 )
 
         elif old_value > 0 and new_value == 0:
             # Motion stopped
-            if self.last_nonzero_time:
-                console.print(
-                    f"[{timestamp}] [yellow]⚠️  No motion detected[/yellow] - Person may still be present but sitting still"
+            if last_nonzero_time:
+                self._report(
+                    "warning",
+                    "motion_stopped",
+                    cabin,
+                    "⚠️  No motion detected - "
+                    "Person may still be present but sitting still "
+                    "({activity:.0%} active in the last {window})",
+                    presence=new_value,
+                    **self.activity_fields(cabin, current_time),
                 )
 
         elif old_value > 0 and new_value > 0:
             # Motion value changed
             if new_value > old_value:
-                console.print(
-                    f"[{timestamp}] [green]Movement increasing ({old_value} → {new_value})[/green]"
+                self._report(
+                    "info",
+                    "motion_increasing",
+                    cabin,
+                    "Movement increasing ({previous} → {presence})",
+                    previous=old_value,
+                    presence=new_value,
                 )
             else:
-                console.print(
-                    f"[{timestamp}] [cyan]Movement decreasing ({old_value} → {new_value})[/cyan]"
+                self._report(
+                    "info",
+                    "motion_decreasing",
+                    cabin,
+                    "Movement decreasing ({previous} → {presence})",
+                    previous=old_value,
+                    presence=new_value,
                 )
 
-    def monitor(self):
-        """Main monitoring loop"""
-        console.print(
-            Panel.fit(
-                "[bold blue]Harvia Sauna Motion Monitor[/bold blue]\n"
-                f"PIR sensor - detects movement, not static presence\n"
-                f"Polling every {self.poll_interval} seconds",
-                border_style="blue",
+    def handle_motion_value(
+        self, cabin: CabinState, motion_value: Optional[int], new_sample: bool = True
+    ):
+        """Log a cabin's motion sample, or a periodic reminder if nothing changed
+
+        new_sample is False when re-checking the reminder with the last value,
+        which then is not recorded in the presence history again.
+        """
+        current_time = time.time()
+        if new_sample and motion_value is not None:
+            cabin.history.add(current_time, motion_value)
+
+        if motion_value != cabin.last_motion_value:
+            self.log_motion_change(
+                cabin, cabin.last_motion_value, motion_value, current_time
+            )
+            cabin.last_motion_value = motion_value
+            cabin.last_motion_time = current_time
+            cabin.last_warning_time = None  # Reset warning timer on any change
+
+        # Periodic status update when no motion for a while
+        elif (
+            motion_value == 0
+            and cabin.last_nonzero_time
+            and current_time - cabin.last_nonzero_time >= self.warning_interval
+        ):
+            if (
+                cabin.last_warning_time is None
+                or current_time - cabin.last_warning_time >= self.warning_interval
+            ):
+                idle = current_time - cabin.last_nonzero_time
+                self._report(
+                    "debug",
+                    "motion_reminder",
+                    cabin,
+                    "Last motion: {since} ago - {activity:.0%} active, "
+                    "{motion_events} motion event(s), longest still "
+                    "{longest_still} in the last {window}",
+                    since=self.format_time_since(idle),
+                    idle_seconds=round(idle),
+                    **self.activity_fields(cabin, current_time),
+                )
+                cabin.last_warning_time = current_time
+
+    def handle_motion_sample(
+        self,
+        cabin: CabinState,
+        motion_value: Optional[int],
+        sample_timestamp: Optional[int],
+    ):
+        """Feed a polled sample through the cabin's scheduler and timeline"""
+        fresh = cabin.poller.record(motion_value, sample_timestamp)
+        if fresh and motion_value is not None:
+            self.handle_motion_value(cabin, motion_value)
+        elif cabin.last_motion_value is not None:
+            # Same sample as last time, or one without a presence reading:
+            # only the reminder can be due
+            self.handle_motion_value(cabin, cabin.last_motion_value, False)
+
+    def handle_poll_error(self, cabin: CabinState, error: Exception):
+        """Record a failed poll, reporting it when the cabin's error changes"""
+        message = str(error) or type(error).__name__
+        cabin.failed_polls += 1
+        if message != cabin.last_error:
+            self._report("error", "poll_error", cabin, "Error: {error}", error=message)
+            cabin.last_error = message
+
+    def handle_poll_success(self, cabin: CabinState):
+        """Record a successful poll, reporting the end of a run of failures"""
+        if cabin.last_error is not None:
+            self._report(
+                "info",
+                "poll_recovered",
+                cabin,
+                "Polling recovered after {failed_polls} failed poll(s)",
+                failed_polls=cabin.failed_polls,
             )
+        cabin.last_error = None
+        cabin.failed_polls = 0
+
+    def print_cabin_errors(self):
+        """Report every cabin whose polls are still failing"""
+        for cabin in self.cabins:
+            if cabin.last_error is not None:
+                self._report(
+                    "warning",
+                    "poll_failing",
+                    cabin,
+                    "Still failing after {failed_polls} poll(s): {error}",
+                    failed_polls=cabin.failed_polls,
+                    error=cabin.last_error,
+                )
+
+    def print_poll_stats(self):
+        """Report the effective request rate against fixed-interval polling"""
+        stats = [cabin.poller.stats() for cabin in self.cabins]
+        requests_per_minute = sum(s["requests_per_minute"] for s in stats)
+        fixed_per_minute = sum(s["fixed_requests_per_minute"] for s in stats)
+        self.reporter.debug(
+            "poll_stats",
+            "Polled {requests} times ({requests_per_minute:.1f}/min vs "
+            "{fixed_requests_per_minute:.1f}/min fixed), {stale} unchanged samples "
+            "skipped, {errors} errors",
+            requests=sum(s["requests"] for s in stats),
+            requests_per_minute=requests_per_minute,
+            fixed_requests_per_minute=fixed_per_minute,
+            stale=sum(s["stale"] for s in stats),
+            errors=sum(s["errors"] for s in stats),
         )
+        if self.http.resilience is not None:
+            retries, open_circuits = self.http.resilience.summary()
+            self.reporter.debug(
+                "resilience_stats",
+                "{retries} transient failures retried, {open_circuits} circuit(s) open",
+                retries=retries,
+                open_circuits=open_circuits,
+            )
+        if self.http.rate_limiter is not None:
+            limits = self.http.rate_limiter.stats().values()
+            self.reporter.debug(
+                "rate_limit_stats",
+                "{delayed} requests paced by the rate limiter, "
+                "{wait_total:.1f}s waited in total",
+                delayed=sum(s["delayed"] for s in limits),
+                wait_total=sum(s["wait_total"] for s in limits),
+            )
 
-        last_warning_time = None
-        warning_interval = 30  # Show warning every 30 seconds
+    def monitor(self):
+        """Main monitoring loop
+
+        Each cabin is polled every poll_interval seconds while it has motion
+        (or it changed recently) and backs off to max_poll_interval while
+        idle. One heap orders the cabins by next poll time and at most
+        `concurrency` requests are in flight; results are handled on this
+        thread, so logging stays single-threaded.
+        """
+        self.reporter.header(
+            "monitor_started",
+            "Harvia Sauna Motion Monitor\n"
+            "PIR sensor - detects movement, not static presence\n"
+            "Polling {cabins} cabin(s) every {min_interval:g}-{max_interval:g} "
+            "seconds (adaptive)",
+            mode="poll",
+            cabins=len(self.cabins),
+            min_interval=self.poll_interval,
+            max_interval=self.max_poll_interval,
+        )
 
-        while True:
-            try:
-                motion_value = self.get_motion_value()
-                current_time = time.time()
-
-                if motion_value != self.last_motion_value:
-                    self.log_motion_change(self.last_motion_value, motion_value)
-                    self.last_motion_value = motion_value
-                    last_warning_time = None  # Reset warning timer on any change
-
-                # Periodic status update when no motion for a while
-                elif (
-                    motion_value == 0
-                    and self.last_nonzero_time
-                    and current_time - self.last_nonzero_time >= warning_interval
+        schedule = [(0.0, index) for index in range(len(self.cabins))]
+        executor = ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="harvia-monitor"
+        )
+        in_flight = {}
+        try:
+            while True:
+                now = time.monotonic()
+                while (
+                    schedule
+                    and schedule[0][0] <= now
+                    and len(in_flight) < self.concurrency
                 ):
-                    if (
-                        last_warning_time is None
-                        or current_time - last_warning_time >= warning_interval
-                    ):
-                        time_since = self.format_time_since(
-                            current_time - self.last_nonzero_time
-                        )
-                        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                        console.print(
-                            f"[{timestamp}] [dim]Last motion: {time_since} ago[/dim]"
-                        )
-                        last_warning_time = current_time
-
-                time.sleep(self.poll_interval)
-
-            except KeyboardInterrupt:
-                console.print("\n[yellow]Monitoring stopped by user[/yellow]")
-                break
+                    _, index = heapq.heappop(schedule)
+                    future = executor.submit(self.get_motion_sample, self.cabins[index])
+                    in_flight[future] = index
+
+                timeout = None
+                if schedule and len(in_flight) < self.concurrency:
+                    timeout = max(schedule[0][0] - now, 0)
+                if not in_flight:
+                    time.sleep(timeout)
+                    continue
+
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = in_flight.pop(future)
+                    cabin = self.cabins[index]
+                    try:
+                        sample = future.result()
+                    except Exception as e:
+                        cabin.poller.record_error()
+                        self.handle_poll_error(cabin, e)
+                    else:
+                        self.handle_poll_success(cabin)
+                        self.handle_motion_sample(cabin, *sample)
+                    next_poll = time.monotonic() + cabin.poller.interval
+                    heapq.heappush(schedule, (next_poll, index))
+
+        except KeyboardInterrupt:
+            self.reporter.warning("monitor_stopped", "Monitoring stopped by user")
+            self.print_poll_stats()
+            self.print_cabin_errors()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def poll_all(self) -> List[Tuple[CabinState, Optional[int]]]:
+        """Read every cabin's current motion value, concurrently
+
+        Cabins that fail or have no presence reading are left out; failures
+        are tracked and reported per cabin.
+        """
+
+        def poll(cabin):
+            try:
+                return cabin, self.get_motion_value(cabin), None
             except Exception as e:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                console.print(f"[{timestamp}] [red]Error: {e}[/red]")
-                time.sleep(self.poll_interval)
+                return cabin, None, e
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(poll, self.cabins))
+
+        samples = []
+        for cabin, value, error in results:
+            if error is not None:
+                self.handle_poll_error(cabin, error)
+                continue
+            self.handle_poll_success(cabin)
+            if value is not None:
+                samples.append((cabin, value))
+        return samples
+
+    def monitor_push(self):
+        """Monitoring loop driven by the GraphQL measurements feed
+
+        Pushed samples arrive on the subscription thread and are handled
+        here, so logging stays single-threaded. The REST API is only read
+        once at start and once after every reconnect, to catch up on
+        anything missed while disconnected.
+        """
+        from harvia_subscriptions import measurements_feed
+
+        self.reporter.header(
+            "monitor_started",
+            "Harvia Sauna Motion Monitor\n"
+            "PIR sensor - detects movement, not static presence\n"
+            "Push mode - live measurements feed for {cabins} cabin(s)",
+            mode="push",
+            cabins=len(self.cabins),
+        )
+
+        cabins: Dict[Tuple[str, str], CabinState] = {
+            (cabin.device_id, cabin.cabin_id): cabin for cabin in self.cabins
+        }
+        samples = queue.Queue()
+
+        def on_item(item: Dict[str, Any]):
+            cabin = cabins.get((item.get("deviceId"), item.get("subId")))
+            presence = (item.get("data") or {}).get("presence")
+            if cabin is not None and presence is not None:
+                samples.put((cabin, presence))
+
+        def on_resume():
+            for sample in self.poll_all():
+                samples.put(sample)  # the feed itself brings any that failed
+
+        def on_error(e):
+            self.reporter.error(
+                "feed_error", "Feed error: {error} - reconnecting", error=e
+            )
+
+        subscription = measurements_feed(
+            self.endpoints_config,
+            self.tokens,
+            on_item,
+            on_error=on_error,
+            on_resume=on_resume,
+        )
+        subscription.start()
+        on_resume()
+
+        try:
+            while True:
+                try:
+                    cabin, motion_value = samples.get(timeout=1)
+                except queue.Empty:
+                    # No news: re-check the periodic "Last motion" reminders
+                    for cabin in self.cabins:
+                        if cabin.last_motion_value is not None:
+                            self.handle_motion_value(
+                                cabin, cabin.last_motion_value, False
+                            )
+                    continue
+                self.handle_motion_value(cabin, motion_value)
+        except KeyboardInterrupt:
+            self.reporter.warning("monitor_stopped", "Monitoring stopped by user")
+            self.print_cabin_errors()
+        finally:
+            subscription.stop()
 
 
 def main():
     """Main entry point"""
+    from dotenv import load_dotenv
+
+    # Load environment variables
+    load_dotenv()
+
+    # Console output by default; HARVIA_OUTPUT=json or quiet for log collectors
+    reporter = reporter_from_env(styles=MOTION_STYLES, timestamps=True)
+
     # Load credentials from environment
     username = os.getenv("HARVIA_USERNAME")
     password = os.getenv("HARVIA_PASSWORD")
     poll_interval = int(os.getenv("POLL_INTERVAL", "5"))
+    max_poll_interval = float(os.getenv("POLL_MAX_INTERVAL", "60"))
+    concurrency = int(os.getenv("MONITOR_CONCURRENCY", "8"))
+    monitor_mode = os.getenv("MONITOR_MODE", "poll")
+    activity_window = float(os.getenv("ACTIVITY_WINDOW", str(DEFAULT_WINDOW)))
 
     if not username or not password:
-        console.print(
-            "[red]Error: HARVIA_USERNAME and HARVIA_PASSWORD must be set in .env file[/red]"
+        reporter.error(
+            "missing_credentials",
+            "Error: HARVIA_USERNAME and HARVIA_PASSWORD must be set in .env file",
         )
         return
 
+    # Pace requests (HARVIA_RATE_LIMIT=shared to share one budget locally)
+    transport = HarviaTransport(pool_size=max(concurrency, DEFAULT_POOL_SIZE))
+    transport.rate_limiter = RateLimiter.from_env()
+    metrics = enable_from_env(transport)
+
     try:
-        monitor = MotionMonitor(username, password, poll_interval)
-        monitor.monitor()
+        monitor = MotionMonitor(
+            username,
+            password,
+            poll_interval,
+            max_poll_interval,
+            concurrency,
+            transport=transport,
+            reporter=reporter,
+            activity_window=activity_window,
+        )
+        if monitor_mode == "push":
+            monitor.monitor_push()
+        else:
+            monitor.monitor()
     except Exception as e:
-        console.print(f"[red]Fatal error: {e}[/red]")
         import traceback
 
-        console.print(f"[red]{traceback.format_exc()}[/red]")
+        reporter.error(
+            "fatal_error",
+            "Fatal error: {error}\n{traceback}",
+            error=e,
+            traceback=traceback.format_exc(),
+        )
+    finally:
+        write_snapshot_from_env(metrics)
 
 
 if __name__ == "__main__":